@@ -1,15 +1,109 @@
 """
 Baseball Position Guessing Game - Main Flask Application
 """
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, abort, g, make_response, render_template, request, jsonify, session, url_for
+from flask.sessions import SecureCookieSessionInterface
 import csv
+import hashlib
+import json
+import logging
 import random
+import secrets
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from functools import cached_property
+from types import MappingProxyType
 import re
-from difflib import SequenceMatcher
 import os
+from dataset import BaseballDataset, load_dataset, source_info
+from name_matcher import NameMatcher
+from game_store import create_game_store
+from assets import init_assets
+from player_index import PlayerIndex
+from career_index import CareerIndex
+from metrics import MetricsRegistry
+from profiler import init_profiler
+from daily import DailyChallenge, parse_day
+from results_store import ResultsStore
+from difficulty import DifficultySelector, blend_accuracy, starter_ease
+from catalog import build_catalog
+from bundles import TOKEN_MAX_AGE, GameBundles, pick_seasons
+from ingest import init_ingest
+from calibrate import init_calibrate
+from rooms import NameTaken, RoomFull, RoomHub
+from page_cache import PageCache
 
 app = Flask(__name__)
+logger = logging.getLogger(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'
+init_assets(app)
+# PROFILE_SAMPLE_RATE=0.01 profiles 1% of requests into PROFILE_DIR; see profiler.py
+profiler = init_profiler(app)
+
+def season_id(year, team):
+    """Short id for a team-season, stable across dataset versions."""
+    return hashlib.blake2b(f'{year}|{team}'.encode('utf-8'), digest_size=4).hexdigest()
+
+class GameData:
+    """Everything compiled from one version of the dataset.
+
+    A GameData is never modified after it is built; reloading builds a new one
+    and swaps it in with a single attribute assignment, so a request that grabbed
+    the old one keeps a consistent view until it finishes.
+
+    The name matcher, player index and careers are the slow part of a build
+    and no page needs them, so they are built on first use (``warm`` builds
+    them all up front). matcher and players are given as functions making them.
+    """
+
+    def __init__(self, dataset, source, seasons, rosters, invalid_seasons, matcher, players, ease, alternates):
+        self.dataset = dataset
+        self.source = source
+        self.version = source['sha256'][:12]
+        self.loaded_at = time.time()
+        self.seasons = seasons
+        self.rosters = rosters
+        self.invalid_seasons = invalid_seasons
+        self._build_matcher = matcher
+        self._build_players = players
+        self.ease = ease
+        self.alternates = alternates
+        self.difficulty = DifficultySelector(ease)
+
+        # Only seasons with a valid roster can be picked
+        teams_by_year = defaultdict(list)
+        years_by_team = defaultdict(list)
+        for year, team in rosters:
+            teams_by_year[year].append(team)
+            years_by_team[team].append(year)
+        self.teams_by_year = {year: sorted(teams) for year, teams in teams_by_year.items()}
+        self.years_by_team = {team: sorted(years) for team, years in years_by_team.items()}
+        self.years = sorted(self.teams_by_year)
+        self.min_year = self.years[0] if self.years else None
+        self.max_year = self.years[-1] if self.years else None
+        self.season_ids = {season_id(*key): key for key in rosters}
+        if len(self.season_ids) != len(rosters):
+            raise ValueError('Two team-seasons hash to the same season id')
+        self.catalog = dict(build_catalog(self.years_by_team), version=self.version)
+        self.catalog_json = json.dumps(self.catalog, separators=(',', ':')).encode('utf-8')
+
+    @cached_property
+    def matcher(self):
+        return self._build_matcher()
+
+    @cached_property
+    def players(self):
+        return self._build_players()
+
+    @cached_property
+    def careers(self):
+        return CareerIndex(self.dataset, self.rosters)
+
+    def warm(self):
+        """Build everything that is otherwise built on first use."""
+        return self.matcher, self.players, self.careers
 
 class BaseballGame:
     """Main game logic for the baseball position guessing game."""
@@ -26,33 +120,207 @@ class BaseballGame:
         'DH': 'Designated Hitter'
     }
 
-    MIN_YEAR = 2000
-    MAX_YEAR = 2024 # Update this when adding new data!
+    # The eight fielders every starting nine must cover, DH aside
+    FIELD_POSITIONS = frozenset(POSITIONS) - {'DH'}
     
-    def __init__(self, csv_file='baseball_data.csv'):
+    # Seconds between re-blending difficulty with players' observed accuracy
+    DIFFICULTY_REFRESH = 600
+    
+    def __init__(self, csv_file='baseball_data.csv', snapshot_file=None, reload_interval=0,
+                 lenient_min_games=50):
         self.csv_file = csv_file
-        self.data = self._load_data()
+        self.lenient_min_games = lenient_min_games
+        self.snapshot_file = snapshot_file
+        self.reload_interval = reload_interval
+        self.reload_seconds = None
+        self._reload_lock = threading.Lock()
+        self._next_reload_check = time.monotonic() + reload_interval
+        # Optional (year, team) -> stats with guesses and accuracy, e.g. ResultsStore.season_stats
+        self.season_stats = None
+        self._blended_difficulty = None
+        self._game_bundles = None
+        self.state = self._build_state(*self._load_data())
+        self._loaded_stat = (self.state.source['size'], self.state.source['mtime_ns'])
+        self._report_invalid_seasons(self.state)
+
+    # The current GameData's indexes, for callers that only need one of them
+    dataset = property(lambda self: self.state.dataset)
+    seasons = property(lambda self: self.state.seasons)
+    rosters = property(lambda self: self.state.rosters)
+    invalid_seasons = property(lambda self: self.state.invalid_seasons)
+    teams_by_year = property(lambda self: self.state.teams_by_year)
+    years_by_team = property(lambda self: self.state.years_by_team)
+    years = property(lambda self: self.state.years)
+    min_year = property(lambda self: self.state.min_year)
+    max_year = property(lambda self: self.state.max_year)
+    
+    @property
+    def data(self):
+        """All rows as a list of dicts, decoded on demand from the columnar dataset."""
+        return list(self.dataset.rows())
     
     def _load_data(self):
-        """Load baseball data from CSV file."""
-        data = []
+        """Load baseball data from the CSV file, or its binary snapshot when one is fresh.
+
+        Returns the dataset along with the source_info of the CSV it came from.
+        """
         try:
-            with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    data.append({
-                        'year': int(row['year']),
-                        'team': row['team'].strip(),
-                        'position': row['position'].strip(),
-                        'player_name': row['player_name'].strip(),
-                        'games_played': int(row['games_played'])
-                    })
+            return load_dataset(self.csv_file, self.snapshot_file)
         except FileNotFoundError:
             # Create sample data if file doesn't exist
             data = self._create_sample_data()
             self._save_sample_data(data)
-        return data
+            return BaseballDataset.from_rows(data), source_info(self.csv_file)
     
+    def _build_state(self, dataset, source):
+        """Index the loaded rows by season and compile every season's starting nine."""
+        # Row indexes keep their CSV order within a season, which _compile_roster relies on
+        seasons = dataset.season_index()
+        rosters, invalid_seasons = self._compile_rosters(dataset, seasons)
+        alternates = self._build_alternates(dataset, seasons, rosters)
+
+        # Every name that can be an answer is normalized once, on first use
+        answer_names = self._answer_names(rosters, alternates)
+
+        return GameData(dataset, source, seasons, MappingProxyType(rosters), invalid_seasons,
+                        lambda: NameMatcher(answer_names), lambda: PlayerIndex(dataset, self.sanitize_input),
+                        starter_ease(dataset, seasons, rosters), MappingProxyType(alternates))
+
+    def _extend_state(self, state, dataset, source):
+        """Like _build_state, for a dataset that only appends seasons to state's (see BaseballDataset.extends).
+
+        Only the new seasons are indexed and compiled, and only their names
+        normalized; the player index and difficulty ranks span every season,
+        so those are rebuilt.
+        """
+        added = dataset.season_index(start=len(state.dataset))
+        if any(key in state.seasons for key in added):
+            return self._build_state(dataset, source)  # Rows were added to a season already loaded
+
+        new_rosters, new_invalid = self._compile_rosters(dataset, added)
+        new_alternates = self._build_alternates(dataset, added, new_rosters)
+        seasons = {**state.seasons, **added}
+        rosters = {**state.rosters, **new_rosters}
+        alternates = {**state.alternates, **new_alternates}
+        new_names = self._answer_names(new_rosters, new_alternates)
+
+        return GameData(dataset, source, seasons, MappingProxyType(rosters), {**state.invalid_seasons, **new_invalid},
+                        lambda: state.matcher.extended(new_names), lambda: PlayerIndex(dataset, self.sanitize_input),
+                        starter_ease(dataset, seasons, rosters), MappingProxyType(alternates))
+
+    def _compile_rosters(self, dataset, seasons):
+        """Compile the starting nine of each season; returns (rosters, invalid_seasons)."""
+        rosters = {}
+        invalid_seasons = {}
+        for key, indexes in seasons.items():
+            try:
+                rows = list(dataset.rows(indexes[:9]))
+                rosters[key] = MappingProxyType(self._compile_roster(rows))
+            except ValueError as e:
+                invalid_seasons[key] = str(e)
+        return rosters, invalid_seasons
+
+    @staticmethod
+    def _answer_names(rosters, alternates):
+        return ({name for roster in rosters.values() for name in roster.values()}
+                | {name for season in alternates.values() for names in season.values() for name in names})
+
+    def _build_alternates(self, dataset, seasons, rosters):
+        """For lenient games: everyone else listed at a starter's position with enough games played.
+
+        Returns {(year, team): {position: (name, ...)}}, most games first, for
+        seasons that have any.
+        """
+        alternates = {}
+        for key, roster in rosters.items():
+            found = defaultdict(list)
+            for index in seasons[key][len(roster):]:
+                position = dataset.positions[dataset.position_ids[index]]
+                games_played = dataset.games_played[index]
+                if position in roster and games_played >= self.lenient_min_games:
+                    found[position].append((-games_played, dataset.players[dataset.player_ids[index]]))
+            if found:
+                alternates[key] = MappingProxyType(
+                    {position: tuple(name for _, name in sorted(names)) for position, names in found.items()})
+        return alternates
+
+    def _compile_roster(self, rows):
+        """Build a season's starting nine from its rows, raising ValueError if it is incomplete."""
+        first_nine = rows[:9]  # The first nine rows are the starters
+        fielders = [row['position'] for row in first_nine[:8]]
+        if len(fielders) < 8:
+            raise ValueError(f'only {len(fielders)} starters listed')
+        if set(fielders) != self.FIELD_POSITIONS:
+            missing = ', '.join(sorted(self.FIELD_POSITIONS - set(fielders)))
+            raise ValueError(f'starters do not cover every field position (missing {missing})')
+
+        if len(first_nine) == 9 and first_nine[8]['position'] == 'DH':
+            # If we have a DH, include it
+            starters = first_nine
+        else:
+            # If we did not have a primary DH, ignore it
+            starters = first_nine[:8]
+
+        return {row['position']: row['player_name'] for row in starters}
+
+    def _report_invalid_seasons(self, state):
+        """Log every season that failed roster validation so it is caught at load time."""
+        for (year, team), reason in sorted(state.invalid_seasons.items()):
+            logger.warning('Skipping %s %s: %s', year, team, reason)
+
+    def reload(self):
+        """Rebuild everything from the data file and swap it in; returns the new GameData."""
+        started = time.perf_counter()
+        dataset, source = load_dataset(self.csv_file, self.snapshot_file)
+        if dataset.extends(self.state.dataset):
+            # New seasons appended (e.g. by `flask ingest`): compile just those
+            state = self._extend_state(self.state, dataset, source)
+        else:
+            state = self._build_state(dataset, source)
+        self._report_invalid_seasons(state)
+        # Reloads run in the background, so requests never wait on the indexes
+        state.warm()
+        self.state = state
+        self.reload_seconds = time.perf_counter() - started
+        logger.info('Loaded dataset version %s in %.3fs', state.version, self.reload_seconds)
+        return state
+
+    def reload_if_changed(self):
+        """Start a background reload if the data file changed since it was loaded.
+
+        Cheap enough to call on every request: the file is only stat()ed once per
+        reload_interval seconds, and at most one reload runs at a time.
+        """
+        if not self.reload_interval:
+            return False
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return False
+        self._next_reload_check = now + self.reload_interval
+
+        try:
+            stat = os.stat(self.csv_file)
+        except OSError:
+            return False
+        if (stat.st_size, stat.st_mtime_ns) == self._loaded_stat:
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self.reload()
+            except Exception:
+                logger.exception('Reloading %s failed; keeping dataset version %s',
+                                 self.csv_file, self.state.version)
+            finally:
+                # Either way, don't look at this file again until it changes
+                self._loaded_stat = (stat.st_size, stat.st_mtime_ns)
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name='dataset-reload', daemon=True).start()
+        return True
+
     def _create_sample_data(self):
         """Create sample data for demonstration."""
         sample_data = [
@@ -88,49 +356,116 @@ class BaseballGame:
             writer.writerows(data)
     
     def get_year_for_team(self, team):
-        if team in set(row['team'] for row in self.data):
-            return random.choice(list(set(row['year'] for row in self.data if row['team'] == team)))
+        years_by_team = self.state.years_by_team
+        if team in years_by_team:
+            return random.choice(years_by_team[team])
         else:
             raise ValueError('Invalid team!')
 
     def get_team_for_year(self, year):
-        if(year >= self.MIN_YEAR and year <= self.MAX_YEAR):
-            return random.choice(list(set(row['team'] for row in self.data if row['year'] == year)))
+        teams_by_year = self.state.teams_by_year
+        if year in teams_by_year:
+            return random.choice(teams_by_year[year])
         else:
             raise ValueError('Invalid year!')
 
     def get_random_team(self):
-        """Get a random team from a random year between 2000-2024."""
-        year = random.randint(self.MIN_YEAR, self.MAX_YEAR)
-        teams_for_year = list(set([row['team'] for row in self.data if row['year'] == year]))
+        """Get a random team from a random year between the first and last season in the data."""
+        state = self.state
+        year = random.randint(state.min_year, state.max_year)
+        teams_for_year = state.teams_by_year.get(year)
         
         if not teams_for_year:
             # Fallback to any available team if no teams for selected year
-            year = random.choice(list(set([row['year'] for row in self.data])))
-            teams_for_year = list(set([row['team'] for row in self.data if row['year'] == year]))
+            year = random.choice(state.years)
+            teams_for_year = state.teams_by_year[year]
         
         team = random.choice(teams_for_year)
         return year, team
 
+    def difficulty_selector(self):
+        """The current seasons' DifficultySelector, blended with observed accuracy if available."""
+        state = self.state
+        if self.season_stats is None:
+            return state.difficulty
+        cached = self._blended_difficulty
+        if cached is None or cached[0] is not state or time.monotonic() >= cached[1]:
+            selector = DifficultySelector(blend_accuracy(state.ease, self.season_stats))
+            cached = self._blended_difficulty = (state, time.monotonic() + self.DIFFICULTY_REFRESH, selector)
+        return cached[2]
+
+    def get_team_by_difficulty(self, difficulty):
+        """Get a random team-season from a difficulty tier: 'easy', 'medium' or 'hard'."""
+        return self.difficulty_selector().pick(difficulty)
+
+    def warm(self, secret_key):
+        """Build the current data's lazily built indexes and bundles now, e.g. before forking workers."""
+        self.state.warm()
+        self.game_bundles(secret_key)
+
+    def game_bundles(self, secret_key):
+        """Prefetch bundles for the current data, built on first use after each reload."""
+        state = self.state
+        bundles = self._game_bundles
+        if bundles is None or bundles.state is not state:
+            bundles = self._game_bundles = GameBundles(state, secret_key, season_id)
+        return bundles
+
+    def get_random_player(self):
+        """Pick a player for a "guess the teams" game from everyone who started a season."""
+        careers = self.state.careers
+        return careers.names[random.choice(careers.starters)]
+
+    def evaluate_reverse(self, player, guesses):
+        """Score a "guess the teams" game: which seasons did the player start in?
+
+        guesses is a list of (year, team) pairs. Each one is two dict lookups
+        in the CareerIndex; team names are normalized the way compare_names
+        normalizes player names, so case and punctuation don't matter. A
+        season guessed twice only counts once.
+        """
+        careers = self.state.careers
+        started = careers.started(player)
+        if not started:
+            raise ValueError('Unknown player!')
+
+        results = []
+        found = set()
+        for year, team in guesses:
+            start = careers.check(player, year, team)
+            if start is None:
+                results.append({'year': year, 'team': team, 'correct': False,
+                                'message': f'{player} did not start for {team} in {year}'})
+            elif start in found:
+                results.append({'year': year, 'team': start[1], 'correct': False, 'message': 'Already guessed'})
+            else:
+                found.add(start)
+                results.append({'year': year, 'team': start[1], 'position': start[2], 'correct': True,
+                                'message': f'Correct! {self.POSITIONS[start[2]]}'})
+
+        missed = [{'year': year, 'team': team, 'position': position}
+                  for year, team, position in started if (year, team, position) not in found]
+        percentage = len(found) / len(started) * 100
+        return results, missed, len(found), len(started), percentage
+
+    def get_alternates(self, year, team):
+        """Players also accepted at each position in a lenient game, as {position: (name, ...)}."""
+        return self.state.alternates.get((year, team), {})
+
     def get_team_roster(self, year, team):
         """Get the roster for a specific team and year."""
-        roster = {}
-        team_data = [row for row in self.data if row['year'] == year and row['team'] == team]
-        
-        first_nine = team_data[:9]  # Get first nine players for the roster
-        if first_nine[8]['position'] != 'DH':
-            # If we did not have a primary DH, ignore it
-            team_data = first_nine[:8]
-        else:
-            # If we have a DH, include it
-            team_data = first_nine
+        roster = self.state.rosters.get((year, team))
+        if roster is None:
+            raise ValueError('Invalid team and year!')
+        return dict(roster)
+    
+    def new_game_id(self, year, team):
+        """Issue an id for a new game; its prefix is the season id, so it maps to a roster by itself."""
+        return f'{season_id(year, team)}.{secrets.token_urlsafe(6)}'
 
-        for row in team_data:
-            position = row['position']
-            if position in self.POSITIONS:  # Only include defined positions
-                roster[position] = row['player_name']
-        
-        return roster
+    def season_for_game(self, game_id):
+        """Return the (year, team) a game id was issued for, or None if it isn't one."""
+        return self.state.season_ids.get(str(game_id).partition('.')[0])
     
     def has_designated_hitter(self, roster):
         """Check if the team uses a designated hitter."""
@@ -140,6 +475,8 @@ class BaseballGame:
         """Sanitize user input to only allow alphabetic characters, spaces, apostrophes, and periods."""
         if not name:
             return ""
+        # Fold accents first, so "Acuña" keeps its n rather than losing the letter
+        name = unicodedata.normalize('NFKD', name)
         # Remove any non-alphabetic characters except spaces, apostrophes, and periods
         sanitized = re.sub(r"[^a-zA-Z\s'.]", '', name.strip())
         # Remove extra spaces
@@ -147,31 +484,20 @@ class BaseballGame:
         return sanitized
     
     def compare_names(self, guess, actual):
-        """Compare names with fuzzy matching (case-insensitive, 2 character tolerance)."""
-        if not guess or not actual:
-            return False, 0
-        
-        guess = guess.lower().strip()
-        actual = actual.lower().strip()
-        actualWithoutPunctuation = re.sub(r"[^\w\s]", '', actual)  # Remove punctuation for comparison
-        print(actualWithoutPunctuation)
-
-        # Exact match
-        if guess == actual or guess == actualWithoutPunctuation:
-            return True, 1.0
-        
-        # Calculate similarity using SequenceMatcher
-        similarity = SequenceMatcher(None, guess, actual).ratio()
-        
-        # Check if names are within 2 characters using edit distance approximation
-        # A similarity of 0.8 or higher typically indicates close matches
-        if similarity >= 0.8:
-            return True, similarity
-        
-        return False, similarity
+        """Compare names with fuzzy matching (case-insensitive, 0.8 similarity threshold)."""
+        return self.state.matcher.match(guess, actual)
     
-    def evaluate_guesses(self, guesses, roster):
-        """Evaluate user guesses against the correct roster."""
+    def evaluate_guesses(self, guesses, roster, timings=None, alternates=None):
+        """Evaluate user guesses against the correct roster.
+
+        In a lenient game, alternates maps positions to other players who also
+        count as correct there (see get_alternates). If a timings dict is
+        passed, the seconds spent sanitizing and comparing names are added to
+        its 'sanitize_input' and 'compare_names' entries.
+
+        A rejected guess is not scored in full: its 'similarity' is an upper
+        bound on the SequenceMatcher ratio, flagged with 'similarity_bound'.
+        """
         results = {}
         correct_count = 0
         total_guesses = 0
@@ -183,10 +509,33 @@ class BaseballGame:
                 
                 if guess:  # User made a guess
                     total_guesses += 1
+                    started = time.perf_counter()
                     sanitized_guess = self.sanitize_input(guess)
+                    sanitized = time.perf_counter()
                     is_correct, similarity = self.compare_names(sanitized_guess, actual)
+                    matched = None
+                    if not is_correct and alternates:
+                        for name in alternates.get(position, ()):
+                            alternate_correct, alternate_similarity = self.compare_names(sanitized_guess, name)
+                            if alternate_correct:
+                                is_correct, similarity, matched = True, alternate_similarity, name
+                                break
+                    if timings is not None:
+                        timings['sanitize_input'] = timings.get('sanitize_input', 0) + sanitized - started
+                        timings['compare_names'] = (timings.get('compare_names', 0)
+                                                    + time.perf_counter() - sanitized)
                     
-                    if is_correct:
+                    if matched:
+                        correct_count += 1
+                        results[position] = {
+                            'guess': sanitized_guess,
+                            'actual': actual,
+                            'matched': matched,
+                            'correct': True,
+                            'message': f'Correct! {matched} also played here; {actual} started the most games.',
+                            'similarity': similarity
+                        }
+                    elif is_correct:
                         correct_count += 1
                         results[position] = {
                             'guess': sanitized_guess,
@@ -201,7 +550,8 @@ class BaseballGame:
                             'actual': actual,
                             'correct': False,
                             'message': f'Incorrect. The correct answer is: {actual}',
-                            'similarity': similarity
+                            'similarity': similarity,
+                            'similarity_bound': True
                         }
                 else:  # No guess made
                     results[position] = {
@@ -218,8 +568,165 @@ class BaseballGame:
         
         return results, correct_count, num_players, percentage
 
-# Initialize the game
-game = BaseballGame()
+    def evaluate_batch(self, entries):
+        """Score many guess sets in one pass.
+
+        Each entry is a dict with an optional 'id', either a 'game_id' or the
+        'year' and 'team' of the season being guessed, a 'guesses' dict of
+        position to name, and optionally 'lenient': true. Rosters are
+        looked up once per season, and a guess that several entries share for
+        the same player is only sanitized and compared once. Returns one compact
+        result per entry, in order; entries that can't be scored get an 'error'.
+        """
+        state = self.state
+        matcher = state.matcher
+        decisions = {}
+        results = []
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                results.append({'id': None, 'error': 'Entry must be an object'})
+                continue
+            result = {'id': entry.get('id')}
+            results.append(result)
+
+            if 'game_id' in entry:
+                season = state.season_ids.get(str(entry['game_id']).partition('.')[0])
+            else:
+                season = (entry.get('year'), entry.get('team'))
+            roster = state.rosters.get(season)
+            guesses = entry.get('guesses')
+            if roster is None:
+                result['error'] = 'Invalid team and year!'
+                continue
+            if not isinstance(guesses, dict):
+                result['error'] = 'guesses must be an object'
+                continue
+
+            alternates = state.alternates.get(season, {}) if entry.get('lenient') is True else {}
+            correct = []
+            total_guesses = 0
+            for position, actual in roster.items():
+                guess = guesses.get(position)
+                if not isinstance(guess, str) or not guess.strip():
+                    continue
+                total_guesses += 1
+                for name in (actual, *alternates.get(position, ())):
+                    key = (name, guess)
+                    is_correct = decisions.get(key)
+                    if is_correct is None:
+                        is_correct = decisions[key] = matcher.match(self.sanitize_input(guess), name)[0]
+                    if is_correct:
+                        correct.append(position)
+                        break
+
+            num_players = len(roster)
+            percentage = (len(correct) / num_players * 100) if total_guesses > 0 else 0
+            result.update({
+                'correct': correct,
+                'correct_count': len(correct),
+                'num_players': num_players,
+                'percentage': round(percentage, 1)
+            })
+
+        return results
+
+# Initialize the game; DATA_SNAPSHOT='' turns the binary snapshot cache off and
+# DATA_RELOAD_INTERVAL=0 stops watching baseball_data.csv for changes
+# LENIENT_MIN_GAMES is how many games a backup needs to count as correct in lenient games
+game = BaseballGame(snapshot_file=os.environ.get('DATA_SNAPSHOT', 'baseball_data.snapshot') or None,
+                    reload_interval=float(os.environ.get('DATA_RELOAD_INTERVAL', 30)),
+                    lenient_min_games=int(os.environ.get('LENIENT_MIN_GAMES', 50)))
+init_ingest(app, game)
+init_calibrate(app, game)
+
+# GAME_STATE=server keeps only a game id in the session cookie and per-game state
+# in GAME_STORE ('memory' or 'sqlite:path', see game_store.py); 'cookie' keeps
+# the whole roster in the cookie as before. The store also remembers which
+# bundled games were recorded; only 'sqlite' shares that between workers
+app.config['GAME_STATE'] = os.environ.get('GAME_STATE', 'server')
+game_store = create_game_store(os.environ.get('GAME_STORE', 'memory'))
+
+# Finished games go to RESULTS_DB (SQLite, written by a background thread) for
+# per-season and per-position accuracy; RESULTS_DB='' turns this off
+results_db = os.environ.get('RESULTS_DB', os.path.join(app.instance_path, 'results.sqlite3'))
+results_store = ResultsStore(results_db) if results_db else None
+if results_store:
+    game.season_stats = results_store.season_stats
+
+def load_game(game_id):
+    """Resolve a game id to (year, team, roster, state); the roster is empty if unknown."""
+    state = game_store.get(game_id)
+    # The store only adds to the game id; if it was evicted the id still names the season
+    season = (state['year'], state['team']) if state else game.season_for_game(game_id)
+    roster = game.state.rosters.get(season) if season else None
+    if roster is None:
+        return None, None, {}, state
+    return season[0], season[1], dict(roster), state
+
+# Largest number of guess sets accepted by /submit_guesses/batch and /api/games/verify
+MAX_BATCH_ENTRIES = int(os.environ.get('MAX_BATCH_ENTRIES', 1000))
+# Most games handed out in one prefetch bundle
+MAX_BUNDLE_GAMES = 20
+
+# With METRICS_DIR set (gunicorn.conf.py sets it), every worker writes its
+# counters there and /metrics reports the sum over all of them
+metrics = MetricsRegistry(os.environ.get('METRICS_DIR') or None)
+
+def metrics_route():
+    """The matched URL rule, so metrics have one series per route rather than per URL."""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Signed cookie sessions, timing how long it takes to serialize one into the response."""
+
+    def save_session(self, app, session, response):
+        with metrics.stage(metrics_route(), 'save_session'):
+            return super().save_session(app, session, response)
+
+app.session_interface = TimedSessionInterface()
+
+@app.before_request
+def start_request_timer():
+    g.metrics_started = time.perf_counter()
+
+@app.after_request
+def remember_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(exc):
+    # Runs after the session is saved and the response is built
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    route = metrics_route()
+    status = 500 if exc is not None else g.pop('metrics_status', 500)
+    metrics.observe('http_request_duration_seconds', time.perf_counter() - started, route=route)
+    metrics.inc('http_requests_total', route=route, method=request.method, status=status)
+    if status >= 500:
+        metrics.inc('http_request_errors_total', route=route, status=status)
+
+@app.before_request
+def reload_data_if_changed():
+    game.reload_if_changed()
+
+@app.after_request
+def add_dataset_version(response):
+    response.headers['X-Dataset-Version'] = game.state.version
+    return response
+
+def render_game(year, team, roster):
+    return render_template('index.html',
+                           year=year,
+                           team=team,
+                           positions=game.POSITIONS,
+                           has_dh=game.has_designated_hitter(roster))
+
+# PAGE_CACHE_SIZE rendered game pages are kept (there are about 750 seasons);
+# PAGE_CACHE_WARM=1 renders them all at startup (see the end of this file)
+pages = PageCache(game, render_game, max_pages=int(os.environ.get('PAGE_CACHE_SIZE', 1000)))
 
 @app.route('/')
 def index():
@@ -227,45 +734,82 @@ def index():
     # Get a new random team for this session
     year = request.args.get('year', type=int)
     team = request.args.get('team', type=str)
+    difficulty = request.args.get('difficulty', type=str)
+    # A lenient game also accepts backups who played enough games at a position
+    lenient = request.args.get('lenient', '') in ('1', 'true', 'on')
+
+    # Only seasons that exist can be asked for; anything else is a bad link
+    state = game.state
+    if team and team not in state.years_by_team:
+        abort(404, description=f'Unknown team: {team}')
+    if year and year not in state.teams_by_year:
+        abort(404, description=f'No teams for {year}')
+    if year and team and (year, team) not in state.rosters:
+        abort(404, description=f'The {team} did not play in {year}')
 
+    route = metrics_route()
     try:
-        if year and team:
-            roster = game.get_team_roster(year, team)
-        elif year:
-            team = game.get_team_for_year(year)
-            roster = game.get_team_roster(year, team)
-        elif team:
-            year = game.get_year_for_team(team)
+        with metrics.stage(route, 'pick_team'):
+            if difficulty and not (year or team):
+                year, team = game.get_team_by_difficulty(difficulty)
+            elif year and not team:
+                team = game.get_team_for_year(year)
+            elif team and not year:
+                year = game.get_year_for_team(team)
+            elif not year:
+                year, team = game.get_random_team()
+        with metrics.stage(route, 'get_team_roster'):
             roster = game.get_team_roster(year, team)
-        else:
+    except ValueError as e:
+        # Only an unknown difficulty gets here, since bad years and teams 404 above;
+        # it falls back to a random game, but is still counted
+        metrics.inc('handled_exceptions_total', route=route, exception=type(e).__name__)
+        with metrics.stage(route, 'pick_team'):
             year, team = game.get_random_team()
+        with metrics.stage(route, 'get_team_roster'):
             roster = game.get_team_roster(year, team)
-    except:
-        year, team = game.get_random_team()
-        roster = game.get_team_roster(year, team)
     
     # Store game data in session
-    session['year'] = year
-    session['team'] = team
-    session['roster'] = roster
-    
-    # Check if team has designated hitter
-    has_dh = game.has_designated_hitter(roster)
+    with metrics.stage(route, 'store_game'):
+        if app.config['GAME_STATE'] == 'server':
+            game_id = game.new_game_id(year, team)
+            game_store.set(game_id, {'year': year, 'team': team, 'started': time.time(), 'lenient': lenient})
+            for key in ('year', 'team', 'roster', 'lenient'):
+                session.pop(key, None)
+            session['game'] = game_id
+        else:
+            session.pop('game', None)
+            session['year'] = year
+            session['team'] = team
+            session['roster'] = roster
+            if lenient:
+                session['lenient'] = True
+            else:
+                session.pop('lenient', None)
     
-    return render_template('index.html', 
-                         year=year, 
-                         team=team, 
-                         positions=game.POSITIONS,
-                         has_dh=has_dh)
+    with metrics.stage(route, 'render_template'):
+        page = pages.page(year, team, roster)
+    response = make_response(page.html)
+    # The page is the same for everyone playing the season; only the cookie differs
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.set_etag(page.etag)
+    return response.make_conditional(request)
 
 @app.route('/submit_guesses', methods=['POST'])
 def submit_guesses():
     """Process user guesses and return results."""
+    route = metrics_route()
     try:
         # Get data from session
-        roster = session.get('roster', {})
-        year = session.get('year')
-        team = session.get('team')
+        game_id = session.get('game')
+        if game_id:
+            year, team, roster, state = load_game(game_id)
+        else:
+            state = None
+            roster = session.get('roster', {})
+            year = session.get('year')
+            team = session.get('team')
         
         if not roster:
             return jsonify({'error': 'No active game found'}), 400
@@ -278,9 +822,130 @@ def submit_guesses():
                 guesses[position] = guess
         
         # Evaluate guesses
-        results, correct_count, num_players, percentage = game.evaluate_guesses(guesses, roster)
+        lenient = state.get('lenient') if state else session.get('lenient')
+        alternates = game.get_alternates(year, team) if lenient else None
+        timings = {}
+        results, correct_count, num_players, percentage = game.evaluate_guesses(guesses, roster, timings,
+                                                                                alternates)
+        for stage, seconds in timings.items():
+            metrics.observe('stage_duration_seconds', seconds, route=route, stage=stage)
+        if results_store and not (state and state.get('submitted')):
+            # Resubmitting a game already scored does not count twice
+            results_store.record('classic', year, team, results)
+        if game_id and state:
+            game_store.set(game_id, dict(state, submitted=time.time()))
         
-        return jsonify({
+        with metrics.stage(route, 'jsonify'):
+            return jsonify({
+                'results': results,
+                'correct_count': correct_count,
+                'num_players': num_players,
+                'percentage': round(percentage, 1),
+                'year': year,
+                'team': team
+            })
+    
+    except Exception as e:
+        metrics.inc('handled_exceptions_total', route=route, exception=type(e).__name__)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/submit_guesses/batch', methods=['POST'])
+def submit_guesses_batch():
+    """Score many players' guesses in one request, e.g. for a classroom or office event."""
+    payload = request.get_json(silent=True)
+    entries = payload.get('entries') if isinstance(payload, dict) else None
+    if not isinstance(entries, list):
+        return jsonify({'error': 'Expected a JSON object with an entries list'}), 400
+    if len(entries) > MAX_BATCH_ENTRIES:
+        return jsonify({'error': f'At most {MAX_BATCH_ENTRIES} entries per batch'}), 413
+
+    return jsonify({
+        'results': game.evaluate_batch(entries),
+        'version': game.state.version
+    })
+
+@app.route('/api/players/suggest')
+def suggest_players():
+    """Autocomplete player names, optionally only those who played a year and/or position."""
+    state = game.state
+    suggestions = state.players.suggest(
+        request.args.get('q', ''),
+        year=request.args.get('year', type=int),
+        position=request.args.get('position', type=str),
+        limit=max(1, min(request.args.get('limit', 10, type=int), 25)))
+
+    response = jsonify({'suggestions': suggestions})
+    # Suggestions only change with the data, and the response sets no cookie
+    response.cache_control.public = True
+    response.cache_control.max_age = 24 * 60 * 60
+    response.set_etag(state.version)
+    return response.make_conditional(request)
+
+@app.route('/api/catalog')
+def catalog():
+    """Every team, the years it can be played and its franchise, for the new game picker."""
+    state = game.state
+    response = Response(state.catalog_json, mimetype='application/json')
+    # Cached, but checked against the dataset version on every use
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    response.set_etag(state.version)
+    return response.make_conditional(request)
+
+@app.route('/api/games/bundle')
+def game_bundle():
+    """The next few games, so the browser can start each one without loading a page."""
+    count = max(1, min(request.args.get('count', 5, type=int), MAX_BUNDLE_GAMES))
+    lenient = request.args.get('lenient', '') in ('1', 'true', 'on')
+    bundles = game.game_bundles(app.secret_key)
+    try:
+        seasons = pick_seasons(game, count, request.args.get('difficulty', type=str))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(bundles.bundle(seasons, lenient), mimetype='application/json')
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/api/games/verify', methods=['POST'])
+def verify_games():
+    """Score and record games played from a bundle; expects {"games": [{"token": ..., "guesses": {...}}]}."""
+    payload = request.get_json(silent=True)
+    entries = payload.get('games') if isinstance(payload, dict) else None
+    if not isinstance(entries, list):
+        return jsonify({'error': 'Expected a JSON object with a games list'}), 400
+    if len(entries) > MAX_BATCH_ENTRIES:
+        return jsonify({'error': f'At most {MAX_BATCH_ENTRIES} games per request'}), 413
+
+    bundles = game.game_bundles(app.secret_key)
+    state = bundles.state
+    verified = []
+    for entry in entries:
+        token = entry.get('token') if isinstance(entry, dict) else None
+        guesses = entry.get('guesses') if isinstance(entry, dict) else None
+        try:
+            sid, lenient, nonce = bundles.read_token(token)
+        except ValueError as e:
+            verified.append({'token': token, 'error': str(e)})
+            continue
+        season = state.season_ids.get(sid)
+        if season is None or not isinstance(guesses, dict):
+            verified.append({'token': token, 'error': 'Invalid game'})
+            continue
+
+        year, team = season
+        guesses = {position: guess.strip() for position, guess in guesses.items()
+                   if position in game.POSITIONS and isinstance(guess, str) and guess.strip()}
+        results, correct_count, num_players, percentage = game.evaluate_guesses(
+            guesses, dict(state.rosters[season]), alternates=state.alternates.get(season) if lenient else None)
+        # A game is recorded once, however many times its token is sent while
+        # it is valid. The default memory store keeps its claims per worker, so
+        # with several workers use GAME_STORE=sqlite:... to share them
+        if game_store.claim(f'bundle.{nonce}', TOKEN_MAX_AGE):
+            if results_store:
+                results_store.record('bundle', year, team, results)
+        verified.append({
+            'token': token,
             'results': results,
             'correct_count': correct_count,
             'num_players': num_players,
@@ -288,14 +953,283 @@ def submit_guesses():
             'year': year,
             'team': team
         })
-    
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'games': verified, 'version': state.version})
+
+@app.route('/reverse')
+def reverse_game():
+    """The "guess the teams" page; reverse.js starts a game through /reverse/new."""
+    return render_template('reverse.html')
+
+@app.route('/reverse/new')
+def new_reverse_game():
+    """Start a "guess the teams" game: name a player and ask for the seasons they started."""
+    player = request.args.get('player', type=str)
+    state = game.state
+    if player:
+        name = state.careers.name(player)
+        if name is None:
+            abort(404, description=f'No starting seasons for {player}')
+        player = name
+    else:
+        player = game.get_random_player()
+    session['reverse'] = player
+    return jsonify({
+        'player': player,
+        'seasons': len(state.careers.started(player)),
+        'min_year': state.min_year,
+        'max_year': state.max_year
+    })
+
+@app.route('/reverse/submit', methods=['POST'])
+def submit_reverse():
+    """Score the seasons guessed for the current "guess the teams" game."""
+    player = session.get('reverse')
+    if not player:
+        return jsonify({'error': 'No active game found'}), 400
+    payload = request.get_json(silent=True)
+    entries = payload.get('guesses') if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or len(entries) > MAX_BATCH_ENTRIES:
+        return jsonify({'error': 'Expected a JSON object with a guesses list'}), 400
+    try:
+        guesses = [(int(entry['year']), str(entry['team'])) for entry in entries]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Each guess needs a year and a team'}), 400
+
+    try:
+        results, missed, correct_count, num_seasons, percentage = game.evaluate_reverse(player, guesses)
+    except ValueError as e:
+        # The player's seasons went away in a data reload
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'player': player,
+        'results': results,
+        'missed': missed,
+        'correct_count': correct_count,
+        'num_seasons': num_seasons,
+        'percentage': round(percentage, 1)
+    })
+
+# Head-to-head rooms live in this process, so they are off unless ROOMS=on:
+# turning them on makes gunicorn run a single worker. ROOM_MAX_WATCHERS caps
+# the event streams it holds open, each of which takes one of its threads
+ROOMS_ENABLED = os.environ.get('ROOMS', 'off') in ('1', 'true', 'on')
+rooms = RoomHub(max_watchers=int(os.environ.get('ROOM_MAX_WATCHERS', 150)))
+app.jinja_env.globals['rooms_enabled'] = ROOMS_ENABLED
+
+def find_room(room_id):
+    """Return (room, roster), or 404 if there is no such room or its season is gone since a reload."""
+    room = rooms.get(room_id) if ROOMS_ENABLED else None
+    roster = game.state.rosters.get((room.year, room.team)) if room else None
+    if roster is None:
+        abort(404, description='No such room')
+    return room, dict(roster)
+
+@app.route('/rooms', methods=['POST'])
+def create_room():
+    """Open a room on one team-season (given, by difficulty, or random) for several players to race on."""
+    year = request.values.get('year', type=int)
+    team = request.values.get('team', type=str)
+    difficulty = request.values.get('difficulty', type=str)
+    lenient = request.values.get('lenient', '') in ('1', 'true', 'on')
+    if not ROOMS_ENABLED:
+        abort(404)
+    try:
+        if year and team:
+            game.get_team_roster(year, team)
+        elif difficulty:
+            year, team = game.get_team_by_difficulty(difficulty)
+        else:
+            year, team = game.get_random_team()
+        room = rooms.create(year, team, lenient)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RoomFull as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(dict(rooms.describe(room), events=url_for('room_events', room_id=room.id),
+                        play=url_for('play_room', room_id=room.id))), 201
+
+@app.route('/rooms/<room_id>')
+def show_room(room_id):
+    """A room's season and standings."""
+    room, roster = find_room(room_id)
+    return jsonify(dict(rooms.describe(room), has_dh='DH' in roster,
+                        events=url_for('room_events', room_id=room.id)))
+
+@app.route('/rooms/<room_id>/play')
+def play_room(room_id):
+    """A room's game page: the usual diamond, submitting to the room, with live standings."""
+    room, roster = find_room(room_id)
+    return render_template('index.html',
+                           year=room.year,
+                           team=room.team,
+                           positions=game.POSITIONS,
+                           has_dh=game.has_designated_hitter(roster),
+                           room=room.id,
+                           submit_url=url_for('submit_room_guesses', room_id=room.id))
+
+@app.route('/rooms/<room_id>/join', methods=['POST'])
+def join_room(room_id):
+    """Join a room under a display name; the session remembers which room, name and player token."""
+    room, _ = find_room(room_id)
+    name = ' '.join(request.values.get('name', '').split())[:40]
+    if not name:
+        return jsonify({'error': 'A name is required'}), 400
+    joined = session.get('room')
+    token = joined[2] if joined and len(joined) == 3 and joined[:2] == [room.id, name] else None
+    try:
+        token = rooms.join(room, name, token)
+    except (RoomFull, NameTaken) as e:
+        return jsonify({'error': str(e)}), 409
+    session['room'] = [room.id, name, token]
+    return jsonify(rooms.describe(room))
+
+@app.route('/rooms/<room_id>/submit', methods=['POST'])
+def submit_room_guesses(room_id):
+    """Score a room player's guesses, like /submit_guesses, and push the new standings to the room."""
+    room, roster = find_room(room_id)
+    joined = session.get('room')
+    if not joined or len(joined) != 3 or joined[0] != room.id or not rooms.is_player(room, *joined[1:]):
+        return jsonify({'error': 'Join the room first'}), 400
+    name = joined[1]
+
+    guesses = {}
+    for position in game.POSITIONS.keys():
+        guess = request.form.get(position, '').strip()
+        if guess:
+            guesses[position] = guess
+    alternates = game.get_alternates(room.year, room.team) if room.lenient else None
+    results, correct_count, num_players, percentage = game.evaluate_guesses(guesses, roster, alternates=alternates)
+    if not rooms.submit(room, name, correct_count, num_players, percentage):
+        return jsonify({'error': 'You already submitted in this room'}), 409
+    if results_store:
+        results_store.record('room', room.year, room.team, results)
+    return jsonify({
+        'results': results,
+        'correct_count': correct_count,
+        'num_players': num_players,
+        'percentage': round(percentage, 1),
+        'year': room.year,
+        'team': room.team,
+        'standings': rooms.describe(room)['standings']
+    })
+
+@app.route('/rooms/<room_id>/events')
+def room_events(room_id):
+    """Server-sent events for a room: its state on connect, then every join and score as it happens."""
+    room, _ = find_room(room_id)
+    try:
+        watcher = rooms.watch(room)
+    except RoomFull as e:
+        return jsonify({'error': str(e)}), 503
+    response = Response(iter(watcher), mimetype='text/event-stream')
+    response.call_on_close(lambda: rooms.unwatch(watcher))  # Even if the stream never started
+    response.cache_control.no_store = True
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let a proxy hold events back
+    return response
 
 @app.route('/new_game')
 def new_game():
     """Start a new game with a different team."""
     return index()
 
+def render_daily(year, team, roster, day):
+    return render_template('index.html',
+                           year=year,
+                           team=team,
+                           positions=game.POSITIONS,
+                           has_dh=game.has_designated_hitter(roster),
+                           daily=day.isoformat(),
+                           submit_url=url_for('submit_daily', date=day.isoformat(), year=year, team=team))
+
+daily = DailyChallenge(game, render_daily)
+
+@app.route('/daily')
+def daily_game():
+    """Today's game, the same for everyone; it never touches the session, so caches can share it."""
+    puzzle = daily.puzzle()
+    response = make_response(puzzle.html)
+    response.cache_control.public = True
+    response.cache_control.max_age = daily.seconds_until_tomorrow()
+    response.set_etag(puzzle.etag)
+    return response.make_conditional(request)
+
+@app.route('/daily/submit', methods=['POST'])
+def submit_daily():
+    """Score guesses for a daily game and add the first of them from each session to that day's results."""
+    day = parse_day(request.args.get('date')) or daily.today()
+    if day not in daily.playable_days():
+        return jsonify({'error': 'That daily game is over'}), 400
+    puzzle = daily.puzzle(day)
+    # A reload can change the day's season under a page that is still open
+    year, team = request.args.get('year', type=int), request.args.get('team', type=str)
+    if (year or team) and (year, team) != (puzzle.year, puzzle.team):
+        return jsonify({'error': "The daily game has changed; reload the page to play today's"}), 409
+
+    guesses = {}
+    for position in game.POSITIONS.keys():
+        guess = request.form.get(position, '').strip()
+        if guess:
+            guesses[position] = guess
+    if not guesses:
+        return jsonify({'error': 'No guesses submitted'}), 400
+
+    results, correct_count, num_players, percentage = game.evaluate_guesses(guesses, puzzle.roster)
+    # Resubmitting is still scored, but only a session's first game of the day is counted
+    playable = {playable_day.isoformat() for playable_day in daily.playable_days()}
+    played = [played_day for played_day in session.get('daily_played', []) if played_day in playable]
+    if day.isoformat() not in played:
+        session['daily_played'] = played + [day.isoformat()]
+        daily.record(day, correct_count)
+        if results_store:
+            results_store.record('daily', puzzle.year, puzzle.team, results)
+    return jsonify({
+        'results': results,
+        'correct_count': correct_count,
+        'num_players': num_players,
+        'percentage': round(percentage, 1),
+        'year': puzzle.year,
+        'team': puzzle.team,
+        'date': day.isoformat()
+    })
+
+@app.route('/daily/results')
+def daily_results():
+    """How everyone has scored on a daily game so far (in this worker)."""
+    day = parse_day(request.args.get('date')) or daily.today()
+    if day not in daily.playable_days():
+        abort(404)
+    response = jsonify(daily.results(day))
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response
+
+@app.route('/data_version')
+def data_version():
+    """Report which dataset version this worker is serving."""
+    state = game.state
+    return jsonify({
+        'version': state.version,
+        'loaded_at': state.loaded_at,
+        'reload_seconds': game.reload_seconds,
+        'rows': len(state.dataset),
+        'seasons': len(state.rosters),
+        'min_year': state.min_year,
+        'max_year': state.max_year,
+        'pid': os.getpid()
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request counts and latency histograms, summed over every worker, in Prometheus text format."""
+    response = Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    response.cache_control.no_store = True
+    return response
+
+# Rendered once all routes exist, and before gunicorn forks so workers share the pages
+if os.environ.get('PAGE_CACHE_WARM', '') in ('1', 'true', 'on'):
+    with app.test_request_context('/'):
+        logger.info('Rendered %d game pages', pages.warm())
+
 # uncomment this to test locally
 # app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,167 @@
+"""
+Baseball Position Guessing Game - Fingerprinted, precompressed static assets
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # In requirements.txt; without it only gzip variants are built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BUILD_DIR = 'dist'  # Inside the static folder
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = {'.js', '.css', '.svg', '.ico', '.json', '.txt'}
+ONE_YEAR = 365 * 24 * 60 * 60
+
+# Accept-Encoding token, file suffix, Content-Encoding; best first
+ENCODINGS = (('br', '.br', 'br'), ('gzip', '.gz', 'gzip'))
+
+
+def build_assets(static_folder):
+    """Fingerprint every file in the static folder into static/dist.
+
+    Each file is copied to ``<name>.<hash><ext>``, with .gz (and, when the
+    brotli package is installed, .br) variants for text assets. The manifest
+    maps each original path to its fingerprinted one, and records the source
+    files' sizes and mtimes so a stale build can be detected. Files from
+    builds before the previous one are deleted; the previous build's are kept
+    for pages rendered before this one.
+    """
+    build_folder = os.path.join(static_folder, BUILD_DIR)
+    try:
+        with open(os.path.join(build_folder, MANIFEST), encoding='utf-8') as file:
+            previous = set(json.load(file).get('files', {}).values())
+    except (OSError, ValueError):
+        previous = set()
+    files = {}
+    sources = {}
+    for logical, path in _source_files(static_folder):
+        with open(path, 'rb') as file:
+            content = file.read()
+        stem, ext = os.path.splitext(logical)
+        fingerprinted = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+        _write(build_folder, fingerprinted, content)
+        if ext.lower() in COMPRESSIBLE:
+            _write(build_folder, fingerprinted + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(build_folder, fingerprinted + '.br', brotli.compress(content))
+        stat = os.stat(path)
+        files[logical] = fingerprinted
+        sources[logical] = [stat.st_size, stat.st_mtime_ns]
+
+    manifest = {'files': files, 'sources': sources}
+    _write(build_folder, MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'), replace=True)
+    _prune(build_folder, previous | set(files.values()))
+    return manifest
+
+
+def _prune(build_folder, keep):
+    """Delete every fingerprinted file, compressed variants included, not named in keep."""
+    for name, path in _source_files(build_folder):
+        if name == MANIFEST or name.endswith('.tmp'):
+            continue  # Another process may be mid-write
+        for _, suffix, _ in ENCODINGS:
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        if name not in keep:
+            os.remove(path)
+
+
+def _write(build_folder, name, content, replace=False):
+    path = os.path.join(build_folder, name)
+    if os.path.exists(path) and not replace:
+        return  # Fingerprinted names never change content
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+
+def _source_files(static_folder):
+    """Yield (path relative to static, full path) for every source asset."""
+    for directory, subdirectories, names in os.walk(static_folder):
+        if os.path.samefile(directory, static_folder) and BUILD_DIR in subdirectories:
+            subdirectories.remove(BUILD_DIR)
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def _is_fresh(manifest, static_folder):
+    sources = manifest.get('sources', {})
+    seen = 0
+    for logical, path in _source_files(static_folder):
+        stat = os.stat(path)
+        if sources.get(logical) != [stat.st_size, stat.st_mtime_ns]:
+            return False
+        seen += 1
+    return seen == len(sources)
+
+
+def load_manifest(static_folder):
+    """Return the asset manifest, rebuilding static/dist first if it is missing or stale."""
+    path = os.path.join(static_folder, BUILD_DIR, MANIFEST)
+    try:
+        with open(path, encoding='utf-8') as file:
+            manifest = json.load(file)
+        if _is_fresh(manifest, static_folder):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    try:
+        return build_assets(static_folder)
+    except OSError as e:
+        logger.warning('Could not build fingerprinted assets, serving them unversioned: %s', e)
+        return {'files': {}, 'sources': {}}
+
+
+def init_assets(app):
+    """Serve fingerprinted assets from /dist and expose asset_url() to templates."""
+    manifest = load_manifest(app.static_folder)
+    files = manifest['files']
+    build_folder = os.path.join(app.static_folder, BUILD_DIR)
+
+    def asset_url(filename):
+        fingerprinted = files.get(filename)
+        if fingerprinted is None:
+            return url_for('static', filename=filename)
+        return url_for('dist_asset', filename=fingerprinted)
+
+    @app.route('/dist/<path:filename>')
+    def dist_asset(filename):
+        """Serve a fingerprinted asset, precompressed when the client accepts it."""
+        if filename == MANIFEST:
+            abort(404)
+        accepted = request.accept_encodings
+        for token, suffix, encoding in ENCODINGS:
+            if accepted[token] and os.path.isfile(os.path.join(build_folder, filename + suffix)):
+                response = send_from_directory(build_folder, filename + suffix, max_age=ONE_YEAR)
+                response.headers['Content-Encoding'] = encoding
+                response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                break
+        else:
+            response = send_from_directory(build_folder, filename, max_age=ONE_YEAR)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprint and precompress everything under static/."""
+        built = build_assets(app.static_folder)
+        print(f"Built {len(built['files'])} assets into {build_folder}")
+
+    return manifest
@@ -2,8 +2,29 @@
 Unit tests for the Baseball Position Guessing Game
 """
 import unittest
+import atexit
 import json
-from app import app, BaseballGame
+import os
+import random
+import re
+import tempfile
+import time
+import types
+from unittest import mock
+from app import app, daily, game, pages, profiler, rooms, BaseballGame
+from dataset import BaseballDataset, load_dataset
+from difflib import SequenceMatcher
+from name_matcher import NameMatcher, alias_key, phonetic_key
+from game_store import MemoryGameStore, SQLiteGameStore
+from metrics import MetricsRegistry
+from results_store import ResultsStore
+from difficulty import AliasTable, DifficultySelector, TIERS
+from bundles import answer_hash, key_form
+from assets import build_assets
+from ingest import ingest_files
+from calibrate import build_corpus, evaluate
+from page_cache import PageCache
+from concurrent.futures import ThreadPoolExecutor
 
 class TestBaseballGame(unittest.TestCase):
     """Test cases for the BaseballGame class."""
@@ -61,6 +82,101 @@ class TestBaseballGame(unittest.TestCase):
         is_correct, similarity = self.game.compare_names("John Doe", "")
         self.assertFalse(is_correct)
     
+    def test_name_matcher_regression_corpus(self):
+        """Test that the name matcher agrees with the original SequenceMatcher check outside its alias table."""
+        def original_compare_names(guess, actual):
+            if not guess or not actual:
+                return False, 0
+            guess = guess.lower().strip()
+            actual = actual.lower().strip()
+            if guess == actual or guess == re.sub(r"[^\w\s]", '', actual):
+                return True, 1.0
+            similarity = SequenceMatcher(None, guess, actual).ratio()
+            return similarity >= 0.8, similarity
+
+        rng = random.Random(2024)
+        rosters = list(self.game.rosters.values())
+        names = sorted({name for roster in rosters for name in roster.values()})
+        matcher = NameMatcher(names)
+        for _ in range(3000):
+            roster = rng.choice(rosters)
+            actual = rng.choice(list(roster.values()))
+            guess = list(actual)
+            edit = rng.randrange(6)
+            if edit == 0:
+                del guess[rng.randrange(len(guess))]
+            elif edit == 1:
+                guess.insert(rng.randrange(len(guess) + 1), rng.choice('aeinorst '))
+            elif edit == 2:
+                guess[rng.randrange(len(guess))] = rng.choice('aeiouy')
+            elif edit == 3:
+                i = rng.randrange(len(guess) - 1)
+                guess[i], guess[i + 1] = guess[i + 1], guess[i]
+            elif edit == 4:
+                guess = list(rng.choice(list(roster.values())))  # A teammate
+            else:
+                guess = list(actual.split()[-1])  # Last name only
+            guess = self.game.sanitize_input(''.join(guess))
+
+            expected = original_compare_names(guess, actual)
+            is_correct, similarity = matcher.match(guess, actual)
+            normalized = matcher.normalized(actual)
+            key = alias_key(guess)
+            if guess.lower() != actual.lower() and actual not in matcher.listed.get(key, {actual}):
+                self.assertFalse(is_correct, (guess, actual))  # Another player's name, whatever the original said
+                continue
+            if key in normalized.aliases or (phonetic_key(key) in normalized.sounds
+                                             and expected[1] >= NameMatcher.PHONETIC_FLOOR):
+                self.assertTrue(is_correct, (guess, actual))  # Accepted by alias, whatever the original said
+                continue
+            self.assertEqual(is_correct, expected[0], (guess, actual))
+            if is_correct:
+                self.assertEqual(similarity, expected[1])
+            else:
+                self.assertGreaterEqual(similarity, expected[1])
+    
+    def test_matcher_calibration(self):
+        """Test that the calibration corpus labels near-collisions and scores matchers consistently."""
+        rows = list(self.game.dataset.rows(self.game.seasons[(2005, 'Los Angeles Angels of Anaheim')]))
+        dataset = BaseballDataset.from_rows(rows)
+        with ThreadPoolExecutor(2) as executor:
+            corpus = build_corpus(dataset, self.game.sanitize_input, executor, per_name=2)
+        self.assertIn(('Bengie Molina', 'Jose Molina', 'teammate'), corpus)
+        self.assertIn(('Molina', 'Jose Molina', 'last_name'), corpus)
+
+        results = evaluate(corpus, lambda initializer, initargs: ThreadPoolExecutor(
+            2, initializer=initializer, initargs=initargs), ('namematcher', 'sequence'), (0.8,))
+        by_matcher = {row['matcher']: row for row in results}
+        # Rejecting other players' names and accepting aliases only ever trades false accepts away
+        self.assertLessEqual(by_matcher['namematcher']['false_accepts'], by_matcher['sequence']['false_accepts'])
+        self.assertGreaterEqual(by_matcher['namematcher']['precision'], by_matcher['sequence']['precision'])
+        self.assertLessEqual(by_matcher['namematcher']['false_rejects'], by_matcher['sequence']['false_rejects'])
+        self.assertGreater(by_matcher['sequence']['recall'], 0.9)
+
+    def test_name_aliases(self):
+        """Test that initials, suffixes, accents, nicknames and sound-alikes are accepted by lookup."""
+        matcher = NameMatcher(['A.J. Pollock', 'Ronald Acuña Jr.', 'Michael Harris II', 'Yadier Molina', 'Jose Molina'])
+        for guess, actual in [('AJ Pollock', 'A.J. Pollock'), ('A J Pollock', 'A.J. Pollock'),
+                              ('Ronald Acuna', 'Ronald Acuña Jr.'), ('Ron Acuna Jr', 'Ronald Acuña Jr.'),
+                              ('Mike Harris', 'Michael Harris II'), ('Yadeer Moleena', 'Yadier Molina')]:
+            self.assertTrue(matcher.match(guess, actual)[0], (guess, actual))
+        self.assertEqual(matcher.match('Mike Harris', 'Michael Harris II'), (True, 1.0))
+        self.assertFalse(matcher.match('Bengie Molina', 'Jose Molina')[0])
+        self.assertFalse(matcher.match('Jose Molina', 'Jesse Molina')[0])
+        self.assertNotEqual(phonetic_key('tom smith'), phonetic_key('tim smith'))
+
+        # Alike teammates and namesakes are never accepted for one another
+        matcher = NameMatcher(['Taylor Rogers', 'Tyler Rogers', 'Cole Tucker', 'Kyle Tucker',
+                               'Bobby Witt', 'Bobby Witt Jr.'])
+        for first, second in [('Taylor Rogers', 'Tyler Rogers'), ('Cole Tucker', 'Kyle Tucker'),
+                              ('Bobby Witt', 'Bobby Witt Jr.')]:
+            self.assertFalse(matcher.match(first, second)[0], (first, second))
+            self.assertFalse(matcher.match(second, first)[0], (second, first))
+        self.assertTrue(matcher.match('Tylor Rogers', 'Tyler Rogers')[0])
+        self.assertTrue(matcher.match('Bobby Witt Jr', 'Bobby Witt Jr.')[0])
+        self.assertFalse(matcher.match('Yadier Molina', 'Jose Molina')[0])
+        self.assertEqual(self.game.sanitize_input('Ronald Acuña'), 'Ronald Acuna')
+
     def test_has_designated_hitter(self):
         """Test designated hitter detection."""
         roster_with_dh = {'C': 'Player1', '1B': 'Player2', 'DH': 'Player3'}
@@ -97,8 +213,10 @@ class TestBaseballGame(unittest.TestCase):
         # Check fuzzy match
         self.assertTrue(results['1B']['correct'])
         
-        # Check incorrect guess
+        # Check incorrect guess, which reports a bound on its similarity rather than scoring it in full
         self.assertFalse(results['2B']['correct'])
+        self.assertTrue(results['2B']['similarity_bound'])
+        self.assertGreaterEqual(results['2B']['similarity'], SequenceMatcher(None, 'wrong player', 'jose altuve').ratio())
         
         # Check counts
         self.assertEqual(correct_count, 2)  # C and 1B should be correct
@@ -155,6 +273,444 @@ class TestFlaskRoutes(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('error', data)
     
+    def test_server_side_game_state(self):
+        """Test that server mode keeps only a game id in the session."""
+        with self.app as client:
+            client.get('/?year=2020&team=Los Angeles Dodgers')
+            with client.session_transaction() as session:
+                self.assertEqual(list(session.keys()), ['game'])
+                game_id = session['game']
+
+            response = client.post('/submit_guesses', data={'C': 'Austin Barnes'})
+            data = json.loads(response.data)
+            self.assertEqual((data['year'], data['team']), (2020, 'Los Angeles Dodgers'))
+
+        game = BaseballGame()
+        self.assertEqual(game.season_for_game(game_id), (2020, 'Los Angeles Dodgers'))
+        self.assertIsNone(game.season_for_game('nope'))
+
+    def test_game_stores(self):
+        """Test the in-memory LRU and SQLite game stores."""
+        store = MemoryGameStore(maxsize=2)
+        store.set('a', {'year': 2020})
+        store.set('b', {'year': 2021})
+        store.get('a')
+        store.set('c', {'year': 2022})
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), {'year': 2020})
+        # Claims don't count against the LRU, and last until they expire
+        self.assertTrue(store.claim('x', 60))
+        self.assertTrue(store.claim('y', 60))
+        self.assertFalse(store.claim('x', 60))
+        self.assertEqual(store.get('a'), {'year': 2020})
+        self.assertTrue(store.claim('z', -1))
+        self.assertTrue(store.claim('z', 60))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteGameStore(os.path.join(tmp, 'games.sqlite3'))
+            store.set('a', {'year': 2020, 'team': 'Los Angeles Dodgers'})
+            self.assertEqual(store.get('a'), {'year': 2020, 'team': 'Los Angeles Dodgers'})
+            store.delete('a')
+            self.assertIsNone(store.get('a'))
+            self.assertTrue(store.claim('x', -1))
+            self.assertTrue(store.claim('x', 60))
+            self.assertFalse(SQLiteGameStore(os.path.join(tmp, 'games.sqlite3')).claim('x', 60))
+    
+    def test_submit_guesses_batch(self):
+        """Test scoring several guess sets in one request."""
+        roster = dict(BaseballGame().rosters[(2020, 'Los Angeles Dodgers')])
+        entries = [
+            {'id': 'a', 'year': 2020, 'team': 'Los Angeles Dodgers', 'guesses': dict(roster)},
+            {'id': 'b', 'year': 2020, 'team': 'Los Angeles Dodgers', 'guesses': {'C': roster['C'], 'SS': 'Nobody'}},
+            {'id': 'c', 'year': 2020, 'team': 'Los Angeles Dodgers', 'guesses': {'C': '   '}},
+            {'id': 'd', 'year': 1800, 'team': 'Los Angeles Dodgers', 'guesses': {}},
+        ]
+        response = self.app.post('/submit_guesses/batch', json={'entries': entries})
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)['results']
+
+        self.assertEqual([result['id'] for result in results], ['a', 'b', 'c', 'd'])
+        self.assertEqual(results[0]['correct_count'], len(roster))
+        self.assertEqual(results[0]['percentage'], 100.0)
+        self.assertEqual(results[1]['correct'], ['C'])
+        self.assertEqual(results[2]['percentage'], 0)
+        self.assertIn('error', results[3])
+
+        response = self.app.post('/submit_guesses/batch', json={'entries': 'nope'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_fingerprinted_assets(self):
+        """Test that pages link fingerprinted assets served compressed with immutable caching."""
+        html = self.app.get('/').data.decode('utf-8')
+        match = re.search(r'src="(/dist/js/game\.[0-9a-f]{12}\.js)"', html)
+        self.assertIsNotNone(match)
+
+        response = self.app.get(match.group(1), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertIn('javascript', response.mimetype)
+
+        response = self.app.get(match.group(1))
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn(b'class BaseballGame', response.data)
+
+        # Each rebuild keeps the previous build's files and deletes older ones
+        with tempfile.TemporaryDirectory() as static_folder:
+            source = os.path.join(static_folder, 'app.js')
+            builds = []
+            for version in range(3):
+                with open(source, 'w') as file:
+                    file.write(f'var version = {version};')
+                builds.append(build_assets(static_folder)['files']['app.js'])
+            built = os.listdir(os.path.join(static_folder, 'dist'))
+            self.assertNotIn(builds[0], built)
+            self.assertNotIn(builds[0] + '.gz', built)
+            self.assertTrue({builds[1], builds[2], builds[2] + '.gz'} <= set(built))
+    
+    def test_player_suggestions(self):
+        """Test that suggestions are filtered, cacheable and round-trip as correct guesses."""
+        response = self.app.get('/api/players/suggest?q=tro')
+        self.assertEqual(response.status_code, 200)
+        suggestions = json.loads(response.data)['suggestions']
+        self.assertIn('Mike Trout', suggestions)
+        self.assertIn('public', response.headers['Cache-Control'])
+
+        etag = response.headers['ETag']
+        response = self.app.get('/api/players/suggest?q=tro', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        game = BaseballGame()
+        for (year, team), roster in list(game.rosters.items())[::25]:
+            for position, actual in roster.items():
+                query = actual.split()[-1][:4]
+                suggestions = game.state.players.suggest(query, year=year, position=position, limit=25)
+                matches = [name for name in suggestions if game.compare_names(game.sanitize_input(name), actual)[0]]
+                self.assertTrue(matches, (actual, suggestions))
+    
+    def test_data_version_route(self):
+        """Test that the dataset version is exposed on its own route and as a header."""
+        response = self.app.get('/data_version')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(response.headers['X-Dataset-Version'], data['version'])
+        self.assertLessEqual(data['min_year'], data['max_year'])
+        self.assertGreater(data['seasons'], 0)
+    
+    def test_metrics_route(self):
+        """Test that requests, stages and swallowed errors show up on /metrics."""
+        self.app.get('/?difficulty=impossible')
+        self.app.post('/submit_guesses', data={'C': 'Someone'})
+        text = self.app.get('/metrics').data.decode('utf-8')
+        self.assertIn('# TYPE startingnine_http_request_duration_seconds histogram', text)
+        self.assertRegex(text, r'startingnine_http_requests_total\{method="GET",route="/",status="200"\} \d+')
+        self.assertIn('startingnine_handled_exceptions_total{exception="ValueError",route="/"}', text)
+        for stage in ('pick_team', 'get_team_roster', 'save_session', 'render_template', 'compare_names'):
+            self.assertIn(f'stage="{stage}"', text)
+
+    def test_metrics_aggregate_across_processes(self):
+        """Test that counters written by other workers are summed into one report."""
+        with tempfile.TemporaryDirectory() as directory:
+            other = MetricsRegistry(directory)
+            other.inc('http_requests_total', 2, route='/', method='GET', status=200)
+            other.observe('http_request_duration_seconds', 0.003, route='/')
+            other.flush()
+            # Pretend the values came from a different pid
+            os.replace(os.path.join(directory, f'metrics-{os.getpid()}.json'),
+                       os.path.join(directory, 'metrics-1.json'))
+
+            registry = MetricsRegistry(directory)
+            registry.inc('http_requests_total', route='/', method='GET', status=200)
+            registry.observe('http_request_duration_seconds', 0.02, route='/')
+            text = registry.render()
+
+            # An exited worker's file is folded into one file of totals
+            registry.retire(1)
+            self.assertEqual(os.listdir(directory), ['metrics-exited.json'])
+            self.assertEqual(registry.render(), text)
+            for each in (other, registry):
+                atexit.unregister(each.flush)
+        self.assertIn('startingnine_http_requests_total{method="GET",route="/",status="200"} 3', text)
+        self.assertIn('startingnine_http_request_duration_seconds_bucket{route="/",le="0.005"} 1', text)
+        self.assertIn('startingnine_http_request_duration_seconds_count{route="/"} 2', text)
+    
+    def test_request_profiler(self):
+        """Test that sampled requests are profiled and summarized, and the admin route is hidden."""
+        directory = profiler.directory
+        with tempfile.TemporaryDirectory() as profile_dir:
+            profiler.directory = profile_dir
+            try:
+                profiler.set_rate(1.0)
+                self.app.get('/')
+                self.app.get('/data_version')
+                summary = profiler.summary(limit=5)
+                profiler.set_rate(None)
+                self.assertEqual(profiler.rate, profiler.default_rate)
+            finally:
+                profiler.directory = directory
+        self.assertEqual(summary['samples'], 2)
+        self.assertEqual(len(summary['functions']), 5)
+        self.assertEqual(self.app.get('/admin/profiler').status_code, 404)
+    
+    def test_daily_game(self):
+        """Test that the daily game is shared, cacheable and tallies its results."""
+        first = self.app.get('/daily')
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Set-Cookie', first.headers)
+        self.assertTrue(first.cache_control.public)
+        self.assertEqual(self.app.get('/daily').data, first.data)
+        self.assertEqual(self.app.get('/daily', headers={'If-None-Match': first.headers['ETag']}).status_code, 304)
+
+        puzzle = daily.puzzle()
+        self.assertIn(f'{puzzle.year} {puzzle.team}'.encode('utf-8'), first.data)
+        before = daily.results()['plays']
+        response = self.app.post(f'/daily/submit?date={puzzle.day.isoformat()}',
+                                 data={'C': puzzle.roster['C'], '1B': 'Nobody Atall'})
+        data = json.loads(response.data)
+        self.assertEqual(data['correct_count'], 1)
+
+        # Submitting again is scored but not counted twice
+        again = self.app.post(f'/daily/submit?date={puzzle.day.isoformat()}', data={'C': puzzle.roster['C']})
+        self.assertEqual(json.loads(again.data)['correct_count'], 1)
+        results = json.loads(self.app.get('/daily/results').data)
+        self.assertEqual(results['plays'], before + 1)
+        self.assertGreaterEqual(results['distribution']['1'], 1)
+        self.assertEqual(self.app.post('/daily/submit?date=2001-01-01', data={'C': 'x'}).status_code, 400)
+
+        # The page names its season, and a submission for another one is refused
+        self.assertIn(f'year={puzzle.year}'.encode('utf-8'), first.data)
+        stale = self.app.post(f'/daily/submit?date={puzzle.day.isoformat()}&year={puzzle.year - 1}&team={puzzle.team}',
+                              data={'C': puzzle.roster['C']})
+        self.assertEqual(stale.status_code, 409)
+
+        # Seasons other than the day's can come and go without moving it
+        others = [season for season in game.state.rosters if season != (puzzle.year, puzzle.team)]
+        fewer = types.SimpleNamespace(rosters={season: game.state.rosters[season]
+                                               for season in [(puzzle.year, puzzle.team)] + others[::2]})
+        self.assertEqual(daily.season_for(puzzle.day, fewer), (puzzle.year, puzzle.team))
+    
+    def test_game_page_cache(self):
+        """Test that game pages are rendered once per season and revalidated by ETag."""
+        year, team = sorted(game.state.rosters)[0]
+        url = f'/?year={year}&team={team}'
+        first = self.app.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(f'{year} {team}'.encode('utf-8'), first.data)
+        self.assertTrue(first.cache_control.private)
+        self.assertTrue(first.cache_control.no_cache)
+
+        hits = pages.hits
+        again = self.app.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(pages.hits, hits + 1)
+        self.assertIn('Set-Cookie', again.headers)  # Still a new game
+
+        cache = PageCache(game, lambda year, team, roster: f'{year} {team}', max_pages=2)
+        seasons = sorted(game.state.rosters)[:3]
+        for season in seasons:
+            cache.page(*season, {})
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.page(*seasons[2], {}).html, '{} {}'.format(*seasons[2]))
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(cache.warm(), 2)
+
+    def test_results_store(self):
+        """Test that finished games are written behind and rolled up by season and position."""
+        def results(correct, wrong):
+            found = {position: {'guess': 'x', 'correct': True} for position in correct}
+            found.update({position: {'guess': 'x', 'correct': False} for position in wrong})
+            found['DH'] = {'guess': '', 'correct': False}
+            return found
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = ResultsStore(os.path.join(directory, 'results.sqlite3'))
+            atexit.unregister(store.flush)
+            self.assertTrue(store.record('classic', 2001, 'Seattle Mariners', results(['C', '1B'], ['SS'])))
+            self.assertTrue(store.flush())
+            store.record('daily', 2001, 'Seattle Mariners', results(['SS'], ['C']))
+            self.assertTrue(store.flush())
+            store.refresh()
+
+            season = store.season_stats(2001, 'Seattle Mariners')
+            self.assertEqual((season.games, season.guesses, season.correct), (2, 5, 3))
+            self.assertAlmostEqual(store.position_stats('C').accuracy, 0.5)
+            self.assertEqual(store.position_stats('SS').guesses, 2)
+            self.assertIsNone(store.position_stats('DH'))
+            self.assertIsNone(store.season_stats(1999, 'Nobody'))
+
+            # Reads refresh the rollups themselves rather than starting a writer
+            reader = ResultsStore(os.path.join(directory, 'results.sqlite3'))
+            atexit.unregister(reader.flush)
+            reader._next_refresh = 0.0
+            self.assertEqual(reader.season_stats(2001, 'Seattle Mariners').games, 2)
+            self.assertIsNone(reader._writer)
+
+            # A full queue drops the game instead of blocking the request
+            full = ResultsStore(os.path.join(directory, 'full.sqlite3'), max_queue=1)
+            atexit.unregister(full.flush)
+            full._queue.put((0, 'classic', 2001, 'Seattle Mariners', '', ''))
+            self.assertFalse(full.record('classic', 2001, 'Seattle Mariners', results([], [])))
+            self.assertEqual(full.dropped, 1)
+    
+    def test_difficulty_parameter(self):
+        """Test that / and /new_game accept a difficulty."""
+        from app import game
+        easy = set(game.difficulty_selector().tiers['easy'][0])
+        for path in ('/?difficulty=easy', '/new_game?difficulty=easy'):
+            response = self.app.get(path)
+            self.assertEqual(response.status_code, 200)
+            title = re.search(rb'<b>(\d{4}) ([^<]+)</b>', response.data)
+            self.assertIn((int(title.group(1)), title.group(2).decode('utf-8')), easy)
+        self.assertEqual(self.app.get('/?difficulty=impossible').status_code, 200)
+    
+    def test_lenient_game(self):
+        """Test that a lenient game also accepts backups with enough games at the position."""
+        from app import game
+        (year, team), alternates = next((season, found) for season, found in game.state.alternates.items()
+                                        if 'C' in found)
+        backup = alternates['C'][0]
+        for query in (f'year={year}&team={team}', f'year={year}&team={team}&lenient=1'):
+            with self.app as client:
+                client.get(f'/?{query}')
+                data = json.loads(client.post('/submit_guesses', data={'C': backup}).data)
+            self.assertEqual(data['results']['C']['correct'], query.endswith('lenient=1'))
+        self.assertEqual(data['results']['C']['matched'], backup)
+        self.assertNotEqual(data['results']['C']['actual'], backup)
+
+        entry = {'year': year, 'team': team, 'guesses': {'C': backup}}
+        response = self.app.post('/submit_guesses/batch', json={'entries': [entry, dict(entry, lenient=True)]})
+        self.assertEqual([result['correct'] for result in json.loads(response.data)['results']], [[], ['C']])
+    
+    def test_catalog(self):
+        """Test that the catalog lists every playable team-season and revalidates by version."""
+        from app import game
+        response = self.app.get('/api/catalog')
+        self.assertEqual(response.status_code, 200)
+        catalog = json.loads(response.data)
+        self.assertEqual(catalog['version'], game.state.version)
+        seasons = {(year, team['name']) for team in catalog['teams']
+                   for first, last in team['years'] for year in range(first, last + 1)}
+        self.assertEqual(seasons, set(game.rosters))
+        franchises = {franchise['name']: franchise['teams'] for franchise in catalog['franchises']}
+        self.assertEqual(franchises['Los Angeles Angels'],
+                         ['Anaheim Angels', 'Los Angeles Angels of Anaheim', 'Los Angeles Angels'])
+        self.assertTrue(response.cache_control.no_cache)
+        self.assertEqual(self.app.get('/api/catalog', headers={'If-None-Match': response.headers['ETag']}).status_code,
+                         304)
+
+    def test_invalid_season_rejected(self):
+        """Test that asking for a team or year that isn't in the data is a 404, not a random game."""
+        self.assertEqual(self.app.get('/?team=Nobody').status_code, 404)
+        self.assertEqual(self.app.get('/?year=1800').status_code, 404)
+        self.assertEqual(self.app.get('/?year=2001&team=Miami Marlins').status_code, 404)
+        self.assertEqual(self.app.get('/new_game?year=2001&team=Miami Marlins').status_code, 404)
+        self.assertEqual(self.app.get('/?year=2001&team=Florida Marlins').status_code, 200)
+    
+    def test_game_bundle(self):
+        """Test that bundled games carry hashed answers and are scored and recorded once by token."""
+        from app import game, game_store
+        response = self.app.get('/api/games/bundle?count=3&difficulty=easy')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-store', response.headers['Cache-Control'])
+        games = json.loads(response.data)['games']
+        self.assertEqual(len(games), 3)
+
+        played = games[0]
+        roster = game.get_team_roster(played['year'], played['team'])
+        self.assertEqual(set(played['key']), set(roster))
+        self.assertEqual(played['dh'], 'DH' in roster)
+        self.assertEqual(played['key']['C'], [answer_hash(played['salt'], roster['C'])])
+        self.assertNotIn(roster['C'], response.data.decode('utf-8'))
+
+        guesses = {'C': roster['C'].upper(), '1B': 'Nobody Atall'}
+        entries = [{'token': played['token'], 'guesses': guesses}, {'token': 'forged', 'guesses': guesses}]
+        verified = json.loads(self.app.post('/api/games/verify', json={'games': entries}).data)['games']
+        self.assertEqual(verified[0]['correct_count'], 1)
+        self.assertEqual(verified[0]['results']['C']['actual'], roster['C'])
+        self.assertIn('error', verified[1])
+        nonce = game.game_bundles(app.secret_key).read_token(played['token'])[2]
+        self.assertFalse(game_store.claim(f'bundle.{nonce}', 60))
+
+        self.assertEqual(key_form(' José  O\'Neill-Smith '), 'jose oneillsmith')
+        self.assertEqual(self.app.get('/api/games/bundle?difficulty=impossible').status_code, 400)
+        self.assertEqual(self.app.post('/api/games/verify', json={}).status_code, 400)
+    
+    def test_reverse_game(self):
+        """Test that a "guess the teams" game scores seasons through the player-to-seasons index."""
+        from app import game
+        page = self.app.get('/reverse')
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b'reverse', page.data)  # Its script
+
+        response = self.app.get('/reverse/new?player=mike trout')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['player'], 'Mike Trout')
+        started = game.state.careers.started('Mike Trout')
+        self.assertEqual(data['seasons'], len(started))
+        self.assertIn((2013, 'Los Angeles Angels of Anaheim', 'CF'), started)
+        self.assertTrue(all(entry[3] for entry in game.state.careers.player_seasons('MIKE TROUT')))
+
+        guesses = [{'year': 2013, 'team': 'los angeles angels of anaheim'},
+                   {'year': 2013, 'team': 'Los Angeles Angels of Anaheim'},
+                   {'year': 2013, 'team': 'New York Yankees'},
+                   {'year': 2014, 'team': 'Los Angeles Angels'}]  # Any name of the franchise will do
+        data = json.loads(self.app.post('/reverse/submit', json={'guesses': guesses}).data)
+        self.assertEqual([result['correct'] for result in data['results']], [True, False, False, True])
+        self.assertEqual(data['results'][0]['team'], 'Los Angeles Angels of Anaheim')
+        self.assertEqual(data['results'][3]['team'], 'Los Angeles Angels of Anaheim')
+        self.assertEqual(data['correct_count'], 2)
+        self.assertEqual(len(data['missed']), len(started) - 2)
+
+        self.assertEqual(self.app.get('/reverse/new?player=Nobody Atall').status_code, 404)
+        self.assertEqual(self.app.post('/reverse/submit', json={'guesses': [{'team': 'X'}]}).status_code, 400)
+        self.assertIn(game.get_random_player(), game.state.careers.names.values())
+
+    @mock.patch('app.ROOMS_ENABLED', True)
+    def test_rooms(self):
+        """Test that a room's joins and scores are pushed to every open event stream."""
+        response = self.app.post('/rooms', data={'year': 2013, 'team': 'Los Angeles Angels of Anaheim'})
+        self.assertEqual(response.status_code, 201)
+        room_id = json.loads(response.data)['room']
+        page = self.app.get(json.loads(response.data)['play'])
+        self.assertIn(b'2013 Los Angeles Angels of Anaheim', page.data)
+        self.assertIn(f'/rooms/{room_id}/submit'.encode('ascii'), page.data)
+        self.assertNotIn(b'data-bundle-url', page.data)
+
+        streams = [self.app.get(f'/rooms/{room_id}/events', buffered=False) for _ in range(2)]
+        self.assertEqual(streams[0].mimetype, 'text/event-stream')
+        events = [iter(stream.response) for stream in streams]
+        for stream in events:
+            self.assertTrue(next(stream).startswith(b'event: state\n'))
+
+        self.assertEqual(self.app.post(f'/rooms/{room_id}/submit', data={'CF': 'Mike Trout'}).status_code, 400)
+        self.app.post(f'/rooms/{room_id}/join', data={'name': '  Ann  '})
+        data = json.loads(self.app.post(f'/rooms/{room_id}/submit', data={'CF': 'Mike Trout'}).data)
+        self.assertEqual(data['correct_count'], 1)
+        self.assertEqual(data['standings']['finished'][0]['name'], 'Ann')
+        self.assertEqual(self.app.post(f'/rooms/{room_id}/submit', data={'CF': 'Mike Trout'}).status_code, 409)
+        self.assertEqual(self.app.post(f'/rooms/{room_id}/join', data={'name': 'Ann'}).status_code, 200)
+
+        # Nobody else can take a player's name, or submit as them
+        other = app.test_client()
+        self.assertEqual(other.post(f'/rooms/{room_id}/join', data={'name': 'Ann'}).status_code, 409)
+        self.assertEqual(other.post(f'/rooms/{room_id}/submit', data={'CF': 'Mike Trout'}).status_code, 400)
+        for stream in events:
+            self.assertIn(b'"name":"Ann"', next(stream))
+            self.assertTrue(next(stream).startswith(b'event: score\n'))
+
+        for stream in streams:
+            stream.close()
+        self.assertEqual(rooms.watchers, 0)
+        self.assertEqual(self.app.get('/rooms/nope/events').status_code, 404)
+        self.assertEqual(self.app.post('/rooms', data={'difficulty': 'impossible'}).status_code, 400)
+
+        # Rooms are opt-in; with them off the room and its page are gone
+        with mock.patch('app.ROOMS_ENABLED', False):
+            self.assertEqual(self.app.post('/rooms', data={'year': 2013, 'team': 'Los Angeles Angels of Anaheim'}).status_code, 404)
+            self.assertEqual(self.app.get(f'/rooms/{room_id}/play').status_code, 404)
+
     def test_new_game_route(self):
         """Test the new game route."""
         response = self.app.get('/new_game')
@@ -223,6 +779,209 @@ class TestDataLoading(unittest.TestCase):
         for position in roster.keys():
             self.assertIn(position, self.game.POSITIONS)
 
+    def test_difficulty_selection(self):
+        """Test that alias tables sample by weight and tiers split seasons by ease."""
+        rng = random.Random(7)
+        table = AliasTable([1, 2, 7])
+        counts = [0, 0, 0]
+        for _ in range(20000):
+            counts[table.sample(rng)] += 1
+        for count, expected in zip(counts, (0.1, 0.2, 0.7)):
+            self.assertAlmostEqual(count / 20000, expected, delta=0.02)
+
+        ease = self.game.state.ease
+        self.assertEqual(set(ease), set(self.game.rosters))
+        self.assertTrue(all(0 <= score <= 1 for score in ease.values()))
+        selector = DifficultySelector(ease)
+        easy = {self.game.get_team_by_difficulty('easy') for _ in range(200)}
+        hard = {self.game.get_team_by_difficulty('hard') for _ in range(200)}
+        self.assertGreater(min(ease[season] for season in easy), max(ease[season] for season in hard))
+        self.assertEqual(sum(len(selector.tiers[tier][0]) for tier in TIERS), len(ease))
+        with self.assertRaises(ValueError):
+            self.game.get_team_by_difficulty('impossible')
+
+        class Stats:
+            guesses, accuracy = 100, 0.0
+        self.game.season_stats = lambda year, team: Stats
+        try:
+            blended = self.game.difficulty_selector()
+            self.assertIsNot(blended, self.game.state.difficulty)
+        finally:
+            self.game.season_stats = None
+    
+    def test_alternates(self):
+        """Test that alternates are other players at a starter's position with enough games."""
+        rows = [
+            {'year': 2001, 'team': 'A', 'position': position, 'player_name': f'{position} Starter', 'games_played': 150}
+            for position in ('C', '1B', '2B', '3B', 'SS', 'LF', 'CF', 'RF')
+        ] + [
+            {'year': 2001, 'team': 'A', 'position': 'C', 'player_name': 'Backup Catcher', 'games_played': 60},
+            {'year': 2001, 'team': 'A', 'position': 'C', 'player_name': 'Third Catcher', 'games_played': 80},
+            {'year': 2001, 'team': 'A', 'position': '1B', 'player_name': 'Cup Of Coffee', 'games_played': 3},
+            {'year': 2001, 'team': 'A', 'position': 'DH', 'player_name': 'Not Started', 'games_played': 90},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            game = BaseballGame(os.path.join(directory, 'data.csv'))
+            game.csv_file = os.path.join(directory, 'data.csv')
+            game._save_sample_data(rows)
+            game.reload()
+        self.assertEqual(dict(game.get_alternates(2001, 'A')), {'C': ('Third Catcher', 'Backup Catcher')})
+        results = game.evaluate_guesses({'C': 'Backup Catcher', '1B': 'Cup Of Coffee'}, game.get_team_roster(2001, 'A'),
+                                        alternates=game.get_alternates(2001, 'A'))[0]
+        self.assertTrue(results['C']['correct'])
+        self.assertFalse(results['1B']['correct'])
+    
+    def test_season_indexes(self):
+        """Test that the season indexes agree with the loaded rows."""
+        year, team = self.game.data[0]['year'], self.game.data[0]['team']
+        season_rows = [row for row in self.game.data if row['year'] == year and row['team'] == team]
+
+        self.assertEqual(list(self.game.dataset.rows(self.game.seasons[(year, team)])), season_rows)
+        self.assertIn(team, self.game.teams_by_year[year])
+        self.assertIn(year, self.game.years_by_team[team])
+        self.assertIn(self.game.get_year_for_team(team), self.game.years_by_team[team])
+        self.assertIn(self.game.get_team_for_year(year), self.game.teams_by_year[year])
+
+        with self.assertRaises(ValueError):
+            self.game.get_year_for_team('Not A Team')
+
+    def test_columnar_dataset(self):
+        """Test that the columnar dataset round-trips rows and indexes split seasons."""
+        rows = self.game.data[:20]
+        dataset = BaseballDataset.from_rows(rows)
+        self.assertEqual(list(dataset.rows()), rows)
+        self.assertIs(dataset.teams[dataset.team_ids[0]], self.game.dataset.teams[self.game.dataset.team_ids[0]])
+
+        split = BaseballDataset.from_rows(rows[:3] + [dict(rows[0], year=1999)] + rows[3:5])
+        season = split.season_index()[(rows[0]['year'], rows[0]['team'])]
+        self.assertEqual(list(split.rows(season)), rows[:5])
+
+    def test_snapshot_cache(self):
+        """Test that the binary snapshot is written, reused and refreshed when the CSV changes."""
+        rows = self.game.data[:20]
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_file = os.path.join(tmp, 'data.csv')
+            snapshot_file = os.path.join(tmp, 'data.snapshot')
+            self.game.csv_file = csv_file
+            self.game._save_sample_data(rows)
+
+            dataset, source = load_dataset(csv_file, snapshot_file)
+            self.assertTrue(os.path.exists(snapshot_file))
+            cached, header = BaseballDataset.from_snapshot(snapshot_file)
+            self.assertEqual(list(cached.rows()), rows)
+            self.assertEqual(header['source'], source)
+
+            self.game._save_sample_data(rows[:10])
+            dataset, changed = load_dataset(csv_file, snapshot_file)
+            self.assertNotEqual(changed['sha256'], source['sha256'])
+            self.assertEqual(list(dataset.rows()), rows[:10])
+            self.assertEqual(BaseballDataset.from_snapshot(snapshot_file)[1]['source'], changed)
+
+            # The slow indexes wait for first use, or for warm
+            game = BaseballGame(csv_file, snapshot_file)
+            self.assertNotIn('matcher', vars(game.state))
+            self.assertTrue(game.compare_names(rows[0]['player_name'], rows[0]['player_name'])[0])
+            self.assertIn('matcher', vars(game.state))
+            game.warm('secret')
+            self.assertTrue({'players', 'careers'} <= set(vars(game.state)))
+
+    def test_hot_reload(self):
+        """Test that a changed data file is reloaded in the background and swapped in whole."""
+        dodgers = list(self.game.dataset.rows(self.game.seasons[(2020, 'Los Angeles Dodgers')]))
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_file = os.path.join(tmp, 'data.csv')
+            self.game.csv_file = csv_file
+            self.game._save_sample_data(dodgers)
+            game = BaseballGame(csv_file, reload_interval=0.001)
+            old_state = game.state
+            self.assertEqual((game.min_year, game.max_year), (2020, 2020))
+
+            self.game._save_sample_data(dodgers + [dict(row, year=2030) for row in dodgers])
+            time.sleep(0.01)
+            self.assertTrue(game.reload_if_changed())
+            with game._reload_lock:
+                pass
+
+        self.assertIsNot(game.state, old_state)
+        self.assertNotEqual(game.state.version, old_state.version)
+        self.assertEqual(game.max_year, 2030)
+        self.assertIn((2030, 'Los Angeles Dodgers'), game.rosters)
+        self.assertNotIn((2030, 'Los Angeles Dodgers'), old_state.rosters)
+        self.assertIsNotNone(game.reload_seconds)
+        self.assertFalse(game.reload_if_changed())
+
+    def test_roster_table(self):
+        """Test that every roster is compiled once and reported when incomplete."""
+        self.assertEqual(len(self.game.rosters), len(self.game.seasons))
+        for roster in self.game.rosters.values():
+            self.assertTrue(self.game.FIELD_POSITIONS <= set(roster))
+            with self.assertRaises(TypeError):
+                roster['C'] = 'Someone Else'
+
+        dodgers = list(self.game.dataset.rows(self.game.seasons[(2020, 'Los Angeles Dodgers')]))
+        rows = dodgers[:9] + [dict(row, team='Short Team') for row in dodgers[:5]]
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_file = os.path.join(tmp, 'short.csv')
+            self.game.csv_file = csv_file
+            self.game._save_sample_data(rows)
+            with self.assertLogs('app', level='WARNING') as logs:
+                game = BaseballGame(csv_file)
+
+        self.assertIn((2020, 'Short Team'), game.invalid_seasons)
+        self.assertIn('Short Team', logs.output[0])
+        self.assertNotIn('Short Team', game.teams_by_year[2020])
+        with self.assertRaises(ValueError):
+            game.get_team_roster(2020, 'Short Team')
+
+    def test_ingest(self):
+        """Test that ingesting a season file adds only its valid new seasons and keeps the old ones."""
+        dodgers = list(self.game.dataset.rows(self.game.seasons[(2020, 'Los Angeles Dodgers')]))
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_file = os.path.join(tmp, 'data.csv')
+            self.game.csv_file = csv_file
+            self.game._save_sample_data(dodgers)
+            game = BaseballGame(csv_file, os.path.join(tmp, 'data.snapshot'))
+            old_state = game.state
+
+            season_file = os.path.join(tmp, 'SampleData.csv')
+            with open(season_file, 'w', encoding='utf-8') as file:
+                file.write('Year,Team,Pos,Player,G\n')
+                for row in dodgers + [dodgers[3]]:  # Repeats a row
+                    file.write(f'2031, Los Angeles Dodgers, "{row["position"]}", {row["player_name"]}, {row["games_played"]}\n')
+                file.write('2031,Los Angeles Dodgers,XX,Nobody,1\n')
+                for row in dodgers[:5]:
+                    file.write(f'2032,Los Angeles Dodgers,{row["position"]},{row["player_name"]},{row["games_played"]}\n')
+                for row in dodgers[:5]:
+                    file.write(f'2031,Short Team,{row["position"]},{row["player_name"]},{row["games_played"]}\n')
+                for row in dodgers[5:]:  # The rest of a season that was split up
+                    file.write(f'2032,Los Angeles Dodgers,{row["position"]},{row["player_name"]},{row["games_played"]}\n')
+                for row in dodgers:
+                    file.write(f'2020,Los Angeles Dodgers,{row["position"]},{row["player_name"]},{row["games_played"]}\n')
+
+            dry_run = ingest_files(game, [season_file], dry_run=True)
+            self.assertEqual(dry_run.seasons_added, [(2031, 'Los Angeles Dodgers')])
+            self.assertIs(game.state, old_state)
+
+            report = ingest_files(game, [season_file])
+            with open(csv_file, encoding='utf-8') as file:
+                lines = file.read().splitlines()
+
+        self.assertEqual(report.seasons_added, [(2031, 'Los Angeles Dodgers')])
+        self.assertEqual(report.seasons_rejected, [(2032, 'Los Angeles Dodgers'), (2031, 'Short Team')])
+        self.assertEqual(report.seasons_skipped, [(2020, 'Los Angeles Dodgers')])
+        self.assertEqual((report.duplicates, report.rows_rejected), (1, 1 + len(dodgers)))
+        self.assertFalse(any(line.startswith('2032,') for line in lines))
+        self.assertEqual(len(lines), 1 + 2 * len(dodgers))
+        self.assertIn('"1B"', [line.split(',')[2] for line in lines[-len(dodgers):]])
+
+        self.assertIsNot(game.state, old_state)
+        self.assertTrue(game.dataset.extends(old_state.dataset))
+        self.assertEqual(game.get_team_roster(2031, 'Los Angeles Dodgers'),
+                         game.get_team_roster(2020, 'Los Angeles Dodgers'))
+        self.assertIs(game.rosters[(2020, 'Los Angeles Dodgers')], old_state.rosters[(2020, 'Los Angeles Dodgers')])
+        self.assertNotIn((2031, 'Short Team'), game.rosters)
+        self.assertFalse(old_state.dataset.extends(game.dataset))
+
 class TestAccessibility(unittest.TestCase):
     """Test cases for accessibility features."""
     
@@ -0,0 +1,72 @@
+"""
+Throughput of /submit_guesses/batch versus one /submit_guesses call per player.
+
+Simulates an event where every player guesses one of a handful of seasons,
+so many players share the same answers (and often the same guesses):
+
+    python benchmarks/bench_batch.py [--players 500] [--seasons 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import app, game
+from bench_matcher import make_guess
+
+
+def make_entries(players, seasons, seed):
+    rng = random.Random(seed)
+    picked = rng.sample(sorted(game.rosters), seasons)
+    entries = []
+    for player in range(players):
+        year, team = rng.choice(picked)
+        roster = dict(game.rosters[(year, team)])
+        guesses = {position: make_guess(rng, actual, roster) for position, actual in roster.items()}
+        entries.append({'id': player, 'year': year, 'team': team, 'guesses': guesses})
+    return entries
+
+
+def time_single(client, entries):
+    started = time.perf_counter()
+    for entry in entries:
+        with client.session_transaction() as session:
+            session['year'] = entry['year']
+            session['team'] = entry['team']
+            session['roster'] = game.get_team_roster(entry['year'], entry['team'])
+        response = client.post('/submit_guesses', data=entry['guesses'])
+        assert response.status_code == 200
+    return time.perf_counter() - started
+
+
+def time_batch(client, entries):
+    started = time.perf_counter()
+    response = client.post('/submit_guesses/batch', json={'entries': entries})
+    assert response.status_code == 200
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--seasons', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    entries = make_entries(args.players, args.seasons, args.seed)
+    client = app.test_client()
+    single = time_single(client, entries)
+    batch = time_batch(client, entries)
+
+    print(f"{args.players} players across {args.seasons} seasons")
+    print(f"{'path':<28}{'total (ms)':>12}{'entries/s':>12}")
+    print(f"{'N x /submit_guesses':<28}{single * 1000:>12.1f}{args.players / single:>12,.0f}")
+    print(f"{'1 x /submit_guesses/batch':<28}{batch * 1000:>12.1f}{args.players / batch:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Load test for the full game loop.
+
+Simulates concurrent players who each start a game (/ or /new_game) and then
+submit a realistic mix of guesses to /submit_guesses, and reports throughput
+and p50/p95/p99 latency per route. By default it drives the WSGI app
+in-process through app.test_client(); pass --url to drive a running server
+instead (e.g. a local ``gunicorn app:app``):
+
+    python benchmarks/bench_load.py [--players 32] [--games 20]
+    python benchmarks/bench_load.py --url http://127.0.0.1:8000
+
+--output writes the report as JSON; --compare checks a run against such a
+baseline and exits non-zero if any route's p95 latency grew, or throughput
+fell, by more than --tolerance:
+
+    python benchmarks/bench_load.py --output benchmarks/baseline.json
+    python benchmarks/bench_load.py --compare benchmarks/baseline.json
+"""
+import argparse
+import html
+from http.cookiejar import CookieJar
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import app, game
+from bench_matcher import make_guess
+
+TITLE = re.compile(r'<b>(\d{4}) (.+?)</b></h1>')
+
+
+class TestClientTransport:
+    """Requests through Flask's test client, one client (and cookie jar) per player."""
+
+    def __init__(self):
+        self.client = app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data(as_text=True)
+
+    def post(self, path, form):
+        response = self.client.post(path, data=form)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class HTTPTransport:
+    """Requests to a running server over HTTP, with a cookie jar per player."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def _open(self, request):
+        try:
+            with self.opener.open(request, timeout=30) as response:
+                return response.status, response.read().decode('utf-8')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8')
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, form):
+        body = urllib.parse.urlencode(form).encode('utf-8')
+        return self._open(urllib.request.Request(self.base_url + path, data=body))
+
+
+def play(transport, games, rng, samples, errors):
+    """One player's session: start a game, guess, repeat."""
+    for _ in range(games):
+        path = '/new_game' if rng.random() < 0.2 else '/'
+        started = time.perf_counter()
+        status, body = transport.get(path)
+        samples.append((path, time.perf_counter() - started))
+        match = TITLE.search(body)
+        if status != 200 or not match:
+            errors.append((path, status))
+            continue
+
+        year, team = int(match.group(1)), html.unescape(match.group(2))
+        roster = game.get_team_roster(year, team)
+        form = {position: make_guess(rng, actual, roster) for position, actual in roster.items()}
+
+        started = time.perf_counter()
+        status, body = transport.post('/submit_guesses', form)
+        samples.append(('/submit_guesses', time.perf_counter() - started))
+        if status != 200:
+            errors.append(('/submit_guesses', status))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def run(players, games, url, seed):
+    samples = []
+    errors = []
+    threads = []
+    for player in range(players):
+        transport = HTTPTransport(url) if url else TestClientTransport()
+        rng = random.Random(seed + player)
+        threads.append(threading.Thread(target=play, args=(transport, games, rng, samples, errors)))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route in sorted({path for path, _ in samples}):
+        latencies = sorted(seconds for path, seconds in samples if path == route)
+        routes[route] = {
+            'requests': len(latencies),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        }
+    return {
+        'players': players,
+        'games_per_player': games,
+        'target': url or 'test_client',
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(samples) / elapsed, 1),
+        'errors': len(errors),
+        'routes': routes,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regressions of report against baseline."""
+    problems = []
+    if report['requests_per_second'] * tolerance < baseline['requests_per_second']:
+        problems.append(f"throughput {report['requests_per_second']} req/s "
+                        f"vs baseline {baseline['requests_per_second']}")
+    for route, stats in baseline['routes'].items():
+        current = report['routes'].get(route)
+        if current is None:
+            problems.append(f'{route} was not exercised')
+        elif current['p95_ms'] > stats['p95_ms'] * tolerance:
+            problems.append(f"{route} p95 {current['p95_ms']} ms vs baseline {stats['p95_ms']} ms")
+    if report['errors']:
+        problems.append(f"{report['errors']} failed requests")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=32, help='concurrent simulated players')
+    parser.add_argument('--games', type=int, default=20, help='games each player plays')
+    parser.add_argument('--url', help='base URL of a running server; default is in-process')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the report to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to check this run against')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='allowed slowdown factor before --compare fails (default 1.5)')
+    args = parser.parse_args()
+
+    report = run(args.players, args.games, args.url, args.seed)
+
+    print(f"{report['players']} players x {report['games_per_player']} games against {report['target']}: "
+          f"{report['requests_per_second']} req/s, {report['errors']} errors")
+    print(f"{'route':<18}{'requests':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+    for route, stats in report['routes'].items():
+        print(f"{route:<18}{stats['requests']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+            file.write('\n')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            problems = compare(report, json.load(file), args.tolerance)
+        for problem in problems:
+            print(f'REGRESSION: {problem}')
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for the BaseballGame season lookups.
+
+Compares the original full-scan implementations against the indexed
+methods on the real baseball_data.csv:
+
+    python benchmarks/bench_lookups.py [--number 200]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import BaseballGame
+
+
+def scan_year_for_team(rows, team):
+    if team in set(row['team'] for row in rows):
+        return random.choice(list(set(row['year'] for row in rows if row['team'] == team)))
+    raise ValueError('Invalid team!')
+
+
+def scan_team_for_year(rows, year):
+    return random.choice(list(set(row['team'] for row in rows if row['year'] == year)))
+
+
+def scan_random_team(game, rows):
+    year = random.randint(game.min_year, game.max_year)
+    teams_for_year = list(set([row['team'] for row in rows if row['year'] == year]))
+    return year, random.choice(teams_for_year)
+
+
+def scan_team_roster(rows, year, team):
+    team_data = [row for row in rows if row['year'] == year and row['team'] == team]
+    return team_data[:9]
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help='calls per timing run')
+    parser.add_argument('--csv', default=os.path.join(ROOT, 'baseball_data.csv'))
+    args = parser.parse_args()
+
+    game = BaseballGame(args.csv)
+    rows = game.data  # the dict-per-row layout the scans were written against
+    year, team = 2005, 'Los Angeles Angels of Anaheim'
+
+    cases = [
+        ('get_year_for_team',
+         lambda: scan_year_for_team(rows, team),
+         lambda: game.get_year_for_team(team)),
+        ('get_team_for_year',
+         lambda: scan_team_for_year(rows, year),
+         lambda: game.get_team_for_year(year)),
+        ('get_random_team',
+         lambda: scan_random_team(game, rows),
+         game.get_random_team),
+        ('get_team_roster',
+         lambda: scan_team_roster(rows, year, team),
+         lambda: game.get_team_roster(year, team)),
+    ]
+
+    print(f"{len(rows)} rows, {args.number} calls per run")
+    print(f"{'method':<20}{'scan (us)':>12}{'indexed (us)':>14}{'speedup':>10}")
+    for name, before, after in cases:
+        scan = per_call_us(before, args.number)
+        indexed = per_call_us(after, args.number)
+        print(f"{name:<20}{scan:>12.1f}{indexed:>14.2f}{scan / indexed:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
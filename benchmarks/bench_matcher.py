@@ -0,0 +1,119 @@
+"""
+Throughput benchmark for name matching in evaluate_guesses.
+
+Builds full nine-guess submissions against real rosters, with a mix of exact
+answers, typos, teammates' names and blanks, and scores them with the original
+SequenceMatcher-based compare_names and with the NameMatcher, best of
+--repeat runs, each starting with the NameMatcher's verdicts forgotten:
+
+    python benchmarks/bench_matcher.py [--submissions 2000] [--repeat 5]
+"""
+import argparse
+import contextlib
+from difflib import SequenceMatcher
+import io
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import BaseballGame
+
+
+class OriginalGame(BaseballGame):
+    """evaluate_guesses running the compare_names this repo started with."""
+
+    def compare_names(self, guess, actual):
+        if not guess or not actual:
+            return False, 0
+        guess = guess.lower().strip()
+        actual = actual.lower().strip()
+        actualWithoutPunctuation = re.sub(r"[^\w\s]", '', actual)
+        print(actualWithoutPunctuation)
+        if guess == actual or guess == actualWithoutPunctuation:
+            return True, 1.0
+        similarity = SequenceMatcher(None, guess, actual).ratio()
+        if similarity >= 0.8:
+            return True, similarity
+        return False, similarity
+
+
+def make_guess(rng, actual, roster):
+    roll = rng.random()
+    if roll < 0.35:
+        return actual
+    if roll < 0.55:
+        guess = list(actual)
+        i = rng.randrange(len(guess))
+        guess[i] = rng.choice('aeiou')
+        return ''.join(guess)
+    if roll < 0.75:
+        return rng.choice(list(roster.values()))
+    if roll < 0.85:
+        return actual.split()[-1]
+    return ''
+
+
+def make_submissions(game, count, seed):
+    rng = random.Random(seed)
+    seasons = sorted(game.rosters)
+    submissions = []
+    for _ in range(count):
+        roster = dict(game.rosters[rng.choice(seasons)])
+        guesses = {position: make_guess(rng, actual, roster) for position, actual in roster.items()}
+        submissions.append((guesses, roster))
+    return submissions
+
+
+def forget(game):
+    # Every timed run starts cold, so the verdict cache only pays off within a run
+    if hasattr(game.state, 'matcher'):
+        game.state.matcher._decisions.clear()
+
+
+def time_comparisons(game, submissions):
+    pairs = [(game.sanitize_input(guesses[position]), actual)
+             for guesses, roster in submissions
+             for position, actual in roster.items() if guesses[position]]
+    forget(game)
+    started = time.perf_counter()
+    for guess, actual in pairs:
+        game.compare_names(guess, actual)
+    return len(pairs) / (time.perf_counter() - started)
+
+
+def time_submissions(game, submissions):
+    forget(game)
+    started = time.perf_counter()
+    for guesses, roster in submissions:
+        game.evaluate_guesses(guesses, roster)
+    return len(submissions) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--submissions', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    game = BaseballGame(os.path.join(ROOT, 'baseball_data.csv'))
+    original = OriginalGame(os.path.join(ROOT, 'baseball_data.csv'))
+    submissions = make_submissions(game, args.submissions, args.seed)
+
+    print(f"{args.submissions} nine-guess submissions")
+    print(f"{'matcher':<18}{'compare_names/s':>17}{'evaluate_guesses/s':>20}")
+    for name, target in (('SequenceMatcher', original), ('NameMatcher', game)):
+        # The original printed every comparison; keep that cost but not the noise
+        with contextlib.redirect_stdout(io.StringIO()):
+            comparisons = max(time_comparisons(target, submissions) for _ in range(args.repeat))
+            evaluations = max(time_submissions(target, submissions) for _ in range(args.repeat))
+        print(f"{name:<18}{comparisons:>17,.0f}{evaluations:>20,.0f}")
+
+
+if __name__ == '__main__':
+    main()
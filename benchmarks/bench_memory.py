@@ -0,0 +1,124 @@
+"""
+Memory report for the dict-of-rows layout versus the columnar dataset.
+
+Each layout is loaded in a fresh "master" process which then forks worker
+processes, the way ``gunicorn --preload`` does. Every worker walks the whole
+dataset (as index building and lookups do) and reports its RSS and how much
+of it is private, i.e. not shared with the master:
+
+    python benchmarks/bench_memory.py [--workers 4]
+
+Linux only; it reads /proc/self/smaps_rollup.
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dataset import BaseballDataset
+
+
+def load_dict_rows(csv_file):
+    """The original BaseballGame._load_data layout: one dict per row."""
+    data = []
+    with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            data.append({
+                'year': int(row['year']),
+                'team': row['team'].strip(),
+                'position': row['position'].strip(),
+                'player_name': row['player_name'].strip(),
+                'games_played': int(row['games_played'])
+            })
+    return data
+
+
+def touch_dict_rows(data):
+    return sum(row['games_played'] for row in data if row['team'])
+
+
+def touch_columns(dataset):
+    return sum(games for games, team_id in zip(dataset.games_played, dataset.team_ids) if dataset.teams[team_id])
+
+
+LAYOUTS = {
+    'dict-of-rows': (load_dict_rows, touch_dict_rows),
+    'columnar': (BaseballDataset.from_csv, touch_columns),
+}
+
+
+def memory_kb():
+    """Return (rss, private) in KiB for the current process."""
+    stats = {}
+    with open('/proc/self/smaps_rollup') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                stats[parts[0].rstrip(':')] = int(parts[1])
+    return stats['Rss'], stats['Private_Clean'] + stats['Private_Dirty']
+
+
+def run_master(layout, csv_file, workers):
+    """Load one layout, fork workers and print a JSON report."""
+    load, touch = LAYOUTS[layout]
+    before, _ = memory_kb()
+    data = load(csv_file)
+    after, _ = memory_kb()
+    gc.freeze()
+
+    pipes = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            touch(data)
+            gc.collect()
+            with os.fdopen(write_fd, 'w') as pipe:
+                json.dump(memory_kb(), pipe)
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append(read_fd)
+
+    samples = []
+    for read_fd in pipes:
+        with os.fdopen(read_fd) as pipe:
+            samples.append(json.load(pipe))
+        os.wait()
+
+    print(json.dumps({
+        'layout': layout,
+        'load_kb': after - before,
+        'worker_rss_kb': max(rss for rss, _ in samples),
+        'worker_private_kb': max(private for _, private in samples),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--csv', default=os.path.join(ROOT, 'baseball_data.csv'))
+    parser.add_argument('--layout', choices=LAYOUTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.layout:
+        run_master(args.layout, args.csv, args.workers)
+        return
+
+    print(f"{'layout':<14}{'dataset (KiB)':>15}{'worker RSS (KiB)':>18}{'worker private (KiB)':>22}")
+    for layout in LAYOUTS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--layout', layout, '--workers', str(args.workers), '--csv', args.csv],
+            check=True, capture_output=True, text=True).stdout
+        report = json.loads(output)
+        print(f"{layout:<14}{report['load_kb']:>15}{report['worker_rss_kb']:>18}{report['worker_private_kb']:>22}")
+    print(f"private memory is what each of the {args.workers} workers adds on top of the shared master pages")
+
+
+if __name__ == '__main__':
+    main()
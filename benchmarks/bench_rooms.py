@@ -0,0 +1,204 @@
+"""
+How many concurrent watchers of a room's event stream one process can sustain.
+
+For each watcher count, opens a room, connects that many server-sent event
+streams to it, then has players join and submit scores and measures how long
+each score takes to reach every watcher. By default the app is served
+in-process by a threaded Werkzeug server, which like gunicorn's gthread
+worker holds one thread per open stream; pass --url to measure a running
+server instead (start it with ROOM_MAX_WATCHERS and GUNICORN_THREADS above
+the largest count):
+
+    python benchmarks/bench_rooms.py [--watchers 100,250,500,1000] [--scores 20]
+    python benchmarks/bench_rooms.py --url http://127.0.0.1:8000
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import selectors
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import app, rooms
+from bench_load import HTTPTransport, percentile
+
+SCORE = b'event: score'
+
+
+def serve():
+    """Serve the app on a free local port from a background thread; returns its base URL."""
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def open_stream(host, port, path):
+    connection = socket.create_connection((host, port), timeout=30)
+    connection.sendall(f'GET {path} HTTP/1.0\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n'.encode('ascii'))
+    connection.setblocking(False)
+    return connection
+
+
+def process_stats():
+    """Threads and resident memory of this process, when it is the one serving."""
+    stats = {'threads': threading.active_count()}
+    try:
+        with open('/proc/self/status', encoding='ascii') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    stats['rss_mb'] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return stats
+
+
+def run_level(base_url, watchers, scores, interval, in_process):
+    transport = HTTPTransport(base_url)
+    status, body = transport.post('/rooms', {})
+    if status != 201:
+        return {'watchers': watchers, 'error': f'could not open a room ({status})'}
+    room = json.loads(body)
+    url = urllib.parse.urlsplit(base_url)
+
+    selector = selectors.DefaultSelector()
+    received = {}  # Socket -> [arrival time of each score event]
+    buffers = {}
+    started = time.perf_counter()
+    for _ in range(watchers):
+        try:
+            stream = open_stream(url.hostname, url.port or 80, room['events'])
+        except OSError:
+            break
+        selector.register(stream, selectors.EVENT_READ)
+        received[stream] = []
+        buffers[stream] = b''
+
+    sent = []
+    closed = []
+
+    def read(timeout):
+        for key, _ in selector.select(timeout):
+            stream = key.fileobj
+            try:
+                data = stream.recv(65536)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b''
+            if not data:
+                selector.unregister(stream)
+                closed.append(stream)
+                continue
+            now = time.perf_counter()
+            buffered = buffers[stream] + data
+            received[stream].extend([now] * buffered.count(SCORE))
+            buffers[stream] = buffered[-len(SCORE):]
+
+    # Let every stream connect and get its first event before scoring starts
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline and len(closed) < watchers:
+        read(0.05)
+        if in_process and len(rooms.get(room['room']).watchers) >= watchers:
+            break
+        if not in_process and time.perf_counter() - started > 2 + watchers / 500:
+            break
+    connect_seconds = time.perf_counter() - started
+
+    def submit():
+        for player in range(scores):
+            players = HTTPTransport(base_url)
+            players.post(f"/rooms/{room['room']}/join", {'name': f'player {player}'})
+            sent.append(time.perf_counter())
+            players.post(f"/rooms/{room['room']}/submit", {'C': 'Nobody'})
+            time.sleep(interval)
+
+    submitter = threading.Thread(target=submit)
+    submitter.start()
+    while submitter.is_alive():
+        read(0.05)
+    deadline = time.perf_counter() + 10
+    while time.perf_counter() < deadline and any(len(times) < scores for stream, times in received.items()
+                                                 if stream not in closed):
+        read(0.05)
+
+    latencies = sorted(arrival - sent[index] for times in received.values()
+                       for index, arrival in enumerate(times[:len(sent)]))
+    complete = sum(1 for stream, times in received.items() if len(times) >= scores and stream not in closed)
+    report = {
+        'watchers': watchers,
+        'connected': len(received) - len(closed),
+        'complete': complete,
+        'connect_seconds': round(connect_seconds, 3),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+    if in_process:
+        report.update(process_stats())
+    for stream in received:
+        if stream not in closed:
+            selector.unregister(stream)
+        stream.close()
+    selector.close()
+    if in_process:
+        # Server threads only notice a closed stream when they next write to it
+        rooms._heartbeat()
+        deadline = time.perf_counter() + 10
+        while rooms.watchers and time.perf_counter() < deadline:
+            time.sleep(0.05)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--watchers', default='100,250,500,1000',
+                        help='comma-separated watcher counts to try, in order')
+    parser.add_argument('--scores', type=int, default=20, help='scores submitted per level')
+    parser.add_argument('--interval', type=float, default=0.05, help='seconds between scores')
+    parser.add_argument('--url', help='base URL of a running server; default is in-process')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    args = parser.parse_args()
+
+    levels = [int(count) for count in args.watchers.split(',')]
+    # Each in-process watcher needs two descriptors, its end and the server's
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = 2 * max(levels) + 256
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+    in_process = not args.url
+    if in_process:
+        rooms.max_watchers = max(levels)
+    base_url = args.url or serve()
+
+    reports = []
+    print(f"{'watchers':>9}{'connected':>11}{'complete':>10}{'connect (s)':>13}{'p50 (ms)':>10}"
+          f"{'p95 (ms)':>10}{'max (ms)':>10}{'threads':>9}{'RSS (MB)':>10}")
+    for watchers in levels:
+        report = run_level(base_url, watchers, args.scores, args.interval, in_process)
+        reports.append(report)
+        if 'error' in report:
+            print(f"{watchers:>9}  {report['error']}")
+            continue
+        print(f"{report['watchers']:>9}{report['connected']:>11}{report['complete']:>10}"
+              f"{report['connect_seconds']:>13}{str(report['p50_ms']):>10}{str(report['p95_ms']):>10}"
+              f"{str(report['max_ms']):>10}{str(report.get('threads', '-')):>9}{str(report.get('rss_mb', '-')):>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'target': args.url or 'in-process', 'levels': reports}, file, indent=2)
+            file.write('\n')
+
+
+if __name__ == '__main__':
+    main()
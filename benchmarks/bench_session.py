@@ -0,0 +1,55 @@
+"""
+Session cookie size and per-request cost, roster-in-cookie versus game id.
+
+For each GAME_STATE mode this starts a game through /, then reports the size
+of the session cookie the browser has to send back on every request and the
+time Flask spends verifying and deserializing it (plus, in server mode,
+resolving the game id to its roster):
+
+    python benchmarks/bench_session.py [--number 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import request
+
+import app as game_app
+from app import app
+
+
+def measure(mode, number):
+    app.config['GAME_STATE'] = mode
+    client = app.test_client()
+    client.get('/?year=2005&team=Los Angeles Angels of Anaheim')
+    cookie = client.get_cookie('session').value
+
+    with app.test_request_context('/submit_guesses', method='POST', headers={'Cookie': f'session={cookie}'}):
+        def load():
+            session = app.session_interface.open_session(app, request)
+            if 'game' in session:
+                return game_app.load_game(session['game'])[2]
+            return session['roster']
+
+        assert load()
+        seconds = min(timeit.repeat(load, number=number, repeat=3)) / number
+    return len(cookie), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'GAME_STATE':<12}{'cookie (bytes)':>16}{'load game (us)':>16}")
+    for mode in ('cookie', 'server'):
+        size, seconds = measure(mode, args.number)
+        print(f"{mode:<12}{size:>16}{seconds * 1e6:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
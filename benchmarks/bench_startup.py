@@ -0,0 +1,65 @@
+"""
+Cold-start benchmark: import-to-first-request latency with and without the
+binary dataset snapshot.
+
+Every sample runs in a fresh interpreter that imports app, serves a request
+to / through the test client and then scores one guess, the first request to
+need the name matcher (built on first use):
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import app
+loaded = time.perf_counter()
+client = app.app.test_client()
+response = client.get('/')
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+response = client.post('/submit_guesses', data={'C': 'Nobody Atall'})
+assert response.status_code == 200, response.status_code
+guessed = time.perf_counter()
+print(json.dumps({'import': loaded - start, 'first_request': done - start, 'first_guess': guessed - start}))
+"""
+
+
+def sample(snapshot_file):
+    env = dict(os.environ, DATA_SNAPSHOT=snapshot_file)
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_file = os.path.join(tmp, 'baseball_data.snapshot')
+        sample(snapshot_file)  # writes the snapshot
+        paths = [('csv', ''), ('snapshot', snapshot_file)]
+
+        print(f"median of {args.runs} runs")
+        print(f"{'path':<10}{'import (ms)':>14}{'first request (ms)':>21}{'first guess (ms)':>19}")
+        for name, snapshot in paths:
+            runs = [sample(snapshot) for _ in range(args.runs)]
+            imported = statistics.median(run['import'] for run in runs) * 1000
+            first = statistics.median(run['first_request'] for run in runs) * 1000
+            guessed = statistics.median(run['first_guess'] for run in runs) * 1000
+            print(f"{name:<10}{imported:>14.1f}{first:>21.1f}{guessed:>19.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Baseball Position Guessing Game - Prefetched game bundles
+"""
+import hashlib
+import json
+import re
+import secrets
+import unicodedata
+
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+KEY_HASH_LENGTH = 12  # hex digits of each answer hash
+TOKEN_MAX_AGE = 7 * 24 * 60 * 60  # seconds a bundled game can be scored after it was issued
+
+
+def key_form(name):
+    """The form answers are hashed in: accents dropped, lowercase letters and single spaces only.
+
+    game.js computes the same form for a guess before hashing it, so keep the two in step.
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    letters = ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return ' '.join(re.sub(r'[^a-z ]', '', letters).split())
+
+
+def answer_hash(salt, name):
+    return hashlib.sha256(f'{salt}{key_form(name)}'.encode('utf-8')).hexdigest()[:KEY_HASH_LENGTH]
+
+
+class GameBundles:
+    """Every season as a ready-to-send JSON fragment, for bundles of upcoming games.
+
+    Each fragment carries the season, its positions and a salted hash of each
+    answer, so the browser can score exact answers without a round trip. The
+    hashes only keep answers out of plain sight: anyone with a list of player
+    names can recover them, which is why results are always rescored on the
+    server (see verify) before they count. Fragments are built once per
+    dataset version; issuing a bundle only signs a token for each game.
+    """
+
+    def __init__(self, state, secret_key, season_id):
+        self.state = state
+        self.serializer = URLSafeTimedSerializer(secret_key, salt='game-bundle')
+        self.fragments = {}
+        for season, roster in state.rosters.items():
+            year, team = season
+            sid = season_id(year, team)
+            salt = f'{state.version}.{sid}.'
+            alternates = state.alternates.get(season, {})
+            for lenient in (False, True):
+                key = {position: [answer_hash(salt, name)
+                                  for name in (actual, *(alternates.get(position, ()) if lenient else ()))]
+                       for position, actual in roster.items()}
+                entry = {'year': year, 'team': team, 'dh': 'DH' in roster, 'salt': salt, 'key': key}
+                # Left open so a token can be appended without serializing again
+                self.fragments[(season, lenient)] = (sid, json.dumps(entry, separators=(',', ':'))[:-1])
+
+    def bundle(self, seasons, lenient=False):
+        """JSON for a bundle of the given seasons, each with a freshly signed token."""
+        games = []
+        for season in seasons:
+            sid, fragment = self.fragments[(season, lenient)]
+            token = self.serializer.dumps([sid, int(lenient), secrets.token_urlsafe(6)])
+            games.append(f'{fragment},"token":"{token}"}}')
+        return '{"version":"%s","games":[%s]}' % (self.state.version, ','.join(games))
+
+    def read_token(self, token):
+        """Return (season_id, lenient, nonce) for a token this app issued, or raise ValueError."""
+        try:
+            sid, lenient, nonce = self.serializer.loads(token, max_age=TOKEN_MAX_AGE)
+        except (BadData, TypeError, ValueError):
+            raise ValueError('Invalid or expired game token') from None
+        return sid, bool(lenient), nonce
+
+
+def pick_seasons(game, count, difficulty=None):
+    """Choose count seasons for a bundle, the same way / would pick each one."""
+    if difficulty:
+        return [game.get_team_by_difficulty(difficulty) for _ in range(count)]
+    return [game.get_random_team() for _ in range(count)]
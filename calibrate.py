@@ -0,0 +1,360 @@
+"""
+Baseball Position Guessing Game - Offline name matcher calibration
+"""
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+import json
+import os
+import random
+import re
+import time
+
+import click
+
+from name_matcher import NameMatcher, name_key
+
+# Whether the matcher should accept each kind of guess; None means it is only reported
+CATEGORIES = {
+    'adjacent_key': True,  # One letter swapped for a neighbouring key
+    'dropped_letter': True,
+    'extra_letter': True,
+    'transposed': True,
+    'sound_alike': True,  # ph/f, ie/ei, c/k and the like
+    'two_typos': True,
+    'no_suffix': True,  # Jr., Sr., II left off
+    'last_name': None,  # Last name alone; whether that should count is a game decision
+    'teammate': False,  # A similar name from the same team-season, e.g. Bengie for Jose Molina
+    'teammate_typo': False,
+    'same_surname': False,  # Another player with the same last name, any season
+}
+
+KEYBOARD_ROWS = ('qwertyuiop', 'asdfghjkl', 'zxcvbnm')
+NEIGHBOURS = {}
+for _row, _keys in enumerate(KEYBOARD_ROWS):
+    for _column, _key in enumerate(_keys):
+        NEIGHBOURS[_key] = ''.join(
+            KEYBOARD_ROWS[row][column] for row in range(max(0, _row - 1), min(len(KEYBOARD_ROWS), _row + 2))
+            for column in range(_column - 1, _column + 2)
+            if 0 <= column < len(KEYBOARD_ROWS[row]) and (row, column) != (_row, _column))
+SOUND_ALIKES = (('ph', 'f'), ('ie', 'ei'), ('c', 'k'), ('y', 'i'), ('ll', 'l'), ('tt', 't'), ('ck', 'k'),
+                ('z', 's'), ('ou', 'o'), ('ee', 'ea'))
+SUFFIX = re.compile(r',?\s+(jr\.?|sr\.?|ii|iii|iv)$', re.IGNORECASE)
+
+DEFAULT_THRESHOLDS = (0.7, 0.75, 0.8, 0.85, 0.9)
+
+
+# Candidate matchers. Each scores a sanitized guess against a name from 0 to 1,
+# lowercasing both; exact matches on the lowercased or punctuation-free name
+# score 1, as in compare_names
+
+def _exact(guess, actual):
+    return guess == actual.lower().strip() or guess == name_key(actual)
+
+
+def sequence_score(guess, actual):
+    """The ratio compare_names has always used."""
+    guess = guess.lower().strip()
+    if _exact(guess, actual):
+        return 1.0
+    return SequenceMatcher(None, guess, actual.lower().strip()).ratio()
+
+
+def lcs_score(guess, actual):
+    """Twice the longest common subsequence over the combined length, an upper bound on sequence_score."""
+    guess = guess.lower().strip()
+    if _exact(guess, actual):
+        return 1.0
+    actual = actual.lower().strip()
+    previous = [0] * (len(actual) + 1)
+    for char in guess:
+        current = [0]
+        for index, other in enumerate(actual):
+            current.append(previous[index] + 1 if char == other else max(previous[index + 1], current[index]))
+        previous = current
+    return 2.0 * previous[-1] / (len(guess) + len(actual)) if guess or actual else 0.0
+
+
+def edit_score(guess, actual):
+    """One minus the Levenshtein distance over the longer length."""
+    guess = guess.lower().strip()
+    if _exact(guess, actual):
+        return 1.0
+    actual = actual.lower().strip()
+    previous = list(range(len(actual) + 1))
+    for row, char in enumerate(guess, 1):
+        current = [row]
+        for column, other in enumerate(actual, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (char != other)))
+        previous = current
+    longest = max(len(guess), len(actual))
+    return 1.0 - previous[-1] / longest if longest else 0.0
+
+
+SCORERS = {'sequence': sequence_score, 'lcs': lcs_score, 'edit': edit_score}
+# NameMatcher decides rather than scores (aliases and other players' names settle some
+# guesses whatever their ratio), so its verdicts are counted per threshold
+MATCHERS = ('namematcher', *SCORERS)
+
+
+# Corpus generation
+
+def _typo(rng, name):
+    """One random keyboard slip in a name: substitute, drop, add or swap a letter."""
+    letters = list(name)
+    spots = [index for index, char in enumerate(letters) if char.isalpha()]
+    if not spots:
+        return name, 'adjacent_key'
+    index = rng.choice(spots)
+    kind = rng.choice(('adjacent_key', 'dropped_letter', 'extra_letter', 'transposed'))
+    char = letters[index].lower()
+    if kind == 'adjacent_key':
+        letters[index] = rng.choice(NEIGHBOURS.get(char, 'e'))
+    elif kind == 'dropped_letter':
+        del letters[index]
+    elif kind == 'extra_letter':
+        letters.insert(index, rng.choice(NEIGHBOURS.get(char, 'e') + char))
+    elif index + 1 < len(letters):
+        letters[index], letters[index + 1] = letters[index + 1], letters[index]
+    else:
+        letters[index - 1], letters[index] = letters[index], letters[index - 1]
+    return ''.join(letters), kind
+
+
+def _sound_alike(rng, name):
+    lower = name.lower()
+    swaps = [(old, new) for pair in SOUND_ALIKES for old, new in (pair, pair[::-1]) if old in lower]
+    if not swaps:
+        return None
+    old, new = rng.choice(swaps)
+    start = lower.find(old)
+    return name[:start] + new + name[start + len(old):]
+
+
+def misspellings(task):
+    """Guesses that mean each of the given players, as (guess, actual, category)."""
+    names, per_name, seed = task
+    rng = random.Random(seed)
+    pairs = []
+    for name in names:
+        for _ in range(per_name):
+            guess, category = _typo(rng, name)
+            pairs.append((guess, name, category))
+        pairs.append((_typo(rng, _typo(rng, name)[0])[0], name, 'two_typos'))
+        sound_alike = _sound_alike(rng, name)
+        if sound_alike:
+            pairs.append((sound_alike, name, 'sound_alike'))
+        if SUFFIX.search(name):
+            pairs.append((SUFFIX.sub('', name), name, 'no_suffix'))
+        if ' ' in SUFFIX.sub('', name):
+            pairs.append((SUFFIX.sub('', name).rsplit(' ', 1)[-1], name, 'last_name'))
+    return pairs
+
+
+def _surname(name):
+    return SUFFIX.sub('', name).rsplit(' ', 1)[-1].lower()
+
+
+def collisions(task):
+    """Guesses naming someone else on the same team-season, where the two names are alike.
+
+    Names are alike if they share a last name, or if SequenceMatcher's quick
+    upper bounds on their similarity reach min_similarity.
+    """
+    rosters, min_similarity, seed = task
+    rng = random.Random(seed)
+    pairs = []
+    for names in rosters:
+        for actual in names:
+            for other in names:
+                if other == actual:
+                    continue
+                matcher = SequenceMatcher(None, other.lower(), actual.lower())
+                if _surname(other) != _surname(actual) and (matcher.real_quick_ratio() < min_similarity
+                                                             or matcher.quick_ratio() < min_similarity):
+                    continue
+                pairs.append((other, actual, 'teammate'))
+                pairs.append((_typo(rng, other)[0], actual, 'teammate_typo'))
+    return pairs
+
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def build_corpus(dataset, sanitize, executor, per_name=4, min_similarity=0.7, seed=1, chunk_size=250):
+    """Labelled (guess, actual, category) pairs from every player_name in the dataset.
+
+    Misspellings of each name and near-collisions within each team-season are
+    generated in parallel; guesses then go through sanitize the way submitted
+    guesses do. Players who share a last name are paired up across seasons.
+    """
+    names = sorted(set(dataset.players))
+    seasons = defaultdict(set)
+    for index in range(len(dataset)):
+        seasons[(dataset.years[index], dataset.team_ids[index])].add(dataset.players[dataset.player_ids[index]])
+    rosters = [sorted(names_in_season) for _, names_in_season in sorted(seasons.items())]
+
+    tasks = [executor.submit(misspellings, (chunk, per_name, seed * 100003 + number))
+             for number, chunk in enumerate(_chunks(names, chunk_size))]
+    tasks += [executor.submit(collisions, (chunk, min_similarity, seed * 100019 + number))
+              for number, chunk in enumerate(_chunks(rosters, chunk_size // 10 or 1))]
+    pairs = [pair for task in tasks for pair in task.result()]
+
+    by_surname = defaultdict(list)
+    for name in names:
+        by_surname[_surname(name)].append(name)
+    for namesakes in by_surname.values():
+        for actual in namesakes:
+            for other in namesakes:
+                if other != actual:
+                    pairs.append((other, actual, 'same_surname'))
+
+    # Each guess at a name counts once, under the first category that produced
+    # it (so teammates who share a last name are teammates), and a typo that
+    # happens to give back the name itself is not a typo
+    order = {category: number for number, category in enumerate(CATEGORIES)}
+    corpus = {}
+    for guess, actual, category in sorted(pairs, key=lambda pair: order[pair[2]]):
+        guess = sanitize(guess)
+        if guess and guess != actual:
+            corpus.setdefault((guess, actual), category)
+    return sorted((guess, actual, category) for (guess, actual), category in corpus.items())
+
+
+# Scoring
+
+_corpus = None
+_name_matcher = None
+
+
+def _init_worker(corpus):
+    global _corpus, _name_matcher
+    _corpus = corpus
+    _name_matcher = NameMatcher(sorted({actual for _, actual, _ in corpus}))
+
+
+def score_chunk(task):
+    """Count verdicts per category and threshold for one matcher over a slice of the corpus.
+
+    Returns (counts, seconds): counts maps (threshold, category) to
+    [accepted, total], and seconds is the time spent matching.
+    """
+    matcher, thresholds, start, stop = task
+    pairs = _corpus[start:stop]
+    counts = defaultdict(lambda: [0, 0])
+    seconds = 0.0
+    if matcher == 'namematcher':
+        # Its early exits depend on the threshold, so time each one separately
+        for threshold in thresholds:
+            matcher = _name_matcher.at(threshold)  # Names normalized once per worker
+            started = time.perf_counter()
+            verdicts = [matcher.match(guess, actual)[0] for guess, actual, _ in pairs]
+            seconds += time.perf_counter() - started
+            for (_, _, category), accepted in zip(pairs, verdicts):
+                counts[(threshold, category)][0] += accepted
+                counts[(threshold, category)][1] += 1
+        return dict(counts), seconds / len(thresholds)
+
+    scorer = SCORERS[matcher]
+    started = time.perf_counter()
+    scores = [scorer(guess, actual) for guess, actual, _ in pairs]
+    seconds = time.perf_counter() - started
+    for (_, _, category), score in zip(pairs, scores):
+        for threshold in thresholds:
+            counts[(threshold, category)][0] += score >= threshold
+            counts[(threshold, category)][1] += 1
+    return dict(counts), seconds
+
+
+def evaluate(corpus, executor_factory, matchers=MATCHERS, thresholds=DEFAULT_THRESHOLDS, chunk_size=2000):
+    """Precision, recall and pairs per second of each matcher at each threshold.
+
+    executor_factory(initializer, initargs) returns a process pool whose
+    workers each hold the corpus, so tasks only carry slice bounds.
+    """
+    totals = {matcher: defaultdict(lambda: [0, 0]) for matcher in matchers}
+    seconds = dict.fromkeys(matchers, 0.0)
+    with executor_factory(_init_worker, (corpus,)) as executor:
+        tasks = {executor.submit(score_chunk, (matcher, thresholds, start, start + chunk_size)): matcher
+                 for matcher in matchers for start in range(0, len(corpus), chunk_size)}
+        for task, matcher in tasks.items():
+            counts, elapsed = task.result()
+            seconds[matcher] += elapsed
+            for key, (accepted, total) in counts.items():
+                totals[matcher][key][0] += accepted
+                totals[matcher][key][1] += total
+
+    results = []
+    for matcher in matchers:
+        for threshold in thresholds:
+            by_category = {category: tuple(totals[matcher][(threshold, category)]) for category in CATEGORIES
+                           if (threshold, category) in totals[matcher]}
+            true_accepts = sum(accepted for category, (accepted, _) in by_category.items() if CATEGORIES[category])
+            positives = sum(total for category, (_, total) in by_category.items() if CATEGORIES[category])
+            false_accepts = sum(accepted for category, (accepted, _) in by_category.items()
+                                if CATEGORIES[category] is False)
+            precision = true_accepts / (true_accepts + false_accepts) if true_accepts + false_accepts else 0.0
+            recall = true_accepts / positives if positives else 0.0
+            results.append({
+                'matcher': matcher,
+                'threshold': threshold,
+                'precision': round(precision, 4),
+                'recall': round(recall, 4),
+                'f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+                'false_accepts': false_accepts,
+                'false_rejects': positives - true_accepts,
+                'pairs_per_second': round(len(corpus) / seconds[matcher]) if seconds[matcher] else None,
+                'accept_rate': {category: round(accepted / total, 4)
+                                for category, (accepted, total) in by_category.items()},
+            })
+    return results
+
+
+def init_calibrate(app, game):
+    """Register `flask calibrate-matcher`, which measures how well name matchers tell players apart."""
+
+    @app.cli.command('calibrate-matcher')
+    @click.option('--thresholds', default=','.join(map(str, DEFAULT_THRESHOLDS)), show_default=True,
+                  help='Comma-separated thresholds to try.')
+    @click.option('--matchers', default=','.join(MATCHERS), show_default=True, help='Matchers to compare.')
+    @click.option('--per-name', default=4, show_default=True, help='Single-typo misspellings per player.')
+    @click.option('--processes', type=int, default=None, help='Worker processes (default: one per CPU).')
+    @click.option('--seed', default=1, show_default=True)
+    @click.option('--output', type=click.Path(dir_okay=False), help='Also write the results as JSON here.')
+    def calibrate_command(thresholds, matchers, per_name, processes, seed, output):
+        """Score generated misspellings and near-collisions of every player name with each matcher."""
+        thresholds = tuple(float(value) for value in thresholds.split(','))
+        matchers = tuple(matchers.split(','))
+        unknown = set(matchers) - set(MATCHERS)
+        if unknown:
+            raise click.BadParameter(f'unknown matchers {sorted(unknown)}; choose from {", ".join(MATCHERS)}')
+        processes = processes or os.cpu_count()
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(processes) as executor:
+            corpus = build_corpus(game.dataset, game.sanitize_input, executor, per_name=per_name, seed=seed)
+        counts = defaultdict(int)
+        for _, _, category in corpus:
+            counts[category] += 1
+        click.echo(f'{len(corpus):,} labelled guesses in {time.perf_counter() - started:.1f}s: '
+                   + ', '.join(f'{category} {counts[category]:,}' for category in CATEGORIES if counts[category]))
+
+        started = time.perf_counter()
+        results = evaluate(corpus, lambda initializer, initargs: ProcessPoolExecutor(
+            processes, initializer=initializer, initargs=initargs), matchers, thresholds)
+        click.echo(f'Scored on {processes} processes in {time.perf_counter() - started:.1f}s '
+                   f'(pairs/s is per process)\n')
+
+        click.echo(f"{'matcher':<13}{'threshold':>10}{'precision':>11}{'recall':>8}{'f1':>8}"
+                   f"{'false acc.':>12}{'false rej.':>12}{'pairs/s':>11}{'last name':>11}")
+        for row in results:
+            click.echo(f"{row['matcher']:<13}{row['threshold']:>10}{row['precision']:>11.4f}{row['recall']:>8.4f}"
+                       f"{row['f1']:>8.4f}{row['false_accepts']:>12,}{row['false_rejects']:>12,}"
+                       f"{row['pairs_per_second'] or 0:>11,}{row['accept_rate'].get('last_name', 0):>11.4f}")
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump({'corpus': dict(counts), 'processes': processes, 'results': results}, file, indent=2)
+                file.write('\n')
@@ -0,0 +1,72 @@
+"""
+Baseball Position Guessing Game - Player to seasons inverted index
+"""
+from collections import defaultdict
+
+from catalog import FRANCHISES
+from name_matcher import name_key
+
+
+def _key(name):
+    return name_key(' '.join(name.split()))
+
+
+# Every name a franchise has gone by keys to its latest one
+_FRANCHISE_KEYS = {_key(name): _key(names[-1]) for names in FRANCHISES for name in names}
+
+
+def _team_key(team):
+    key = _key(team)
+    return _FRANCHISE_KEYS.get(key, key)
+
+
+class CareerIndex:
+    """Every player's seasons, keyed by name, for the "guess the teams" mode.
+
+    Built in one pass over the dataset: each normalized player name (the form
+    compare_names judges exact matches in) maps to all of that player's rows
+    as (year, team, position, games_played) tuples, and to the seasons where
+    the player was in the compiled starting nine. Team names are keyed the
+    same way, by franchise (see catalog.FRANCHISES), so "Los Angeles Angels"
+    finds a 2005 season of the Los Angeles Angels of Anaheim and checking a
+    guessed (year, team) is two dict lookups.
+    """
+
+    def __init__(self, dataset, rosters):
+        player_keys = [_key(name) for name in dataset.players]  # Each distinct name normalized once
+        teams = dataset.teams
+        positions = dataset.positions
+        seasons = defaultdict(list)
+        for year, team_id, position_id, player_id, games_played in zip(
+                dataset.years, dataset.team_ids, dataset.position_ids, dataset.player_ids, dataset.games_played):
+            seasons[player_keys[player_id]].append((year, teams[team_id], positions[position_id], games_played))
+        self.seasons = {key: tuple(entries) for key, entries in seasons.items()}
+
+        # (year, team key) -> (year, team, position) for each season a player started
+        starts = defaultdict(dict)
+        self.names = {}
+        keys = dict(zip(dataset.players, player_keys))
+        team_keys = {team: _team_key(team) for team in teams}
+        for (year, team), roster in rosters.items():
+            for position, name in roster.items():
+                key = keys[name]
+                starts[key][(year, team_keys[team])] = (year, team, position)
+                self.names.setdefault(key, name)
+        self.starts = dict(starts)
+        self.starters = sorted(self.starts)  # Players who can be asked about
+
+    def name(self, name):
+        """The data's spelling of a starter's name, or None if nobody by that name started a season."""
+        return self.names.get(_key(name))
+
+    def player_seasons(self, name):
+        """Every row for a player as (year, team, position, games_played), in data order."""
+        return self.seasons.get(_key(name), ())
+
+    def started(self, name):
+        """The seasons a player was in the starting nine, as (year, team, position), by year."""
+        return sorted(self.starts.get(_key(name), {}).values())
+
+    def check(self, name, year, team):
+        """Return (year, team, position) if the player started for that team that year, else None."""
+        return self.starts.get(_key(name), {}).get((year, _team_key(team)))
@@ -0,0 +1,52 @@
+"""
+Baseball Position Guessing Game - Team and year catalog
+"""
+
+# Team names that belong to one franchise, for the ones that have been renamed or moved
+FRANCHISES = (
+    ('Anaheim Angels', 'Los Angeles Angels of Anaheim', 'Los Angeles Angels'),
+    ('Florida Marlins', 'Miami Marlins'),
+    ('Montreal Expos', 'Washington Nationals'),
+    ('Tampa Bay Devil Rays', 'Tampa Bay Rays'),
+    ('Cleveland Indians', 'Cleveland Guardians'),
+    ('Oakland Athletics', 'Athletics'),
+)
+
+
+def year_ranges(years):
+    """Collapse sorted years into [first, last] runs, e.g. [2000, 2001, 2003] -> [[2000, 2001], [2003, 2003]]."""
+    ranges = []
+    for year in years:
+        if ranges and year == ranges[-1][1] + 1:
+            ranges[-1][1] = year
+        else:
+            ranges.append([year, year])
+    return ranges
+
+
+def build_catalog(years_by_team):
+    """Every playable team with its year ranges, grouped into franchises.
+
+    A franchise is named after its most recent team name. Teams missing from
+    FRANCHISES are franchises of their own.
+    """
+    franchise_of = {name: names for names in FRANCHISES for name in names}
+    teams = []
+    franchises = {}
+    for team, years in sorted(years_by_team.items()):
+        teams.append({'name': team, 'first_year': years[0], 'last_year': years[-1], 'years': year_ranges(years)})
+        members = [name for name in franchise_of.get(team, (team,)) if name in years_by_team]
+        franchise = max(members, key=lambda name: years_by_team[name][-1])
+        teams[-1]['franchise'] = franchise
+        franchises.setdefault(franchise, []).append(team)
+
+    years = sorted({year for team_years in years_by_team.values() for year in team_years})
+    return {
+        'min_year': years[0] if years else None,
+        'max_year': years[-1] if years else None,
+        'teams': teams,
+        'franchises': [
+            {'name': name, 'teams': sorted(members, key=lambda team: years_by_team[team][0])}
+            for name, members in sorted(franchises.items())
+        ],
+    }
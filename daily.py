@@ -0,0 +1,115 @@
+"""
+Baseball Position Guessing Game - Daily challenge
+"""
+from datetime import date, datetime, time as datetime_time, timedelta, timezone
+import hashlib
+import threading
+
+
+class DailyPuzzle:
+    """One day's team-season with its page rendered once for every player."""
+
+    __slots__ = ('day', 'version', 'year', 'team', 'roster', 'html', 'etag')
+
+    def __init__(self, day, version, year, team, roster, html):
+        self.day = day
+        self.version = version
+        self.year = year
+        self.team = team
+        self.roster = roster
+        self.html = html
+        self.etag = hashlib.sha256(html.encode('utf-8')).hexdigest()[:16]
+
+
+class DailyChallenge:
+    """The same date-seeded team-season for everyone, with a tally of the day's scores.
+
+    A day's puzzle is built and rendered on its first request and reused until
+    the dataset version changes. Only the last KEEP_DAYS days are kept, for the
+    puzzle and the scores alike; scores are tallied in this process only.
+    """
+
+    KEEP_DAYS = 2  # Today, plus yesterday for pages loaded just before midnight
+
+    def __init__(self, game, render):
+        self.game = game
+        self.render = render  # (year, team, roster, day) -> page HTML
+        self._puzzles = {}
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def today():
+        return datetime.now(timezone.utc).date()
+
+    @staticmethod
+    def seconds_until_tomorrow():
+        """Seconds until the next puzzle, which is how long today's page can be cached."""
+        now = datetime.now(timezone.utc)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime_time(), tzinfo=timezone.utc)
+        return max(1, int((tomorrow - now).total_seconds()))
+
+    def playable_days(self):
+        today = self.today()
+        return [today - timedelta(days=offset) for offset in range(self.KEEP_DAYS)]
+
+    def season_for(self, day, state):
+        """The season for a day; the same in every worker for the same dataset.
+
+        Every season is ranked by a hash of itself and the day, so a reload or
+        ingest that adds seasons only moves the day's puzzle if one of the new
+        seasons outranks it. Pages carry their season to /daily/submit for
+        that rare case.
+        """
+        prefix = f'daily:{day.isoformat()}:'
+        return max(state.rosters, key=lambda season: hashlib.sha256(
+            f'{prefix}{season[0]}:{season[1]}'.encode('utf-8')).digest())
+
+    def puzzle(self, day=None):
+        """The puzzle for a day (today by default), building and rendering it if needed."""
+        day = day or self.today()
+        state = self.game.state
+        puzzle = self._puzzles.get(day)
+        if puzzle is not None and puzzle.version == state.version:
+            return puzzle
+
+        year, team = self.season_for(day, state)
+        roster = dict(state.rosters[(year, team)])
+        puzzle = DailyPuzzle(day, state.version, year, team, roster, self.render(year, team, roster, day))
+        with self._lock:
+            self._puzzles[day] = puzzle
+            for old_day in [old_day for old_day in self._puzzles if old_day not in self.playable_days()]:
+                del self._puzzles[old_day]
+        return puzzle
+
+    def record(self, day, correct_count):
+        """Add one finished game to the day's score distribution."""
+        with self._lock:
+            counts = self._scores.get(day)
+            if counts is None:
+                counts = self._scores[day] = [0] * (len(self.game.POSITIONS) + 1)
+                for old_day in [old_day for old_day in self._scores if old_day not in self.playable_days()]:
+                    del self._scores[old_day]
+            counts[correct_count] += 1
+
+    def results(self, day=None):
+        """How many players got each number of starters right on a day."""
+        day = day or self.today()
+        with self._lock:
+            counts = list(self._scores.get(day, ()))
+        plays = sum(counts)
+        return {
+            'date': day.isoformat(),
+            'plays': plays,
+            'distribution': {str(correct): count for correct, count in enumerate(counts) if count},
+            'average_correct': round(sum(correct * count for correct, count in enumerate(counts)) / plays, 2)
+            if plays else None
+        }
+
+
+def parse_day(value):
+    """Parse a YYYY-MM-DD date, returning None if it is not one."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
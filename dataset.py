@@ -0,0 +1,242 @@
+"""
+Baseball Position Guessing Game - Compact columnar dataset
+"""
+from array import array
+import csv
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'SNDS'
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_PREFIX = struct.Struct('<4sHI')  # magic, format version, header length
+
+
+class BaseballDataset:
+    """Column-oriented storage for the baseball rows.
+
+    Team, position and player names are dictionary-encoded into small string
+    tables and every column is a flat ``array``, so the whole dataset is a
+    handful of objects instead of ~30k dicts. Built before gunicorn forks, the
+    column buffers stay shared copy-on-write between workers.
+    """
+
+    FIELDS = ('year', 'team', 'position', 'player_name', 'games_played')
+    COLUMNS = ('years', 'team_ids', 'position_ids', 'player_ids', 'games_played')
+
+    def __init__(self, years, team_ids, position_ids, player_ids, games_played,
+                 teams, positions, players):
+        self.years = years
+        self.team_ids = team_ids
+        self.position_ids = position_ids
+        self.player_ids = player_ids
+        self.games_played = games_played
+        self.teams = teams
+        self.positions = positions
+        self.players = players
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Encode an iterable of row dicts into columns."""
+        return cls(array('H'), array('H'), array('B'), array('I'), array('H'), (), (), ()).extended(rows)
+
+    def extended(self, rows):
+        """Return a new dataset with the rows appended, leaving this one untouched.
+
+        Existing string codes are kept and new strings get the next codes, so the
+        result ``extends`` this dataset. Rows are consumed one at a time.
+        """
+        years, team_ids, position_ids, player_ids, games_played = (
+            array(column.typecode, column) for column in (getattr(self, name) for name in self.COLUMNS))
+        tables = tuple({value: code for code, value in enumerate(table)}
+                       for table in (self.teams, self.positions, self.players))
+
+        def encode(table, value):
+            code = table.get(value)
+            if code is None:
+                code = table[value] = len(table)
+            return code
+
+        for row in rows:
+            years.append(row['year'])
+            team_ids.append(encode(tables[0], row['team']))
+            position_ids.append(encode(tables[1], row['position']))
+            player_ids.append(encode(tables[2], row['player_name']))
+            games_played.append(row['games_played'])
+
+        teams, positions, players = (tuple(sys.intern(value) for value in table) for table in tables)
+        return type(self)(years, team_ids, position_ids, player_ids, games_played, teams, positions, players)
+
+    def extends(self, other):
+        """True if this dataset is other with rows appended and the same codes for existing strings."""
+        rows = len(other)
+        return (len(self) >= rows
+                and all(getattr(self, name)[:rows] == getattr(other, name) for name in self.COLUMNS)
+                and all(getattr(self, name)[:len(getattr(other, name))] == getattr(other, name)
+                        for name in ('teams', 'positions', 'players')))
+
+    @classmethod
+    def from_csv(cls, csv_file):
+        """Stream a baseball_data.csv file straight into columns."""
+        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            return cls.from_rows({
+                'year': int(row['year']),
+                'team': row['team'].strip(),
+                'position': row['position'].strip(),
+                'player_name': row['player_name'].strip(),
+                'games_played': int(row['games_played'])
+            } for row in reader)
+
+    def __len__(self):
+        return len(self.years)
+
+    def row(self, index):
+        """Decode a single row back into the dict layout used by the game."""
+        return {
+            'year': self.years[index],
+            'team': self.teams[self.team_ids[index]],
+            'position': self.positions[self.position_ids[index]],
+            'player_name': self.players[self.player_ids[index]],
+            'games_played': self.games_played[index]
+        }
+
+    def rows(self, indexes=None):
+        """Yield decoded rows, either all of them or those at the given indexes."""
+        if indexes is None:
+            indexes = range(len(self))
+        for index in indexes:
+            yield self.row(index)
+
+    def season_index(self, start=0):
+        """Map each (year, team) to the row indexes of that season, in file order.
+
+        Seasons stored contiguously (as in baseball_data.csv) get a ``range``;
+        anything else falls back to an array of indexes. With a start, only rows
+        from there on are indexed.
+        """
+        seasons = {}
+        team_ids = self.team_ids
+        years = self.years
+        for index in range(start + 1, len(self) + 1):
+            if index < len(self) and years[index] == years[start] and team_ids[index] == team_ids[start]:
+                continue
+            key = (years[start], self.teams[team_ids[start]])
+            block = range(start, index)
+            if key in seasons:
+                seasons[key] = array('I', list(seasons[key]) + list(block))
+            else:
+                seasons[key] = block
+            start = index
+        return seasons
+
+    def write_snapshot(self, snapshot_file, source):
+        """Write the columns and string tables to a binary snapshot file.
+
+        ``source`` describes the CSV the dataset was parsed from (see
+        ``source_info``) so a later load can tell whether the snapshot is stale.
+        The file is written next to its destination and renamed into place, so
+        readers never see a partial snapshot.
+        """
+        columns = [getattr(self, name) for name in self.COLUMNS]
+        header = json.dumps({
+            'source': source,
+            'byteorder': sys.byteorder,
+            'rows': len(self),
+            'teams': self.teams,
+            'positions': self.positions,
+            'players': self.players,
+            'columns': [[name, column.typecode, column.itemsize] for name, column in zip(self.COLUMNS, columns)]
+        }).encode('utf-8')
+
+        temp_file = f'{snapshot_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'wb') as file:
+            file.write(_SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+            file.write(header)
+            for column in columns:
+                column.tofile(file)
+        os.replace(temp_file, snapshot_file)
+
+    @staticmethod
+    def read_snapshot_header(file):
+        """Read and validate a snapshot header, leaving the file positioned at the columns."""
+        magic, version, length = _SNAPSHOT_PREFIX.unpack(file.read(_SNAPSHOT_PREFIX.size))
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError('Unsupported snapshot format')
+        header = json.loads(file.read(length))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError('Snapshot was written on a machine with a different byte order')
+        return header
+
+    @classmethod
+    def from_snapshot(cls, snapshot_file):
+        """Load a dataset written by ``write_snapshot``; returns (dataset, header)."""
+        with open(snapshot_file, 'rb') as file:
+            header = cls.read_snapshot_header(file)
+            columns = []
+            for name, typecode, itemsize in header['columns']:
+                column = array(typecode)
+                if column.itemsize != itemsize:
+                    raise ValueError(f'Snapshot column {name} has an incompatible item size')
+                column.fromfile(file, header['rows'])
+                columns.append(column)
+
+        teams, positions, players = (tuple(sys.intern(value) for value in header[table])
+                                     for table in ('teams', 'positions', 'players'))
+        return cls(*columns, teams, positions, players), header
+
+
+def source_info(csv_file, digest=None):
+    """Describe a CSV file by size, mtime and (optionally precomputed) SHA-256."""
+    stat = os.stat(csv_file)
+    if digest is None:
+        digest = file_digest(csv_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+
+
+def file_digest(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def load_dataset(csv_file, snapshot_file=None):
+    """Load the dataset, preferring a fresh binary snapshot over parsing the CSV.
+
+    The snapshot is fresh when the CSV's size and mtime match those recorded in
+    it; if they differ the CSV is hashed, and only a content change triggers a
+    full parse. Whenever the CSV had to be hashed the snapshot is rewritten.
+    Failing to read or write it is logged but never fatal.
+
+    Returns ``(dataset, source)`` where ``source`` is the ``source_info`` of
+    the CSV the dataset came from.
+    """
+    if snapshot_file is None:
+        return BaseballDataset.from_csv(csv_file), source_info(csv_file)
+
+    dataset, recorded = None, None
+    try:
+        dataset, header = BaseballDataset.from_snapshot(snapshot_file)
+        recorded = header['source']
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, EOFError, struct.error) as e:
+        logger.warning('Ignoring unreadable snapshot %s: %s', snapshot_file, e)
+
+    stat = os.stat(csv_file)
+    if recorded and recorded['size'] == stat.st_size and recorded['mtime_ns'] == stat.st_mtime_ns:
+        return dataset, recorded
+
+    source = source_info(csv_file)
+    if not recorded or recorded['sha256'] != source['sha256']:
+        dataset = BaseballDataset.from_csv(csv_file)
+
+    try:
+        dataset.write_snapshot(snapshot_file, source)
+    except OSError as e:
+        logger.warning('Could not write snapshot %s: %s', snapshot_file, e)
+    return dataset, source
@@ -0,0 +1,102 @@
+"""
+Baseball Position Guessing Game - Difficulty-weighted season selection
+"""
+import random
+
+TIERS = ('easy', 'medium', 'hard')
+
+
+class AliasTable:
+    """Walker's alias method: draw an index with probability proportional to its weight in O(1)."""
+
+    __slots__ = ('probability', 'alias')
+
+    def __init__(self, weights):
+        count = len(weights)
+        if not count:
+            raise ValueError('An alias table needs at least one weight')
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+        small = [index for index, weight in enumerate(scaled) if weight < 1.0]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1.0 up to rounding, and keeps its default of always itself
+
+    def sample(self, rng=random):
+        index = int(rng.random() * len(self.probability))
+        return index if rng.random() < self.probability[index] else self.alias[index]
+
+
+def starter_ease(dataset, seasons, rosters):
+    """Score each valid season by how full-time its starters were, from 0 (hardest) to 1 (easiest).
+
+    A season's raw score is its starters' average games played over the most
+    games anyone played for the team that year, which also evens out short
+    seasons. The score returned is that raw score's percentile among all seasons.
+    """
+    games_played = dataset.games_played
+    raw = {}
+    for key, roster in rosters.items():
+        indexes = seasons[key]
+        starters = [games_played[index] for index in indexes[:len(roster)]]
+        most = max(games_played[index] for index in indexes)
+        raw[key] = sum(starters) / len(starters) / most if most else 0.0
+    ranked = sorted(raw, key=lambda key: (raw[key], key))
+    last = max(len(ranked) - 1, 1)
+    return {key: order / last for order, key in enumerate(ranked)}
+
+
+def blend_accuracy(ease, season_stats, weight=0.5, min_guesses=30):
+    """Mix in how often players actually got each season's starters right, where enough have tried.
+
+    season_stats(year, team) returns something with guesses and accuracy
+    attributes, or None (see ResultsStore.season_stats).
+    """
+    blended = {}
+    for key, score in ease.items():
+        stats = season_stats(*key)
+        if stats is not None and stats.guesses >= min_guesses:
+            score = (1 - weight) * score + weight * stats.accuracy
+        blended[key] = score
+    return blended
+
+
+class DifficultySelector:
+    """Constant-time random season picks by difficulty tier.
+
+    Seasons are split into equal thirds by ease. Within a tier, picks lean
+    towards that tier's end of the scale: the easiest of the easy seasons come
+    up most often, and likewise for hard; medium is uniform.
+    """
+
+    FLOOR = 0.05  # Smallest weight, so every season in a tier can come up
+
+    def __init__(self, ease):
+        ranked = sorted(ease, key=lambda key: (-ease[key], key))
+        self.tiers = {}
+        for order, tier in enumerate(TIERS):
+            members = ranked[order * len(ranked) // len(TIERS):(order + 1) * len(ranked) // len(TIERS)]
+            if not members:
+                continue
+            if tier == 'easy':
+                weights = [ease[key] + self.FLOOR for key in members]
+            elif tier == 'hard':
+                weights = [1 - ease[key] + self.FLOOR for key in members]
+            else:
+                weights = [1] * len(members)
+            self.tiers[tier] = (members, AliasTable(weights))
+
+    def pick(self, tier, rng=random):
+        """Return a (year, team) from the tier, raising ValueError for an unknown tier."""
+        try:
+            members, table = self.tiers[tier]
+        except KeyError:
+            raise ValueError('Invalid difficulty!') from None
+        return members[table.sample(rng)]
@@ -0,0 +1,129 @@
+"""
+Baseball Position Guessing Game - Server-side game state stores
+"""
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class MemoryGameStore:
+    """In-process LRU of game state; the default, fine for a single worker.
+
+    Claims (see claim) are kept apart from the games, until they expire, so
+    they never push a game in progress out of the LRU.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._games = OrderedDict()
+        self._claims = OrderedDict()  # key -> expiry, oldest first
+        self._lock = threading.Lock()
+
+    def get(self, game_id):
+        with self._lock:
+            state = self._games.get(game_id)
+            if state is not None:
+                self._games.move_to_end(game_id)
+            return state
+
+    def set(self, game_id, state):
+        with self._lock:
+            self._games[game_id] = state
+            self._games.move_to_end(game_id)
+            while len(self._games) > self.maxsize:
+                self._games.popitem(last=False)
+
+    def delete(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+
+    def claim(self, key, max_age):
+        """Record a key for max_age seconds; True unless it is already recorded."""
+        now = time.time()
+        with self._lock:
+            while self._claims and next(iter(self._claims.values())) < now:
+                self._claims.popitem(last=False)
+            if self._claims.get(key, now) > now:
+                return False
+            self._claims[key] = now + max_age
+            self._claims.move_to_end(key)
+            return True
+
+    def __len__(self):
+        return len(self._games)
+
+
+class SQLiteGameStore:
+    """Game state in a local SQLite file, shared by every worker on the machine.
+
+    Each thread gets its own connection. Games untouched for max_age seconds
+    are purged every so often as new ones are written; claims live in a table
+    of their own and are purged once they expire.
+    """
+
+    PURGE_EVERY = 1000  # writes between purges
+
+    def __init__(self, path, max_age=24 * 60 * 60):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS games (id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, expires REAL NOT NULL)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            # Connections must not cross a fork, so each worker opens its own
+            connection = sqlite3.connect(self.path, timeout=5)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, game_id):
+        row = self._connect().execute('SELECT state FROM games WHERE id = ?', (game_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, game_id, state):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO games (id, state, updated) VALUES (?, ?, ?)',
+                               (game_id, json.dumps(state), now))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM games WHERE updated < ?', (now - self.max_age,))
+
+    def delete(self, game_id):
+        with self._connect() as connection:
+            connection.execute('DELETE FROM games WHERE id = ?', (game_id,))
+
+    def claim(self, key, max_age):
+        """Record a key for max_age seconds; True unless it is already recorded, by any worker."""
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('DELETE FROM claims WHERE key = ? AND expires < ?', (key, now))
+            claimed = connection.execute('INSERT OR IGNORE INTO claims (key, expires) VALUES (?, ?)',
+                                         (key, now + max_age)).rowcount == 1
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM claims WHERE expires < ?', (now,))
+        return claimed
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+
+def create_game_store(spec):
+    """Build a store from a GAME_STORE setting: 'memory[:maxsize]' or 'sqlite:path'."""
+    kind, _, argument = (spec or 'memory').partition(':')
+    if kind == 'memory':
+        return MemoryGameStore(int(argument) if argument else 10000)
+    if kind == 'sqlite':
+        return SQLiteGameStore(argument or 'games.sqlite3')
+    raise ValueError(f'Unknown game store: {spec!r}')
@@ -0,0 +1,69 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn runs from this directory.
+"""
+import gc
+import glob
+import os
+import shutil
+import tempfile
+
+# Load the dataset once in the master so workers share its pages copy-on-write
+preload_app = True
+
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 200))
+
+# Rooms are opt-in (ROOMS=on) because they live in one process's memory:
+# every request for a room has to reach the same worker, so with rooms on
+# exactly one runs, whatever WEB_CONCURRENCY says. Each client holding a
+# room's event stream open also keeps one of its threads asleep, so
+# ROOM_MAX_WATCHERS (default 150) must stay below GUNICORN_THREADS. Left
+# off, WEB_CONCURRENCY sets the number of workers as usual
+if os.environ.get('ROOMS', 'off') in ('1', 'true', 'on'):
+    workers = 1
+
+# Workers write their metrics here so /metrics can sum them; set before the app
+# is preloaded so the registry sees it. A directory made here is removed on exit
+metrics_tempdir = None
+if 'METRICS_DIR' not in os.environ:
+    metrics_tempdir = os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='startingnine-metrics-')
+
+
+def on_starting(server):
+    # Counts left by a previous run's workers would be added to this run's
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], 'metrics-*.json')):
+        os.remove(path)
+
+
+def when_ready(server):
+    # The app builds its indexes and bundles on first use; build them here in
+    # the master instead, so the workers share them rather than each paying
+    from app import app, game
+    game.warm(app.secret_key)
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach; otherwise the
+    # first collection in each worker writes to (and unshares) every page
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    # Runs in the master once a worker is gone: fold its metrics file into the
+    # exited workers' totals so scrapes don't read one file per dead worker
+    from app import metrics
+    metrics.retire(worker.pid)
+
+
+def on_exit(server):
+    if metrics_tempdir:
+        shutil.rmtree(metrics_tempdir, ignore_errors=True)
+
+
+def worker_exit(server, worker):
+    # A worker's last second of counts, and any game results still queued,
+    # would otherwise be lost
+    from app import metrics, results_store
+    metrics.flush()
+    if results_store:
+        results_store.flush()
@@ -0,0 +1,252 @@
+"""
+Baseball Position Guessing Game - Season data ingestion
+"""
+import csv
+import os
+import shutil
+
+import click
+
+from dataset import source_info
+
+# Column names of each accepted file layout: baseball_data.csv's own, and the
+# SampleData.csv export used by backup_data/game.py
+SCHEMAS = {
+    'baseball_data': {'year': 'year', 'team': 'team', 'position': 'position',
+                      'player_name': 'player_name', 'games_played': 'games_played'},
+    'sample_data': {'year': 'Year', 'team': 'Team', 'position': 'Pos',
+                    'player_name': 'Player', 'games_played': 'G'},
+}
+
+# Positions listed for bench players and pitchers besides the starting ones
+BENCH_POSITIONS = frozenset({'P', 'OF', 'IF', 'UT', 'MI', 'CI', ''})
+
+MAX_REPORTED_ERRORS = 50
+
+
+class IngestReport:
+    """Counts of what an ingest run read, added and turned away."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_added = 0
+        self.rows_rejected = 0
+        self.duplicates = 0
+        self.seasons_added = []
+        self.seasons_skipped = []  # Already in the data
+        self.seasons_rejected = []
+        self.errors = []
+
+    def error(self, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def summary(self):
+        return (f'{self.rows_read} rows read, {self.rows_added} added to {len(self.seasons_added)} new seasons; '
+                f'{len(self.seasons_skipped)} seasons already loaded, {len(self.seasons_rejected)} rejected, '
+                f'{self.rows_rejected} bad rows, {self.duplicates} duplicates')
+
+
+def _clean(value):
+    """Strip whitespace and stray quoting, e.g. ' "1B"' -> '1B'."""
+    return (value or '').strip().strip('"\'').strip()
+
+
+def read_rows(path, report, positions):
+    """Stream the valid rows of a season file in either schema, in the layout the game uses.
+
+    Rows with unparseable numbers or unknown position codes are reported and skipped.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        reader = csv.DictReader(file, skipinitialspace=True)
+        fieldnames = set(reader.fieldnames or ())
+        columns = next((schema for schema in SCHEMAS.values() if set(schema.values()) <= fieldnames), None)
+        if columns is None:
+            raise click.ClickException(f'{path}: unrecognized columns {sorted(fieldnames)}')
+
+        for row in reader:
+            report.rows_read += 1
+            try:
+                parsed = {
+                    'year': int(_clean(row[columns['year']])),
+                    'team': _clean(row[columns['team']]),
+                    'position': _clean(row[columns['position']]).upper(),
+                    'player_name': _clean(row[columns['player_name']]),
+                    'games_played': int(_clean(row[columns['games_played']]) or 0),
+                }
+            except (TypeError, ValueError):
+                report.rows_rejected += 1
+                report.error(f'{path}:{reader.line_num}: year and games played must be numbers')
+                continue
+            if parsed['position'] not in positions:
+                report.rows_rejected += 1
+                report.error(f'{path}:{reader.line_num}: unknown position {parsed["position"]!r}')
+                continue
+            if not parsed['team'] or not parsed['player_name']:
+                report.rows_rejected += 1
+                report.error(f'{path}:{reader.line_num}: missing team or player name')
+                continue
+            yield parsed
+
+
+def split_seasons(path, positions):
+    """The seasons whose rows are not all together in a file."""
+    finished = set()
+    split = set()
+    key = None
+    for row in read_rows(path, IngestReport(), positions):  # Row errors are reported on the real pass
+        row_key = (row['year'], row['team'])
+        if row_key != key:
+            finished.add(key)
+            key = row_key
+            if key in finished:
+                split.add(key)
+    return split
+
+
+def read_seasons(path, report, positions):
+    """Group a file's rows into seasons, yielding ((year, team), rows) one season at a time.
+
+    Files list each season's rows together, so only one season is held in
+    memory. A season whose rows are split up is rejected as a whole, so
+    finding those takes a first pass over the file that keeps only season
+    keys.
+    """
+    split = split_seasons(path, positions)
+    for key in sorted(split):
+        report.seasons_rejected.append(key)
+        report.error(f'{path}: rows for {key[0]} {key[1]} are split up; rejecting the season')
+    key, rows = None, []
+    for row in read_rows(path, report, positions):
+        row_key = (row['year'], row['team'])
+        if row_key in split:
+            report.rows_rejected += 1
+            continue
+        if row_key != key:
+            if rows:
+                yield key, rows
+            key, rows = row_key, []
+        rows.append(row)
+    if rows:
+        yield key, rows
+
+
+def _dedupe(rows, report):
+    seen = set()
+    unique = []
+    for row in rows:
+        key = (row['position'], row['player_name'])
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        unique.append(row)
+    return unique
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as file:
+        if file.seek(0, os.SEEK_END) == 0:
+            return True
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b'\n'
+
+
+def _csv_field(value):
+    if any(char in value for char in ',"\n\r'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def format_row(row):
+    """One line of baseball_data.csv, quoted the way the file already is ("1B", "2B", "3B")."""
+    position = row['position']
+    return ','.join((
+        str(row['year']),
+        _csv_field(row['team']),
+        f'"{position}"' if position[:1].isdigit() else _csv_field(position),
+        _csv_field(row['player_name']),
+        str(row['games_played']),
+    )) + '\n'
+
+
+def ingest_files(game, paths, dry_run=False):
+    """Validate season files and add their new seasons to the game's CSV, snapshot and indexes.
+
+    Seasons already in the data are skipped, duplicate rows dropped, and a
+    season is rejected if its first rows don't make a starting lineup. Rows
+    stream from the input into a copy of the CSV and straight into the
+    columnar dataset, so memory does not grow with the input; the snapshot
+    is written before the copy replaces the CSV, so workers reloading it find
+    a fresh snapshot and only compile the new seasons.
+    """
+    report = IngestReport()
+    state = game.state
+    positions = frozenset(game.POSITIONS) | BENCH_POSITIONS
+    seen = set(state.seasons)
+
+    def accepted_rows():
+        for path in paths:
+            for key, rows in read_seasons(path, report, positions):
+                if key in seen:
+                    report.seasons_skipped.append(key)
+                    continue
+                rows = _dedupe(rows, report)
+                try:
+                    game._compile_roster(rows[:9])
+                except ValueError as e:
+                    report.seasons_rejected.append(key)
+                    report.error(f'{key[0]} {key[1]}: {e}')
+                    continue
+                seen.add(key)
+                report.seasons_added.append(key)
+                report.rows_added += len(rows)
+                yield from rows
+
+    if dry_run:
+        for _ in accepted_rows():
+            pass
+        return report
+
+    temp_file = f'{game.csv_file}.{os.getpid()}.tmp'
+    try:
+        shutil.copyfile(game.csv_file, temp_file)
+        needs_newline = not _ends_with_newline(temp_file)
+        with open(temp_file, 'a', newline='', encoding='utf-8') as file:
+            if needs_newline:
+                file.write('\n')
+
+            def written():
+                for row in accepted_rows():
+                    file.write(format_row(row))
+                    yield row
+
+            dataset = state.dataset.extended(written())
+
+        if report.seasons_added:
+            if game.snapshot_file:
+                dataset.write_snapshot(game.snapshot_file, source_info(temp_file))
+            os.replace(temp_file, game.csv_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+    if report.seasons_added:
+        game.reload()
+    return report
+
+
+def init_ingest(app, game):
+    """Register `flask ingest`, which adds new seasons from CSV files to the game's data."""
+
+    @app.cli.command('ingest')
+    @click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+    @click.option('--dry-run', is_flag=True, help='Validate the files without changing any data.')
+    def ingest_command(paths, dry_run):
+        """Validate season files (baseball_data.csv or SampleData.csv layout) and add their new seasons."""
+        report = ingest_files(game, paths, dry_run=dry_run)
+        for message in report.errors:
+            click.echo(message, err=True)
+        for year, team in report.seasons_added:
+            click.echo(f'{"Valid" if dry_run else "Added"}: {year} {team}')
+        click.echo(report.summary())
@@ -0,0 +1,229 @@
+"""
+Baseball Position Guessing Game - Prometheus-style request metrics
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests handled, by route, method and status.'),
+    'http_request_errors_total': ('counter', 'Requests that failed with a 5xx or an unhandled exception.'),
+    'handled_exceptions_total': ('counter', 'Exceptions caught and recovered from inside a route.'),
+    'http_request_duration_seconds': ('histogram', 'Time spent handling a request, by route.'),
+    'stage_duration_seconds': ('histogram', 'Time spent in each stage of a route.'),
+}
+
+
+class _Stage:
+    """Context manager that records how long its block took into a histogram."""
+
+    __slots__ = ('registry', 'labels', 'started')
+
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe('stage_duration_seconds', time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Counters and latency histograms for one process.
+
+    With a shared directory (METRICS_DIR), each process periodically writes its
+    values to its own file there, and ``render`` sums every file, so whichever
+    gunicorn worker answers a scrape reports totals for all of them. When a
+    worker exits, ``retire`` folds its file into one file of exited workers'
+    totals, so counters never go backwards and files do not pile up.
+    """
+
+    def __init__(self, directory=None, prefix='startingnine_', flush_interval=1.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self._reset()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.flush)
+        # A forked worker starts counting from zero rather than inheriting the master's values
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._next_flush = time.monotonic() + self.flush_interval
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            buckets = histogram[0]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[index] += 1
+                    break
+            histogram[1] += seconds
+            histogram[2] += 1
+        self._maybe_flush()
+
+    def stage(self, route, stage):
+        """Time a block of code as one stage of a route: ``with metrics.stage('/', 'render'):``."""
+        return _Stage(self, {'route': route, 'stage': stage})
+
+    def snapshot(self):
+        """This process's values in a JSON-friendly form."""
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(buckets), total, count]
+                               for (name, labels), (buckets, total, count) in self._histograms.items()],
+            }
+
+    def _path(self):
+        return os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+
+    def _maybe_flush(self):
+        if self.directory and time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to the shared directory."""
+        if not self.directory:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        path = self._path()
+        temp_path = f'{path}.tmp'
+        with self._flush_lock:
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    json.dump(self.snapshot(), file)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning('Could not write metrics to %s: %s', self.directory, e)
+
+    def retire(self, pid):
+        """Fold an exited process's file into the exited workers' totals and remove it.
+
+        Called from gunicorn's child_exit hook in the master, the only process
+        writing the totals. A scrape landing between writing the totals and
+        removing the worker's file counts that worker twice, for that scrape.
+        """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'metrics-{pid}.json')
+        exited = os.path.join(self.directory, 'metrics-exited.json')
+        worker = _read(path)
+        if worker is None:
+            return
+        counters, histograms = _merge([snapshot for snapshot in (_read(exited), worker) if snapshot is not None])
+        totals = {
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), buckets, total, count]
+                           for (name, labels), (buckets, total, count) in histograms.items()],
+        }
+        temp_path = f'{exited}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(totals, file)
+            os.replace(temp_path, exited)
+            os.remove(path)
+        except OSError as e:
+            logger.warning('Could not fold the metrics of exited worker %s: %s', pid, e)
+
+    def _collect(self):
+        """Sum the values of every process sharing the directory (or just this one)."""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            own = self._path()
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                if path == own:
+                    continue
+                snapshot = _read(path)
+                if snapshot is not None:  # Otherwise being replaced right now; it will be there next scrape
+                    snapshots.append(snapshot)
+        return _merge(snapshots)
+
+    def render(self):
+        """Render the summed metrics in the Prometheus text exposition format."""
+        counters, histograms = self._collect()
+        lines = []
+        for name, (kind, description) in HELP.items():
+            series = counters if kind == 'counter' else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            full_name = self.prefix + name
+            lines.append(f'# HELP {full_name} {description}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            for key in keys:
+                labels = key[1]
+                if kind == 'counter':
+                    lines.append(f'{full_name}{_labels(labels)} {series[key]}')
+                    continue
+                buckets, total, count = series[key]
+                cumulative = 0
+                for bound, observed in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += observed
+                    lines.append(f'{full_name}_bucket{_labels(labels, le=bound)} {cumulative}')
+                lines.append(f'{full_name}_bucket{_labels(labels, le="+Inf")} {count}')
+                lines.append(f'{full_name}_sum{_labels(labels)} {total}')
+                lines.append(f'{full_name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(snapshots):
+    """Sum snapshots into {(name, labels): value} counters and {(name, labels): [buckets, sum, count]} histograms."""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            key = (name, tuple(tuple(label) for label in labels))
+            merged = histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
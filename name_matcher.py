@@ -0,0 +1,246 @@
+"""
+Baseball Position Guessing Game - Player name matching
+"""
+from difflib import SequenceMatcher
+from functools import lru_cache
+import re
+import unicodedata
+
+SUFFIXES = frozenset({'jr', 'sr', 'ii', 'iii', 'iv'})
+
+# First names that go by one another; a player listed under any of them can be guessed by the others
+NICKNAMES = (
+    ('albert', 'al'), ('alexander', 'alex'), ('alejandro', 'alex'), ('andrew', 'andy', 'drew'),
+    ('anthony', 'tony'), ('benjamin', 'ben'), ('cameron', 'cam'), ('charles', 'charlie', 'chuck'),
+    ('christopher', 'chris'), ('daniel', 'dan', 'danny'), ('david', 'dave'), ('donald', 'don', 'donnie'),
+    ('edward', 'ed', 'eddie'), ('francisco', 'frank', 'frankie'), ('frederick', 'fred', 'freddy'),
+    ('gabriel', 'gabe'), ('gregory', 'greg'), ('ignacio', 'nacho'), ('jacob', 'jake'),
+    ('james', 'jim', 'jimmy', 'jamie'), ('jeffrey', 'jeff'), ('jonathan', 'jon'), ('joseph', 'joe', 'joey'),
+    ('joshua', 'josh'), ('kenneth', 'ken', 'kenny'), ('lawrence', 'larry'), ('manuel', 'manny'),
+    ('matthew', 'matt'), ('maximilian', 'max'), ('michael', 'mike'), ('nathan', 'nathaniel', 'nate'),
+    ('nicholas', 'nick'), ('patrick', 'pat'), ('richard', 'rich', 'rick', 'ricky'),
+    ('robert', 'rob', 'robbie', 'bob', 'bobby'), ('ronald', 'ron', 'ronnie'), ('samuel', 'sam'),
+    ('stephen', 'steven', 'steve'), ('theodore', 'ted', 'teddy'), ('thomas', 'tom', 'tommy'),
+    ('timothy', 'tim'), ('vladimir', 'vlad'), ('william', 'will', 'bill', 'billy', 'willie'),
+    ('zachary', 'zach', 'zack'),
+)
+_NICKNAMES = {}
+for _group in NICKNAMES:
+    for _name in _group:
+        _NICKNAMES.setdefault(_name, set()).update(_group)
+
+_SOFT_C = re.compile(r'c(?=[eiy])')
+_LATER_Y = re.compile(r'(?<=.)y')
+_VOWEL_PAIRS = re.compile(r'ee|ea|ie|oo')
+_REPEATS = re.compile(r'(.)\1+')
+_SOUNDS = str.maketrans({'c': 'k', 'q': 'k', 'z': 's', 'x': 'k', 'v': 'f'})
+
+
+def name_key(name):
+    """A name lowercased with punctuation removed, the form exact matches are judged in."""
+    return re.sub(r"[^\w\s]", '', name.lower().strip())
+
+
+@lru_cache(maxsize=4096)
+def alias_key(name):
+    """A name with accents folded, punctuation dropped and initials run together: "A. J. Pollock" -> "aj pollock"."""
+    folded = unicodedata.normalize('NFKD', name.lower())
+    words = []
+    initials = False  # Whether the last word is made of single-letter words run together
+    for word in re.sub(r'[^a-z\s]', '', folded).split():
+        if len(word) == 1 and initials:
+            words[-1] += word
+        else:
+            words.append(word)
+            initials = len(word) == 1
+    return ' '.join(words)
+
+
+@lru_cache(maxsize=4096)
+def phonetic_key(name):
+    """A rough sound-alike key for a name in alias_key form, so "Yadeer Moleena" keys like "Yadier Molina".
+
+    Spellings of the same sound are merged (ph/f, c/k/q, soft c/s, z/s,
+    ee/ie/ea/i, oo/u), silent h dropped and doubled letters collapsed.
+    Vowels otherwise keep their identity, so "Tom" and "Tim" or "Kyle" and
+    "Cole" key apart.
+    """
+    words = []
+    for word in name.split():
+        word = _SOFT_C.sub('s', word.replace('ph', 'f').replace('ck', 'k')).translate(_SOUNDS)
+        word = word[:1] + word[1:].replace('h', '')
+        word = _VOWEL_PAIRS.sub(lambda pair: 'u' if pair.group() == 'oo' else 'i', _LATER_Y.sub('i', word))
+        words.append(_REPEATS.sub(r'\1', word))
+    return ' '.join(words)
+
+
+def aliases(name):
+    """Every alias_key form a player can be guessed by: as listed, without a suffix, and by nickname."""
+    words = alias_key(name).split()
+    forms = [words]
+    if len(words) > 2 and words[-1] in SUFFIXES:
+        forms.append(words[:-1])
+    found = set()
+    for form in forms:
+        for first in _NICKNAMES.get(form[0], (form[0],)) if form else ():
+            found.add(' '.join([first, *form[1:]]))
+    return found
+
+
+class NormalizedName:
+    """A player name in every form the matcher compares against, computed once."""
+
+    __slots__ = ('lower', 'bare', 'aliases', 'sounds', 'masks')
+
+    def __init__(self, name):
+        self.lower = name.lower().strip()
+        self.bare = name_key(name)
+        self.aliases = frozenset(aliases(name))
+        self.sounds = frozenset(phonetic_key(alias) for alias in self.aliases)
+        # Bit i of masks[c] is set when lower[i] == c; drives the bit-parallel LCS
+        masks = {}
+        for i, char in enumerate(self.lower):
+            masks[char] = masks.get(char, 0) | (1 << i)
+        self.masks = masks
+
+
+class NameMatcher:
+    """Decides whether a guess names a player: the original
+    ``SequenceMatcher(None, guess, actual).ratio() >= threshold`` check, plus
+    a table of aliases each player can also be guessed by.
+
+    Names are normalized once up front, aliases included. A guess is then
+    settled by the cheapest test that can decide it:
+
+    1. an exact match against the lowercased or punctuation-free name;
+    2. a lookup in the name's aliases (see ``aliases``: accents folded,
+       initials with or without periods, suffix dropped, nicknames), which
+       scores 1.0. A guess that is another known player's name, or one of
+       their aliases but none of this player's, is rejected outright however
+       alike the two names are ("Bobby Witt" is not "Bobby Witt Jr."). Then a
+       lookup in the phonetic keys of the aliases: a sound-alike is accepted
+       if its ``SequenceMatcher`` score is at least PHONETIC_FLOOR;
+    3. an upper bound on the Ratcliff/Obershelp score from the two lengths;
+    4. the longest common subsequence, computed bit-parallel over the actual
+       name's precomputed masks with an early exit once the threshold is out
+       of reach. Ratcliff/Obershelp never matches more characters than the
+       LCS, so anything the LCS rejects the original check rejects too;
+    5. only the few guesses that survive all of that are scored with
+       ``SequenceMatcher`` itself, which keeps the remaining accept/reject
+       decisions and similarities identical to the original.
+
+    For rejected guesses the similarity returned is the bound that rejected
+    them, an upper bound on the original score. Verdicts are remembered per
+    (guess, name) pair, up to MAX_DECISIONS of them.
+    """
+
+    PHONETIC_FLOOR = 0.6
+    MAX_DECISIONS = 65536  # (guess, name) verdicts remembered; the same few guesses come up again and again
+
+    def __init__(self, names=(), threshold=0.8):
+        self.threshold = threshold
+        self._decisions = {}
+        self.names = {}
+        self.listed = {}  # alias_key -> the known names written that way
+        self.owners = {}  # alias_key -> the known names with that alias
+        self._add(names)
+
+    def _add(self, names):
+        for name in names:
+            if name not in self.names:
+                normalized = self.names[name] = NormalizedName(name)
+                key = alias_key(name)
+                self.listed[key] = self.listed.get(key, frozenset()) | {name}
+                for alias in normalized.aliases:
+                    self.owners[alias] = self.owners.get(alias, frozenset()) | {name}
+
+    def at(self, threshold):
+        """A matcher with this one's names, sharing their normalized forms, at another threshold."""
+        matcher = type(self)(threshold=threshold)
+        matcher.names = self.names
+        matcher.listed = self.listed
+        matcher.owners = self.owners
+        return matcher
+
+    def extended(self, names):
+        """A matcher that also knows the given names, reusing everything this one already normalized."""
+        matcher = type(self)(threshold=self.threshold)
+        matcher.names = dict(self.names)
+        matcher.listed = dict(self.listed)
+        matcher.owners = dict(self.owners)
+        matcher._add(names)
+        return matcher
+
+    def normalized(self, name):
+        """Return the precomputed forms of a name, preparing unknown names on the fly."""
+        normalized = self.names.get(name)
+        if normalized is None:
+            normalized = _normalize(name)
+        return normalized
+
+    def match(self, guess, actual):
+        """Compare a guess with a player's name; returns (is_correct, similarity)."""
+        if not guess or not actual:
+            return False, 0
+
+        guess = guess.lower().strip()
+        key = (guess, actual)
+        decision = self._decisions.get(key)
+        if decision is None:
+            decision = self._decide(guess, actual)
+            if len(self._decisions) >= self.MAX_DECISIONS:
+                self._decisions = {}
+            self._decisions[key] = decision
+        return decision
+
+    def _decide(self, guess, name):
+        actual = self.normalized(name)
+
+        # Exact match
+        if guess == actual.lower or guess == actual.bare:
+            return True, 1.0
+
+        key = alias_key(guess)
+        others = self.listed.get(key, ()) or (() if key in actual.aliases else self.owners.get(key, ()))
+        if others and name not in others:
+            # Someone else's name, not a misspelling or nickname of this one
+            return False, 2.0 * min(len(guess), len(actual.lower)) / (len(guess) + len(actual.lower))
+        if key in actual.aliases:
+            return True, 1.0
+        if phonetic_key(key) in actual.sounds:
+            similarity = SequenceMatcher(None, guess, actual.lower).ratio()
+            if similarity >= self.PHONETIC_FLOOR:
+                return True, similarity
+
+        threshold = self.threshold
+        guess_length = len(guess)
+        actual_length = len(actual.lower)
+        total = guess_length + actual_length
+        if not total:
+            return False, 0.0
+
+        # No more characters can match than the shorter name holds
+        bound = 2.0 * min(guess_length, actual_length) / total
+        if bound < threshold:
+            return False, bound
+
+        # Bit-parallel LCS: the zero bits of row track the common subsequence so far
+        masks = actual.masks
+        full = (1 << actual_length) - 1
+        row = full
+        for position, char in enumerate(guess, 1):
+            matched = row & masks.get(char, 0)
+            row = ((row + matched) | (row - matched)) & full
+            common = actual_length - row.bit_count()
+            remaining = guess_length - position
+            bound = 2.0 * (common + min(remaining, actual_length - common)) / total
+            if bound < threshold:
+                return False, bound
+
+        similarity = SequenceMatcher(None, guess, actual.lower).ratio()
+        return similarity >= threshold, similarity
+
+
+@lru_cache(maxsize=1024)
+def _normalize(name):
+    return NormalizedName(name)
@@ -0,0 +1,73 @@
+"""
+Baseball Position Guessing Game - Rendered game pages
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+
+
+class CachedPage:
+    """One team-season's game page, rendered once, with the ETag it is served under."""
+
+    __slots__ = ('html', 'etag')
+
+    def __init__(self, html):
+        self.html = html
+        self.etag = hashlib.sha256(html.encode('utf-8')).hexdigest()[:16]
+
+
+class PageCache:
+    """The most recently used game pages, keyed by team-season and dataset version.
+
+    The game page depends only on the season, its positions and whether it has
+    a DH, never on the session, so each team-season is rendered once and the
+    same bytes are sent to everyone who plays it. At most max_pages are kept,
+    least recently used going first; a reload of the data empties the cache,
+    since the old pages can never be asked for again.
+    """
+
+    def __init__(self, game, render, max_pages=1000):
+        self.game = game
+        self.render = render  # (year, team, roster) -> page HTML
+        self.max_pages = max_pages
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def page(self, year, team, roster):
+        """The page for a team-season of the current data, rendering it on a miss."""
+        version = self.game.state.version
+        key = (year, team)
+        with self._lock:
+            if self.version != version:
+                self._pages.clear()
+                self.version = version
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return page
+            self.misses += 1
+
+        # Rendered outside the lock; two threads missing on one season both render it
+        page = CachedPage(self.render(year, team, roster))
+        with self._lock:
+            if self.version == version:
+                self._pages[key] = page
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+        return page
+
+    def warm(self):
+        """Render every season of the current data, up to max_pages of them; returns how many."""
+        state = self.game.state
+        seasons = sorted(state.rosters)[:self.max_pages]
+        for year, team in seasons:
+            self.page(year, team, dict(state.rosters[(year, team)]))
+        return len(seasons)
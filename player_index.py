@@ -0,0 +1,103 @@
+"""
+Baseball Position Guessing Game - Player name typeahead index
+"""
+from collections import defaultdict
+
+
+class PlayerIndex:
+    """Prefix index over every distinct player name, for autocomplete.
+
+    Names are stored in the form ``normalize`` gives them (the game's
+    sanitize_input), so a suggestion typed back in is a valid guess. Every
+    word of a name is indexed, so "tro" finds "Mike Trout" as well as
+    "Troy Tulowitzki". Suggestions are ranked by career games played.
+
+    Players are bucketed under every prefix of up to PREFIX_DEPTH characters
+    of each word key, in rank order, so a query walks one short list and
+    stops as soon as it has enough matches.
+    """
+
+    PREFIX_DEPTH = 3  # Prefixes up to this long get their own bucket
+
+    def __init__(self, dataset, normalize):
+        self.normalize = normalize
+        names = []
+        ids = {}  # Normalized name -> player
+        raw_ids = {}  # Name as in the data -> player
+        games = []
+        by_year = defaultdict(set)
+        by_position = defaultdict(set)
+        by_year_position = defaultdict(set)
+
+        for index in range(len(dataset)):
+            name = dataset.players[dataset.player_ids[index]]
+            player = raw_ids.get(name)
+            if player is None:
+                normalized = normalize(name)
+                player = ids.get(normalized)
+                if player is None:
+                    player = ids[normalized] = len(names)
+                    names.append(normalized)
+                    games.append(0)
+                raw_ids[name] = player
+            year = dataset.years[index]
+            position = dataset.positions[dataset.position_ids[index]]
+            games[player] += dataset.games_played[index]
+            by_year[year].add(player)
+            by_position[position].add(player)
+            by_year_position[(year, position)].add(player)
+
+        # Renumber players by rank, so ascending id order is suggestion order
+        ranked = sorted(range(len(names)), key=lambda player: (-games[player], names[player]))
+        rank = {player: order for order, player in enumerate(ranked)}
+        self.names = [names[player] for player in ranked]
+        self.games = [games[player] for player in ranked]
+        self.by_year = {year: {rank[player] for player in players} for year, players in by_year.items()}
+        self.by_position = {position: {rank[player] for player in players}
+                            for position, players in by_position.items()}
+        self.by_year_position = {key: {rank[player] for player in players}
+                                 for key, players in by_year_position.items()}
+
+        # Each name is searchable from the start of every word in it
+        self.words = []
+        buckets = defaultdict(set)
+        for player, name in enumerate(self.names):
+            words = name.lower().split(' ')
+            keys = tuple(' '.join(words[start:]) for start in range(len(words)))
+            self.words.append(keys)
+            for key in keys:
+                for length in range(1, min(len(key), self.PREFIX_DEPTH) + 1):
+                    buckets[key[:length]].add(player)
+        self.buckets = {prefix: sorted(players) for prefix, players in buckets.items()}
+
+    def suggest(self, query, year=None, position=None, limit=10):
+        """Return up to limit player names with a word starting with the query, best known first."""
+        prefix = self.normalize(query).lower()
+        if not prefix:
+            return []
+
+        candidates = self.buckets.get(prefix[:self.PREFIX_DEPTH], [])
+        if year is not None and position:
+            allowed = self.by_year_position.get((year, position), set())
+        elif year is not None:
+            allowed = self.by_year.get(year, set())
+        elif position:
+            allowed = self.by_position.get(position, set())
+        else:
+            allowed = None
+        # Bucket members only share the first PREFIX_DEPTH characters
+        check_words = len(prefix) > self.PREFIX_DEPTH
+        if allowed is not None and len(allowed) < len(candidates):
+            # Cheaper to walk the filter and check the prefix on each
+            candidates, allowed, check_words = sorted(allowed), None, True
+
+        found = []
+        for player in candidates:
+            if allowed is not None and player not in allowed:
+                continue
+            if check_words and not any(key.startswith(prefix) for key in self.words[player]):
+                continue
+            found.append(self.names[player])
+            if len(found) == limit:
+                break
+        return found
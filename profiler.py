@@ -0,0 +1,183 @@
+"""
+Baseball Position Guessing Game - Sampling request profiler
+"""
+import cProfile
+import glob
+import hmac
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+from flask import abort, g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+RATE_FILE = 'sample_rate'  # Inside the profile directory; overrides PROFILE_SAMPLE_RATE
+
+
+class RequestProfiler:
+    """Profile a random fraction of requests with cProfile, one .prof file per request.
+
+    The sample rate starts at PROFILE_SAMPLE_RATE and can be changed at run
+    time through the admin route, which writes it to a file in the profile
+    directory so every worker picks it up within RATE_CHECK_INTERVAL seconds.
+    With a rate of 0, each request costs a comparison and a clock read.
+    """
+
+    RATE_CHECK_INTERVAL = 5.0  # seconds between looks at the rate file
+
+    def __init__(self, directory, rate=0.0, max_samples=1000):
+        self.directory = directory
+        self.default_rate = rate
+        self.rate = rate
+        self.max_samples = max_samples
+        self._rate_mtime = None
+        self._next_rate_check = 0.0
+        # cProfile can only run one profile at a time, so concurrent requests are not sampled
+        self._active = threading.Lock()
+        self._refresh_rate()
+
+    def _rate_path(self):
+        return os.path.join(self.directory, RATE_FILE)
+
+    def _refresh_rate(self):
+        """Pick up a rate set through the admin route, by this worker or another one."""
+        self._next_rate_check = time.monotonic() + self.RATE_CHECK_INTERVAL
+        try:
+            mtime = os.stat(self._rate_path()).st_mtime_ns
+        except OSError:
+            self._rate_mtime = None
+            self.rate = self.default_rate
+            return
+        if mtime != self._rate_mtime:
+            try:
+                with open(self._rate_path(), encoding='utf-8') as file:
+                    self.rate = float(file.read())
+                self._rate_mtime = mtime
+            except (OSError, ValueError) as e:
+                logger.warning('Ignoring unreadable profiler sample rate: %s', e)
+
+    def set_rate(self, rate):
+        """Change the sample rate for every worker; None goes back to PROFILE_SAMPLE_RATE."""
+        if rate is None:
+            try:
+                os.remove(self._rate_path())
+            except FileNotFoundError:
+                pass
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f'{self._rate_path()}.{os.getpid()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(repr(float(rate)))
+            os.replace(temp_path, self._rate_path())
+        self._refresh_rate()
+
+    def start(self):
+        """Start profiling this request if it is sampled; returns the profile or None."""
+        if time.monotonic() >= self._next_rate_check:
+            self._refresh_rate()
+        if not self.rate or random.random() >= self.rate:
+            return None
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Some other profiler is already running
+            self._active.release()
+            return None
+        return profile
+
+    def stop(self, profile, label):
+        """Stop a profile from start() and write it out under the given label."""
+        profile.disable()
+        self._active.release()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if len(self.sample_files()) >= self.max_samples:
+                return None
+            safe_label = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'root'
+            path = os.path.join(self.directory, f'{time.time():.6f}-{os.getpid()}-{safe_label}.prof')
+            profile.dump_stats(path)
+            return path
+        except OSError as e:
+            logger.warning('Could not write request profile: %s', e)
+            return None
+
+    def sample_files(self):
+        return sorted(glob.glob(os.path.join(self.directory, '*.prof')))
+
+    def summary(self, limit=20):
+        """The functions with the most own time, summed over every sample written so far."""
+        files = self.sample_files()
+        if not files:
+            return {'samples': 0, 'functions': []}
+        stats = pstats.Stats(*files)
+        rows = []
+        for (filename, line, name), (_, calls, own_time, total_time, _) in stats.stats.items():
+            rows.append({
+                'function': f'{os.path.basename(filename)}:{line}({name})' if line else name,
+                'calls': calls,
+                'own_seconds': round(own_time, 6),
+                'total_seconds': round(total_time, 6),
+            })
+        rows.sort(key=lambda row: row['own_seconds'], reverse=True)
+        return {'samples': len(files), 'total_seconds': round(stats.total_tt, 6), 'functions': rows[:limit]}
+
+
+def init_profiler(app):
+    """Sample requests with cProfile and expose the sample rate and a summary at /admin/profiler.
+
+    Register this before any other request hook, so the profile covers them.
+    The admin route answers only when ADMIN_TOKEN is set and the request sends
+    it as a bearer token.
+    """
+    profiler = RequestProfiler(
+        os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'),
+        rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)))
+    admin_token = os.environ.get('ADMIN_TOKEN')
+
+    @app.before_request
+    def start_profile():
+        profile = profiler.start()
+        if profile is not None:
+            g.profile = profile
+
+    @app.teardown_request
+    def stop_profile(exc):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            rule = request.url_rule.rule if request.url_rule else 'unmatched'
+            profiler.stop(profile, f'{request.method} {rule}')
+
+    @app.route('/admin/profiler', methods=['GET', 'POST'])
+    def profiler_admin():
+        """Report the sample rate and hottest functions; POST {"rate": 0.01} (or null) to change it."""
+        sent = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not admin_token or not hmac.compare_digest(sent.encode('utf-8'), admin_token.encode('utf-8')):
+            abort(404)
+        if request.method == 'POST':
+            payload = request.get_json(silent=True)
+            rate = payload.get('rate') if isinstance(payload, dict) else 'missing'
+            if rate is not None and (isinstance(rate, bool) or not isinstance(rate, (int, float))
+                                     or not 0 <= rate <= 1):
+                return jsonify({'error': 'Expected a JSON object with a rate between 0 and 1, or null'}), 400
+            profiler.set_rate(rate)
+        summary = profiler.summary(limit=max(1, min(request.args.get('limit', 20, type=int), 200)))
+        response = jsonify(dict(summary, rate=profiler.rate, directory=profiler.directory))
+        response.cache_control.no_store = True
+        return response
+
+    @app.cli.command('profile-summary')
+    def profile_summary_command():
+        """Print the hottest functions across all request profiles."""
+        summary = profiler.summary()
+        print(f"{summary['samples']} sampled requests")
+        for row in summary['functions']:
+            print(f"{row['own_seconds']:10.6f} {row['total_seconds']:10.6f} {row['calls']:8d}  {row['function']}")
+
+    return profiler
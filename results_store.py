@@ -0,0 +1,205 @@
+"""
+Baseball Position Guessing Game - Write-behind store of finished games
+"""
+import atexit
+from contextlib import closing
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY,
+        played REAL NOT NULL,
+        mode TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        team TEXT NOT NULL,
+        guessed TEXT NOT NULL,
+        correct TEXT NOT NULL)''',
+    '''CREATE TABLE IF NOT EXISTS season_stats (
+        year INTEGER NOT NULL,
+        team TEXT NOT NULL,
+        games INTEGER NOT NULL,
+        guesses INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        PRIMARY KEY (year, team))''',
+    '''CREATE TABLE IF NOT EXISTS position_stats (
+        position TEXT PRIMARY KEY,
+        guesses INTEGER NOT NULL,
+        correct INTEGER NOT NULL)''',
+)
+
+
+class SeasonStats:
+    """Rolled-up results for one team-season or one position."""
+
+    __slots__ = ('games', 'guesses', 'correct')
+
+    def __init__(self, games, guesses, correct):
+        self.games = games
+        self.guesses = guesses
+        self.correct = correct
+
+    @property
+    def accuracy(self):
+        """Share of guesses that were right, or None before any were made."""
+        return self.correct / self.guesses if self.guesses else None
+
+
+class ResultsStore:
+    """Finished games, written to SQLite by a background thread.
+
+    record() only appends to a bounded queue, so a request never waits on the
+    disk; when the queue is full the game is dropped and counted in
+    ``dropped``. The writer commits whatever has queued up in one transaction,
+    updating the per-season and per-position rollups as it goes. Rollups are
+    read back into dicts every REFRESH_INTERVAL seconds, picking up other
+    workers' games too, so season_stats() and position_stats() are dict
+    lookups. Only the writer keeps a connection open; anything else opens
+    one and closes it, so none is ever carried across a fork.
+    """
+
+    BATCH_SIZE = 500
+    REFRESH_INTERVAL = 30.0  # seconds between rereads of the rollup tables
+
+    def __init__(self, path, max_queue=10000):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(max_queue)
+        self._writer = None
+        self._writer_pid = None
+        self._start_lock = threading.Lock()
+        self._next_refresh = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+        self.seasons = {}
+        self.positions = {}
+        self.refresh()
+        atexit.register(self.flush)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, mode, year, team, results):
+        """Queue one finished game, given the results dict from evaluate_guesses."""
+        guessed = ','.join(position for position, result in results.items() if result['guess'])
+        correct = ','.join(position for position, result in results.items() if result['correct'])
+        try:
+            self._queue.put_nowait((time.time(), mode, year, team, guessed, correct))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self._ensure_writer()
+        return True
+
+    def _ensure_writer(self):
+        # Threads do not survive a fork, so each worker starts its own writer
+        if self._writer_pid == os.getpid() and self._writer.is_alive():
+            return
+        with self._start_lock:
+            if self._writer_pid != os.getpid() or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name='results-writer', daemon=True)
+                self._writer_pid = os.getpid()
+                self._writer.start()
+
+    def _run(self):
+        connection = self._connect()
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.REFRESH_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(connection, batch)
+                except sqlite3.Error as e:
+                    logger.warning('Could not save %d game results: %s', len(batch), e)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+            if time.monotonic() >= self._next_refresh:
+                try:
+                    self.refresh(connection)
+                except sqlite3.Error as e:
+                    logger.warning('Could not reread result rollups: %s', e)
+
+    def _write(self, connection, batch):
+        seasons = {}
+        positions = {}
+        for _, _, year, team, guessed, correct in batch:
+            guessed_positions = guessed.split(',') if guessed else []
+            correct_positions = correct.split(',') if correct else []
+            games, guesses, right = seasons.get((year, team), (0, 0, 0))
+            seasons[(year, team)] = (games + 1, guesses + len(guessed_positions), right + len(correct_positions))
+            for position in guessed_positions:
+                guesses, right = positions.get(position, (0, 0))
+                positions[position] = (guesses + 1, right + (position in correct_positions))
+
+        with connection:
+            connection.executemany(
+                'INSERT INTO results (played, mode, year, team, guessed, correct) VALUES (?, ?, ?, ?, ?, ?)', batch)
+            connection.executemany(
+                '''INSERT INTO season_stats (year, team, games, guesses, correct) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (year, team) DO UPDATE SET games = games + excluded.games,
+                   guesses = guesses + excluded.guesses, correct = correct + excluded.correct''',
+                [(year, team, *totals) for (year, team), totals in seasons.items()])
+            connection.executemany(
+                '''INSERT INTO position_stats (position, guesses, correct) VALUES (?, ?, ?)
+                   ON CONFLICT (position) DO UPDATE SET guesses = guesses + excluded.guesses,
+                   correct = correct + excluded.correct''',
+                [(position, *totals) for position, totals in positions.items()])
+
+    def refresh(self, connection=None):
+        """Reread the rollup tables, swapping in fresh dicts."""
+        if connection is None:
+            with closing(self._connect()) as connection:
+                return self.refresh(connection)
+        self._next_refresh = time.monotonic() + self.REFRESH_INTERVAL
+        self.seasons = {(year, team): SeasonStats(games, guesses, correct) for year, team, games, guesses, correct
+                        in connection.execute('SELECT year, team, games, guesses, correct FROM season_stats')}
+        self.positions = {position: SeasonStats(None, guesses, correct) for position, guesses, correct
+                          in connection.execute('SELECT position, guesses, correct FROM position_stats')}
+
+    def season_stats(self, year, team):
+        """Rolled-up results for a team-season, or None if nobody has played it."""
+        self._refresh_if_stale()
+        return self.seasons.get((year, team))
+
+    def position_stats(self, position):
+        """Rolled-up results for a position over every season, or None."""
+        self._refresh_if_stale()
+        return self.positions.get(position)
+
+    def _refresh_if_stale(self):
+        # The writer rereads the rollups when it runs; a worker that has not
+        # recorded a game yet has no writer, so reads refresh them instead
+        if time.monotonic() < self._next_refresh or (
+                self._writer_pid == os.getpid() and self._writer.is_alive()):
+            return
+        try:
+            self.refresh()
+        except sqlite3.Error as e:
+            self._next_refresh = time.monotonic() + self.REFRESH_INTERVAL
+            logger.warning('Could not reread result rollups: %s', e)
+
+    def flush(self, timeout=5.0):
+        """Wait (up to timeout seconds) for queued games to be written; True if they all were."""
+        if self._writer is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+            return self._queue.empty()
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
@@ -0,0 +1,224 @@
+"""
+Baseball Position Guessing Game - Head-to-head rooms with live scores
+"""
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RoomFull(Exception):
+    """Raised when a room, or this process, cannot take another player or watcher."""
+
+
+class NameTaken(Exception):
+    """Raised when someone else already plays in a room under the name asked for."""
+
+
+class Room:
+    """Several players racing on one team-season."""
+
+    __slots__ = ('id', 'year', 'team', 'lenient', 'created', 'touched', 'players', 'tokens', 'watchers')
+
+    def __init__(self, room_id, year, team, lenient):
+        self.id = room_id
+        self.year = year
+        self.team = team
+        self.lenient = lenient
+        self.created = self.touched = time.time()
+        self.players = {}  # Name -> None until they submit, then their score
+        self.tokens = {}  # Name -> the secret its player was given on joining
+        self.watchers = set()
+
+    def standings(self):
+        """Players who have submitted, best first (ties go to whoever finished first), then the rest."""
+        finished = sorted((score for score in self.players.values() if score),
+                          key=lambda score: (-score['correct_count'], score['submitted']))
+        waiting = sorted(name for name, score in self.players.items() if not score)
+        return {'finished': finished, 'waiting': waiting}
+
+    def describe(self):
+        return {'room': self.id, 'year': self.year, 'team': self.team, 'lenient': self.lenient,
+                'standings': self.standings()}
+
+
+class Watcher:
+    """One open event stream: its messages arrive on a queue filled by the broadcaster thread."""
+
+    def __init__(self, hub, room):
+        self.hub = hub
+        self.room = room
+        self.queue = queue.SimpleQueue()
+
+    def __iter__(self):
+        """Yield server-sent event messages until the client goes away."""
+        try:
+            yield self.hub.message(self.room, 'state', self.hub.describe(self.room))
+            while True:
+                yield self.queue.get()
+        finally:
+            self.hub.unwatch(self)
+
+
+class RoomHub:
+    """Rooms and the event streams watching them, all in this process.
+
+    Nothing about a room is shared between processes, so every request for a
+    room must reach the same one: rooms are off unless ROOMS=on, and
+    gunicorn.conf.py then runs a single worker with threads. Each open stream holds one of that worker's
+    threads, sleeping on its own queue, for as long as the client stays
+    connected, so max_watchers must stay below the thread count to leave
+    threads for everything else. A single broadcaster thread does all the
+    fan-out, copying each event to every watcher of its room and sending
+    heartbeats so dead connections are noticed; publishing an event only
+    queues it once.
+    """
+
+    HEARTBEAT = 15.0  # seconds between keep-alive comments on idle streams
+    ROOM_TTL = 3 * 60 * 60  # seconds a room without watchers lives after its last activity
+    MAX_PLAYERS = 50
+
+    def __init__(self, max_rooms=1000, max_watchers=150):
+        self.max_rooms = max_rooms
+        self.max_watchers = max_watchers
+        self.rooms = {}
+        self.watchers = 0
+        self._lock = threading.Lock()
+        self._events = queue.SimpleQueue()
+        self._broadcaster = None
+        self._broadcaster_pid = None
+
+    def create(self, year, team, lenient=False):
+        with self._lock:
+            if len(self.rooms) >= self.max_rooms:
+                self._expire()
+                if len(self.rooms) >= self.max_rooms:
+                    raise RoomFull('Too many open rooms')
+            room = Room(secrets.token_urlsafe(6), year, team, lenient)
+            self.rooms[room.id] = room
+        return room
+
+    def get(self, room_id):
+        return self.rooms.get(room_id)
+
+    def join(self, room, name, token=None):
+        """Add a player to a room and return the token that proves they are that player.
+
+        Rejoining with the token already given for a name is a no-op; anyone
+        else asking for a taken name gets NameTaken.
+        """
+        with self._lock:
+            if name in room.players:
+                if token is None or not secrets.compare_digest(token, room.tokens[name]):
+                    raise NameTaken(f'Someone is already playing as {name}')
+                return token
+            if len(room.players) >= self.MAX_PLAYERS:
+                raise RoomFull('This room is full')
+            room.players[name] = None
+            token = room.tokens[name] = secrets.token_urlsafe(16)
+            standings = room.standings()
+        self.publish(room, 'join', {'name': name, 'standings': standings})
+        return token
+
+    def is_player(self, room, name, token):
+        """Whether token is the one given to whoever joined the room as name."""
+        expected = room.tokens.get(name)
+        return expected is not None and secrets.compare_digest(token, expected)
+
+    def submit(self, room, name, correct_count, num_players, percentage):
+        """Record a player's score and push the new standings to everyone watching.
+
+        Returns False if the player had already submitted, in which case nothing changes.
+        """
+        with self._lock:
+            if room.players.get(name):
+                return False
+            room.players[name] = {'name': name, 'correct_count': correct_count, 'num_players': num_players,
+                                  'percentage': round(percentage, 1), 'submitted': time.time()}
+            standings = room.standings()
+        self.publish(room, 'score', {'name': name, 'correct_count': correct_count, 'standings': standings})
+        return True
+
+    def describe(self, room):
+        """A room's season and standings, read consistently with joins and submits."""
+        with self._lock:
+            return room.describe()
+
+    def message(self, room, event, data):
+        """A server-sent event for a room.
+
+        Events carry no ids: a reconnecting client is sent the room's whole
+        state again, so there is nothing to replay.
+        """
+        room.touched = time.time()
+        return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+    def publish(self, room, event, data):
+        self._events.put((room, self.message(room, event, data)))
+        self._ensure_broadcaster()
+
+    def watch(self, room):
+        """Open an event stream on a room, raising RoomFull if this process has too many open."""
+        with self._lock:
+            if self.watchers >= self.max_watchers:
+                raise RoomFull('Too many open event streams')
+            watcher = Watcher(self, room)
+            room.watchers.add(watcher)
+            self.watchers += 1
+        self._ensure_broadcaster()
+        return watcher
+
+    def unwatch(self, watcher):
+        with self._lock:
+            if watcher in watcher.room.watchers:
+                watcher.room.watchers.discard(watcher)
+                self.watchers -= 1
+
+    def _ensure_broadcaster(self):
+        # Threads do not survive a fork, so each worker starts its own broadcaster
+        if self._broadcaster_pid == os.getpid() and self._broadcaster.is_alive():
+            return
+        with self._lock:
+            if self._broadcaster_pid != os.getpid() or not self._broadcaster.is_alive():
+                self._broadcaster = threading.Thread(target=self._run, name='room-broadcaster', daemon=True)
+                self._broadcaster_pid = os.getpid()
+                self._broadcaster.start()
+
+    def _run(self):
+        next_heartbeat = time.monotonic() + self.HEARTBEAT
+        while True:
+            try:
+                room, message = self._events.get(timeout=max(0.0, next_heartbeat - time.monotonic()))
+            except queue.Empty:
+                pass
+            else:
+                with self._lock:
+                    watchers = list(room.watchers)
+                for watcher in watchers:
+                    watcher.queue.put(message)
+            if time.monotonic() >= next_heartbeat:
+                next_heartbeat = time.monotonic() + self.HEARTBEAT
+                try:
+                    self._heartbeat()
+                except Exception:
+                    logger.exception('Room heartbeat failed')
+
+    def _heartbeat(self):
+        # A comment line; writing it is how a stream finds out its client has gone
+        with self._lock:
+            watchers = [watcher for room in self.rooms.values() for watcher in room.watchers]
+            self._expire()
+        for watcher in watchers:
+            watcher.queue.put(': heartbeat\n\n')
+
+    def _expire(self):
+        """Drop rooms nobody is watching that have been idle for ROOM_TTL; the lock must be held."""
+        cutoff = time.time() - self.ROOM_TTL
+        for room_id in [room_id for room_id, room in self.rooms.items()
+                        if not room.watchers and room.touched < cutoff]:
+            del self.rooms[room_id]
@@ -4,6 +4,9 @@
 
 class BaseballGame {
     constructor() {
+        this.currentGame = null;    // set while playing a game from a prefetched bundle
+        this.upcomingGames = [];
+        this.pendingResults = [];   // bundled games not yet verified by the server
         this.init();
     }
 
@@ -12,6 +15,8 @@ class BaseballGame {
         this.setupInputValidation();
         this.setupAccessibility();
         this.setupResponsivePlaceholders();
+        this.setupTypeahead();
+        this.setupPrefetch();
     }
 
     bindEvents() {
@@ -21,6 +26,12 @@ class BaseballGame {
             submitButton.addEventListener('click', () => this.submitGuesses());
         }
 
+        // Next game button starts a prefetched game in place
+        const nextButton = document.getElementById('nextGame');
+        if (nextButton) {
+            nextButton.addEventListener('click', () => this.startBundledGame());
+        }
+
         // New game button event
         // const newGameButton = document.getElementById('newGame');
         // if (newGameButton) {
@@ -29,7 +40,7 @@ class BaseballGame {
 
         // Enter key submission
         document.addEventListener('keydown', (e) => {
-            if (e.key === 'Enter' && !this.isSubmitting) {
+            if (e.key === 'Enter' && !this.isSubmitting && !submitButton?.disabled) {
                 e.preventDefault();
                 this.submitGuesses();
             }
@@ -133,6 +144,46 @@ class BaseballGame {
         }
     }
 
+    // Suggest player names as the user types, so fewer guesses are lost to misspellings
+    setupTypeahead() {
+        const inputFields = document.querySelectorAll('.position-field');
+
+        inputFields.forEach(field => {
+            const list = document.createElement('datalist');
+            list.id = `${field.id}-suggestions`;
+            field.parentNode.appendChild(list);
+            field.setAttribute('list', list.id);
+
+            let timer = null;
+            field.addEventListener('input', () => {
+                clearTimeout(timer);
+                const query = this.sanitizeInput(field.value);
+                if (query.length < 2) {
+                    list.innerHTML = '';
+                    return;
+                }
+                timer = setTimeout(() => this.fetchSuggestions(query, list), 150);
+            });
+        });
+    }
+
+    async fetchSuggestions(query, list) {
+        try {
+            const response = await fetch(`/api/players/suggest?q=${encodeURIComponent(query)}`);
+            if (!response.ok) return;
+
+            const data = await response.json();
+            list.innerHTML = '';
+            data.suggestions.forEach(name => {
+                const option = document.createElement('option');
+                option.value = name;
+                list.appendChild(option);
+            });
+        } catch (error) {
+            // Suggestions are a convenience; typing still works without them
+        }
+    }
+
     validateInput(field) {
         const value = field.value;
         const sanitized = this.sanitizeInput(value);
@@ -171,6 +222,132 @@ class BaseballGame {
         return sanitized;
     }
 
+    // Fetch the next few games ahead of time, so starting one needs no page load
+    setupPrefetch() {
+        const bundleUrl = document.body.dataset.bundleUrl;
+        if (!bundleUrl || !window.crypto || !window.crypto.subtle) return;
+
+        // Games played from a bundle are verified in batches; send any left over when leaving
+        window.addEventListener('pagehide', () => {
+            if (this.pendingResults.length) {
+                navigator.sendBeacon('/api/games/verify', new Blob(
+                    [JSON.stringify({ games: this.pendingResults })], { type: 'application/json' }));
+                this.pendingResults = [];
+            }
+        });
+        this.prefetchGames();
+    }
+
+    async prefetchGames() {
+        if (this.isPrefetching) return;
+        this.isPrefetching = true;
+        try {
+            // Next games keep the difficulty and lenient choices of this one
+            const current = new URLSearchParams(window.location.search);
+            const params = new URLSearchParams({ count: '5' });
+            for (const name of ['difficulty', 'lenient']) {
+                if (current.get(name)) params.set(name, current.get(name));
+            }
+            const response = await fetch(`${document.body.dataset.bundleUrl}?${params}`);
+            if (!response.ok) return;
+            const data = await response.json();
+            this.upcomingGames.push(...data.games);
+        } catch (error) {
+            // Prefetching is an optimization; New Game still loads a fresh page
+        } finally {
+            this.isPrefetching = false;
+        }
+    }
+
+    startBundledGame() {
+        const next = this.upcomingGames.shift();
+        if (!next) {
+            this.startNewGame();
+            return;
+        }
+        this.currentGame = next;
+        if (this.upcomingGames.length < 2) this.prefetchGames();
+
+        document.querySelector('.game-info h1 b').textContent = `${next.year} ${next.team}`;
+        document.querySelector('.dh-pos').hidden = !next.dh;
+        document.querySelectorAll('.position-field').forEach(field => {
+            field.value = '';
+            field.disabled = false;
+            field.classList.remove('correct', 'incorrect', 'is-valid', 'is-invalid');
+            const label = field.previousElementSibling;
+            if (label && label.classList.contains('position-label')) {
+                field.setAttribute('aria-label', `Enter player name for ${label.textContent}`);
+            }
+        });
+        document.getElementById('resultsSection').style.display = 'none';
+        document.getElementById('nextGame').style.display = 'none';
+        document.getElementById('newGame').style.display = 'none';
+        document.getElementById('submitGuesses').style.display = '';
+        window.scrollTo({ top: 0, behavior: 'smooth' });
+    }
+
+    // Same form as key_form() in bundles.py: no accents, lowercase letters and single spaces
+    keyForm(name) {
+        return name.normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+            .replace(/[^a-z ]/g, '').replace(/\s+/g, ' ').trim();
+    }
+
+    async answerHash(salt, name) {
+        const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(salt + this.keyForm(name)));
+        const hex = Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+        return hex.slice(0, 12);
+    }
+
+    // Score a prefetched game right away (exact answers only), then let the server have the final say
+    async submitBundledGame(guesses) {
+        const played = this.currentGame;
+        const results = {};
+        let correctCount = 0;
+        for (const [position, hashes] of Object.entries(played.key)) {
+            const guess = guesses[position] || '';
+            const correct = guess !== '' && hashes.includes(await this.answerHash(played.salt, guess));
+            if (correct) correctCount += 1;
+            results[position] = {
+                guess: guess,
+                actual: 'Checking...',
+                correct: correct,
+                message: correct ? 'Correct!' : (guess ? 'Checking...' : 'No guess made')
+            };
+        }
+        const numPlayers = Object.keys(played.key).length;
+        this.displayResults({
+            results: results,
+            correct_count: correctCount,
+            num_players: numPlayers,
+            percentage: Math.round(correctCount / numPlayers * 1000) / 10
+        });
+
+        this.pendingResults.push({ token: played.token, guesses: guesses });
+        const verified = await this.verifyResults();
+        const final = verified.find(game => game.token === played.token);
+        if (final && !final.error && this.currentGame === played) {
+            this.displayResults(final);
+        }
+    }
+
+    async verifyResults() {
+        const sending = this.pendingResults;
+        this.pendingResults = [];
+        try {
+            const response = await fetch('/api/games/verify', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ games: sending })
+            });
+            if (!response.ok) throw new Error(`Server error: ${response.status}`);
+            return (await response.json()).games;
+        } catch (error) {
+            // Try again with the next game (or when the page is left)
+            this.pendingResults.unshift(...sending);
+            return [];
+        }
+    }
+
     async submitGuesses() {
         if (this.isSubmitting) return;
         
@@ -195,8 +372,14 @@ class BaseballGame {
                 return;
             }
 
+            if (this.currentGame) {
+                await this.submitBundledGame(Object.fromEntries(formData));
+                return;
+            }
+
             // Submit to server
-            const response = await fetch('/submit_guesses', {
+            // The daily game posts to its own route; see data-submit-url on <body>
+            const response = await fetch(document.body.dataset.submitUrl || '/submit_guesses', {
                 method: 'POST',
                 body: formData
             });
@@ -227,6 +410,9 @@ class BaseballGame {
         // Hide submit button, show new game button
         document.getElementById('submitGuesses').style.display = 'none';
         document.getElementById('newGame').style.display = 'inline-block';
+        if (this.upcomingGames.length) {
+            document.getElementById('nextGame').style.display = 'inline-block';
+        }
 
         // Update score summary
         document.getElementById('correctCount').textContent = data.correct_count;
@@ -0,0 +1,180 @@
+/**
+ * Baseball Position Guessing Game - "Guess the teams" mode
+ *
+ * The player is given a name and lists the seasons (year and team) that
+ * player was in the starting nine. Teams are offered by franchise; the
+ * server accepts any name a franchise has gone by.
+ */
+
+class ReverseGame {
+    constructor() {
+        this.guesses = [];
+        this.isSubmitting = false;
+        this.init();
+    }
+
+    async init() {
+        document.getElementById('seasonForm').addEventListener('submit', (e) => {
+            e.preventDefault();
+            this.addGuess();
+        });
+        document.getElementById('submitGuesses').addEventListener('click', () => this.submitGuesses());
+        document.getElementById('newGame').addEventListener('click', () => this.startGame(null));
+
+        await this.loadTeams();
+        this.startGame(new URLSearchParams(window.location.search).get('player'));
+    }
+
+    async loadTeams() {
+        const teamSelect = document.getElementById('teamSelect');
+        try {
+            const response = await fetch('/api/catalog');
+            if (!response.ok) {
+                throw new Error(`Server error: ${response.status}`);
+            }
+            const catalog = await response.json();
+            catalog.franchises.forEach((franchise) => {
+                const option = document.createElement('option');
+                option.value = franchise.name;
+                option.textContent = franchise.teams.length > 1
+                    ? `${franchise.name} (${franchise.teams.filter((team) => team !== franchise.name).join(', ')})`
+                    : franchise.name;
+                teamSelect.appendChild(option);
+            });
+            const yearInput = document.getElementById('yearInput');
+            yearInput.min = catalog.min_year;
+            yearInput.max = catalog.max_year;
+        } catch (error) {
+            console.error('Error loading teams:', error);
+            this.showError('Could not load the list of teams. Please reload the page.');
+        }
+    }
+
+    async startGame(player) {
+        this.guesses = [];
+        this.renderGuesses();
+        document.getElementById('resultsSection').style.display = 'none';
+        document.getElementById('submitGuesses').style.display = 'inline-block';
+        this.showError(null);
+
+        const url = player
+            ? `${document.body.dataset.newUrl}?player=${encodeURIComponent(player)}`
+            : document.body.dataset.newUrl;
+        try {
+            const response = await fetch(url);
+            const data = await response.json();
+            if (!response.ok || data.error) {
+                throw new Error(data.error || `Server error: ${response.status}`);
+            }
+            document.getElementById('playerName').textContent = data.player;
+            document.getElementById('playerSummary').textContent =
+                `Started ${data.seasons} season${data.seasons === 1 ? '' : 's'} between ${data.min_year} and ${data.max_year}. Which?`;
+        } catch (error) {
+            console.error('Error starting game:', error);
+            this.showError(player ? `No starting seasons found for ${player}.` : 'Could not start a game. Please try again.');
+        }
+    }
+
+    addGuess() {
+        const year = parseInt(document.getElementById('yearInput').value, 10);
+        const team = document.getElementById('teamSelect').value;
+        if (!year || !team) {
+            return;
+        }
+        if (!this.guesses.some((guess) => guess.year === year && guess.team === team)) {
+            this.guesses.push({ year, team });
+            this.guesses.sort((a, b) => a.year - b.year);
+        }
+        this.renderGuesses();
+        document.getElementById('yearInput').select();
+    }
+
+    renderGuesses() {
+        const list = document.getElementById('guessList');
+        list.innerHTML = '';
+        this.guesses.forEach((guess, index) => {
+            const item = document.createElement('li');
+            item.className = 'list-group-item d-flex justify-content-between align-items-center';
+            item.textContent = `${guess.year} ${guess.team}`;
+            const remove = document.createElement('button');
+            remove.type = 'button';
+            remove.className = 'btn-close';
+            remove.setAttribute('aria-label', `Remove ${guess.year} ${guess.team}`);
+            remove.addEventListener('click', () => {
+                this.guesses.splice(index, 1);
+                this.renderGuesses();
+            });
+            item.appendChild(remove);
+            list.appendChild(item);
+        });
+    }
+
+    async submitGuesses() {
+        if (this.isSubmitting) {
+            return;
+        }
+        if (!this.guesses.length) {
+            this.showError('Add at least one season before submitting.');
+            return;
+        }
+        this.isSubmitting = true;
+        try {
+            const response = await fetch(document.body.dataset.submitUrl, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ guesses: this.guesses })
+            });
+            const data = await response.json();
+            if (!response.ok || data.error) {
+                throw new Error(data.error || `Server error: ${response.status}`);
+            }
+            this.displayResults(data);
+        } catch (error) {
+            console.error('Error submitting guesses:', error);
+            this.showError('An error occurred while submitting your guesses. Please try again.');
+        } finally {
+            this.isSubmitting = false;
+        }
+    }
+
+    displayResults(data) {
+        this.showError(null);
+        document.getElementById('submitGuesses').style.display = 'none';
+        document.getElementById('correctCount').textContent = data.correct_count;
+        document.getElementById('totalSeasons').textContent = data.num_seasons;
+        document.getElementById('percentage').textContent = `${data.percentage}%`;
+
+        const tbody = document.getElementById('resultsTableBody');
+        tbody.innerHTML = '';
+        const addRow = (year, team, message, resultClass) => {
+            const row = document.createElement('tr');
+            [year, team, message].forEach((text) => {
+                const cell = document.createElement('td');
+                cell.textContent = text;
+                row.appendChild(cell);
+            });
+            row.lastChild.className = resultClass;
+            tbody.appendChild(row);
+        };
+        data.results.forEach((result) => {
+            addRow(result.year, result.team, result.message, result.correct ? 'result-correct' : 'result-incorrect');
+        });
+        data.missed.forEach((season) => {
+            addRow(season.year, season.team, `Missed (${season.position})`, 'result-no-guess');
+        });
+
+        const section = document.getElementById('resultsSection');
+        section.style.display = 'block';
+        section.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    }
+
+    showError(message) {
+        const box = document.getElementById('errorMessage');
+        box.textContent = message || '';
+        box.style.display = message ? 'block' : 'none';
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    new ReverseGame();
+});
@@ -0,0 +1,87 @@
+/**
+ * Baseball Position Guessing Game - Head-to-head rooms
+ *
+ * Loaded on a room's game page. Players join under a display name, then
+ * play the room's season like any other game (game.js posts their guesses
+ * to the room); the standings follow the room's server-sent events.
+ */
+
+class RoomClient {
+    constructor(panel) {
+        this.panel = panel;
+        this.joinForm = document.getElementById('roomJoinForm');
+        this.submitButton = document.getElementById('submitGuesses');
+        this.init();
+    }
+
+    init() {
+        // Guesses only count once you have joined
+        this.submitButton.disabled = true;
+        this.joinForm.addEventListener('submit', (e) => {
+            e.preventDefault();
+            this.join();
+        });
+        document.getElementById('roomLink').textContent = window.location.href;
+        this.listen();
+    }
+
+    async join() {
+        const message = document.getElementById('roomJoinMessage');
+        message.textContent = '';
+        try {
+            const response = await fetch(this.panel.dataset.joinUrl, {
+                method: 'POST',
+                body: new FormData(this.joinForm)
+            });
+            const data = await response.json();
+            if (!response.ok || data.error) {
+                message.textContent = data.error || `Server error: ${response.status}`;
+                return;
+            }
+            const name = new FormData(this.joinForm).get('name').trim();
+            this.joinForm.style.display = 'none';
+            document.getElementById('roomPlayer').textContent = `Playing as ${name}`;
+            this.submitButton.disabled = false;
+            this.renderStandings(data.standings);
+        } catch (error) {
+            console.error('Error joining room:', error);
+            message.textContent = 'Could not join the room. Please try again.';
+        }
+    }
+
+    listen() {
+        // EventSource reconnects on its own, and every connection starts with the room's state
+        const events = new EventSource(this.panel.dataset.eventsUrl);
+        const update = (e) => this.renderStandings(JSON.parse(e.data).standings);
+        ['state', 'join', 'score'].forEach((event) => events.addEventListener(event, update));
+        window.addEventListener('pagehide', () => events.close());
+    }
+
+    renderStandings(standings) {
+        const list = document.getElementById('roomStandings');
+        list.innerHTML = '';
+        standings.finished.forEach((score, index) => {
+            const item = document.createElement('li');
+            item.className = 'list-group-item d-flex justify-content-between';
+            const name = document.createElement('span');
+            name.textContent = `${index + 1}. ${score.name}`;
+            const result = document.createElement('span');
+            result.textContent = `${score.correct_count}/${score.num_players}`;
+            item.append(name, result);
+            list.appendChild(item);
+        });
+        standings.waiting.forEach((player) => {
+            const item = document.createElement('li');
+            item.className = 'list-group-item text-muted';
+            item.textContent = `${player} (still playing)`;
+            list.appendChild(item);
+        });
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const panel = document.getElementById('roomPanel');
+    if (panel) {
+        new RoomClient(panel);
+    }
+});
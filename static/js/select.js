@@ -1,63 +1,17 @@
 (function() {
 
-  const teamDict = {
-    "Anaheim Angels": "Anaheim Angels",
-    "Arizona Diamondbacks": "Arizona Diamondbacks",
-    "Atlanta Braves": "Atlanta Braves",
-    "Baltimore Orioles": "Baltimore Orioles",
-    "Boston Red Sox": "Boston Red Sox",
-    "Chicago Cubs": "Chicago Cubs",
-    "Chicago White Sox": "Chicago White Sox",
-    "Cincinnati Reds": "Cincinnati Reds",
-    "Cleveland Guardians": "Cleveland Guardians",
-    "Cleveland Indians": "Cleveland Indians",
-    "Colorado Rockies": "Colorado Rockies",
-    "Detroit Tigers": "Detroit Tigers",
-    "Florida Marlins": "Florida Marlins",
-    "Houston Astros": "Houston Astros",
-    "Kansas City Royals": "Kansas City Royals",
-    "Los Angeles Angels": "Los Angeles Angels",
-    "Los Angeles Angels of Anaheim": "Los Angeles Angels of Anaheim",
-    "Los Angeles Dodgers": "Los Angeles Dodgers",
-    "Miami Marlins": "Miami Marlins",
-    "Milwaukee Brewers": "Milwaukee Brewers",
-    "Minnesota Twins": "Minnesota Twins",
-    "Montreal Expos": "Montreal Expos",
-    "New York Mets": "New York Mets",
-    "New York Yankees": "New York Yankees",
-    "Oakland Athletics": "Oakland Athletics",
-    "Philadelphia Phillies": "Philadelphia Phillies",
-    "Pittsburgh Pirates": "Pittsburgh Pirates",
-    "San Diego Padres": "San Diego Padres",
-    "San Francisco Giants": "San Francisco Giants",
-    "Seattle Mariners": "Seattle Mariners",
-    "St. Louis Cardinals": "St. Louis Cardinals",
-    "Tampa Bay Devil Rays": "Tampa Bay Devil Rays",
-    "Tampa Bay Rays": "Tampa Bay Rays",
-    "Texas Rangers": "Texas Rangers",
-    "Toronto Blue Jays": "Toronto Blue Jays",
-    "Washington Nationals": "Washington Nationals"
-  };
-
-  // create year boundaries
-  const minYear = 2000;
-  const maxYear = 2024;
-
-  // some teams have special year ranges, so we can filter the year dropdown based on the team selection
-  const teamYearRanges = {
-    "Anaheim Angels": [minYear, 2004],
-    "Loas Angeles Angels of Anaheim": [2005, 2015],
-    "Los Angeles Angels": [2016, maxYear],
-    "Florida Marlins": [minYear, 2011],
-    "Miami Marlins": [2012, maxYear],
-    "Montreal Expos": [minYear, 2004],
-    "Washington Nationals": [2005, maxYear],
-    "Tampa Bay Devil Rays": [minYear, 2007],
-    "Tampa Bay Rays": [2008, maxYear],
-    "Cleveland Indians": [minYear, 2021],
-    "Cleveland Guardians": [2022, maxYear],
-    "": [minYear, maxYear] // default for "Any" option
-  };
+  // teams, their year ranges and franchises come from the loaded dataset
+  let catalog = { min_year: null, max_year: null, teams: [], franchises: [] };
+  let teamsByName = {};
+
+  async function loadCatalog() {
+    const response = await fetch("/api/catalog");
+    if (!response.ok) {
+      throw new Error(`Catalog request failed: ${response.status}`);
+    }
+    catalog = await response.json();
+    teamsByName = Object.fromEntries(catalog.teams.map((team) => [team.name, team]));
+  }
 
   const modal = document.getElementById("filterModal");
   const openBtn = document.getElementById("newGame");
@@ -65,8 +19,18 @@
   const applyBtn = document.getElementById("applyFilters");
   const teamSelect = document.getElementById("teamSelect");
   const yearSelect = document.getElementById("yearSelect");
+  const difficultySelect = document.getElementById("difficultySelect");
+  const lenientCheck = document.getElementById("lenientCheck");
+  const createRoomBtn = document.getElementById("createRoom");
+
+  function teamOption(name) {
+    const option = document.createElement("option");
+    option.value = name;       // URL value
+    option.textContent = name; // Display text
+    return option;
+  }
 
-  // Populate team dropdown
+  // Populate team dropdown, grouping renamed and relocated teams by franchise
   function populateTeams() {
     teamSelect.innerHTML = "";
 
@@ -75,11 +39,15 @@
     anyOption.textContent = "Any";
     teamSelect.appendChild(anyOption);
 
-    Object.entries(teamDict).forEach(([value, label]) => {
-      const option = document.createElement("option");
-      option.value = value;     // URL value
-      option.textContent = label; // Display text
-      teamSelect.appendChild(option);
+    catalog.franchises.forEach((franchise) => {
+      if (franchise.teams.length === 1) {
+        teamSelect.appendChild(teamOption(franchise.teams[0]));
+        return;
+      }
+      const group = document.createElement("optgroup");
+      group.label = franchise.name;
+      franchise.teams.forEach((name) => group.appendChild(teamOption(name)));
+      teamSelect.appendChild(group);
     });
   }
 
@@ -89,19 +57,23 @@
     anyOption.value = "";
     anyOption.textContent = "Any";
     yearSelect.appendChild(anyOption);
-    let startYear = minYear;
-    let endYear = maxYear;
-    const selectedTeam = teamSelect.value;
-    if (selectedTeam && teamYearRanges[selectedTeam]) {
-      [startYear, endYear] = teamYearRanges[selectedTeam];
-    }
 
-    for (let year = startYear; year <= endYear; year++) {
-      const option = document.createElement("option");
-      option.value = year;
-      option.textContent = year;
-      yearSelect.appendChild(option);
+    // a team only offers the years it played; "Any" offers every year
+    const selectedTeam = teamsByName[teamSelect.value];
+    let ranges = [];
+    if (selectedTeam) {
+      ranges = selectedTeam.years;
+    } else if (catalog.min_year !== null) {
+      ranges = [[catalog.min_year, catalog.max_year]];
     }
+    ranges.forEach(([startYear, endYear]) => {
+      for (let year = startYear; year <= endYear; year++) {
+        const option = document.createElement("option");
+        option.value = year;
+        option.textContent = year;
+        yearSelect.appendChild(option);
+      }
+    });
   }
 
   teamSelect.addEventListener("change", populateYears);
@@ -110,6 +82,8 @@
     const params = new URLSearchParams(window.location.search);
     teamSelect.value = params.get("team") || "";
     yearSelect.value = params.get("year") || "";
+    difficultySelect.value = params.get("difficulty") || "";
+    lenientCheck.checked = params.get("lenient") === "1";
   }
 
   function updateURL() {
@@ -128,8 +102,21 @@
       params.delete("year");
     }
 
-    // reload the page
-    window.location.search = params.toString();
+    // difficulty only applies when neither team nor year is picked
+    if (difficultySelect.value) {
+      params.set("difficulty", difficultySelect.value);
+    } else {
+      params.delete("difficulty");
+    }
+
+    if (lenientCheck.checked) {
+      params.set("lenient", "1");
+    } else {
+      params.delete("lenient");
+    }
+
+    // start the new game (from the daily page too)
+    window.location.href = "/?" + params.toString();
   }
 
   openBtn.onclick = () => {
@@ -146,12 +133,36 @@
     modal.style.display = "none";
   };
 
+  // open a room on the chosen season (or a random one) and go to its page;
+  // the button is only there when the server has rooms turned on
+  if (createRoomBtn) createRoomBtn.onclick = async () => {
+    const form = new FormData();
+    form.set("team", teamSelect.value);
+    form.set("year", yearSelect.value);
+    form.set("difficulty", difficultySelect.value);
+    if (lenientCheck.checked) form.set("lenient", "1");
+    try {
+      const response = await fetch("/rooms", { method: "POST", body: form });
+      const room = await response.json();
+      if (!response.ok) throw new Error(room.error || `Server error: ${response.status}`);
+      window.location.href = room.play;
+    } catch (error) {
+      console.error("Error opening a room:", error);
+      alert("Could not open a room. Please try again.");
+    }
+  };
+
   // Close when clicking outside
   modal.addEventListener("click", (e) => {
     if (e.target === modal) modal.style.display = "none";
   });
 
-  document.addEventListener("DOMContentLoaded", () => {
+  document.addEventListener("DOMContentLoaded", async () => {
+    try {
+      await loadCatalog();
+    } catch (error) {
+      console.error("Error loading team catalog:", error);
+    }
     populateTeams();
     syncFromURL();
     populateYears();